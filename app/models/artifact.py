@@ -0,0 +1,137 @@
+import datetime
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+
+from app.models.forest import CompiledForest
+
+# ==========================================
+# Artefact de modèle mappé en mémoire
+# ==========================================
+#
+# Un artefact est un répertoire contenant :
+#   - manifest.json : version, seuil, features, classes et description des tableaux ;
+#   - forest-<sha>.bin : tableaux de la forêt compilée, bruts et alignés, bout à bout.
+# Le buffer est ouvert en lecture seule via mmap : les workers uvicorn d'une même
+# machine partagent alors une seule copie physique de la forêt (cache de pages).
+# Son nom dépend de son contenu : un nouvel export n'écrase jamais un fichier encore
+# mappé par un worker qui sert l'ancienne version.
+
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+BUFFER_NAME = "forest.bin"  # Nom fixe des artefacts exportés avant les noms versionnés
+
+# Tableaux persistés et leur type sur disque (fixe : indépendant de la plateforme)
+ARRAY_DTYPES = {
+    "feature": "<i8",
+    "threshold": "<f8",
+    "left": "<i8",
+    "right": "<i8",
+    "value": "<f8",
+    "roots": "<i8",
+}
+ALIGNMENT = 64
+
+
+class ArtifactError(ValueError):
+    """Artefact absent, incomplet, corrompu ou d'un format non supporté."""
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_artifact(
+    forest: CompiledForest,
+    directory: str | Path,
+    threshold: float,
+    features: list[str],
+    model_version: str,
+) -> dict:
+    """Écrit l'artefact (tableaux bruts + manifeste) et renvoie le manifeste.
+
+    Le manifeste est écrit en dernier, via un fichier temporaire renommé : un artefact
+    dont l'export a été interrompu n'est jamais pris pour un artefact valide.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp_buffer = directory / f"{BUFFER_NAME}.tmp"
+
+    arrays, offset = {}, 0
+    with open(tmp_buffer, "wb") as f:
+        for name, dtype in ARRAY_DTYPES.items():
+            data = np.ascontiguousarray(getattr(forest, name), dtype=dtype)
+            padding = -offset % ALIGNMENT
+            f.write(b"\0" * padding)
+            offset += padding
+            f.write(data.tobytes())
+            arrays[name] = {"dtype": dtype, "shape": list(data.shape), "offset": offset}
+            offset += data.nbytes
+
+    checksum = sha256_file(tmp_buffer)
+    buffer_name = f"forest-{checksum[:16]}.bin"
+    tmp_buffer.replace(directory / buffer_name)
+
+    manifest = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "model_version": model_version,
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "threshold": float(threshold),
+        "features": list(features),
+        "n_features": forest.n_features,
+        "classes": forest.classes_.tolist(),
+        "max_depth": forest.max_depth,
+        "arrays": arrays,
+        "buffer": buffer_name,
+        "sha256": checksum,
+    }
+    tmp_path = directory / f"{MANIFEST_NAME}.tmp"
+    tmp_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    tmp_path.replace(directory / MANIFEST_NAME)
+
+    # Buffers des exports précédents : supprimer un fichier encore mappé est sans risque
+    # (le mapping reste valide jusqu'à sa fermeture), il n'est simplement plus visible
+    for stale in directory.glob("forest*.bin"):
+        if stale.name != buffer_name:
+            stale.unlink()
+    return manifest
+
+
+def load_artifact(directory: str | Path, verify: bool = True) -> tuple[CompiledForest, dict]:
+    """Ouvre l'artefact en mmap (lecture seule) et renvoie (forêt compilée, manifeste).
+
+    Avec `verify=True`, le SHA-256 du buffer est comparé à celui du manifeste.
+    """
+    directory = Path(directory)
+    try:
+        manifest = json.loads((directory / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        raise ArtifactError(f"Manifeste illisible dans {directory} : {e}") from e
+
+    if manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ArtifactError(f"Format d'artefact non supporté : {manifest.get('format_version')}")
+
+    buffer_path = directory / manifest.get("buffer", BUFFER_NAME)
+    if verify and sha256_file(buffer_path) != manifest["sha256"]:
+        raise ArtifactError(f"Somme de contrôle invalide pour {buffer_path}.")
+
+    buffer = np.memmap(buffer_path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in manifest["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        end = spec["offset"] + count * dtype.itemsize
+        if end > len(buffer):
+            raise ArtifactError(f"Tableau {name!r} hors de {buffer_path}.")
+        arrays[name] = buffer[spec["offset"] : end].view(dtype).reshape(spec["shape"])
+
+    forest = CompiledForest(
+        **arrays, n_features=manifest["n_features"], classes=manifest["classes"]
+    )
+    return forest, manifest
@@ -0,0 +1,87 @@
+from operator import attrgetter, itemgetter
+
+import numpy as np
+
+from app.schemas import InputData
+
+# ==========================================
+# Correspondance Schéma API -> Colonnes du modèle
+# ==========================================
+
+# Champ `InputData` -> nom EXACT de la colonne vue par le modèle à l'entraînement
+FIELD_TO_COLUMN = {
+    "ratio_surcharge_anciennete": "ratio_surcharge_anciennete",
+    "nombre_participation_pee": "nombre_participation_pee",
+    "statut_marital_divorce": "statut_marital_Divorcé(e)",
+    "age": "age",
+    "annees_dans_l_entreprise": "annees_dans_l_entreprise",
+    "frequence_deplacement_frequent": "frequence_deplacement_Frequent",
+    "poste_representant_commercial": "poste_Représentant Commercial",
+    "niveau_education": "niveau_education",
+    "domaine_etude_marketing": "domaine_etude_Marketing",
+    "poste_consultant": "poste_Consultant",
+}
+
+# Variables continues (les autres champs sont entiers)
+CONTINUOUS_FIELDS = ["ratio_surcharge_anciennete"]
+
+# Ordre d'entraînement utilisé quand le pickle ne fournit pas sa liste de features
+DEFAULT_FEATURES = list(FIELD_TO_COLUMN.values())
+
+
+class FeatureSchemaError(ValueError):
+    """La liste de features du modèle ne correspond pas au schéma `InputData`."""
+
+
+class FeatureBuilder:
+    """Construit les vecteurs de features du modèle sans passer par pandas.
+
+    Le mapping champ -> position de colonne est compilé une seule fois (au chargement
+    du modèle) ; chaque requête écrit ensuite directement dans un tableau NumPy.
+    """
+
+    def __init__(self, features: list[str]):
+        column_to_field = {column: field for field, column in FIELD_TO_COLUMN.items()}
+
+        unknown = [column for column in features if column not in column_to_field]
+        missing = [column for column in column_to_field if column not in features]
+        if unknown or missing or len(set(features)) != len(features):
+            raise FeatureSchemaError(
+                "Les features du modèle ne correspondent pas au schéma InputData "
+                f"(inconnues : {unknown}, absentes : {missing})."
+            )
+
+        schema_fields = set(InputData.model_fields)
+        if schema_fields != set(FIELD_TO_COLUMN):
+            raise FeatureSchemaError(
+                "FIELD_TO_COLUMN n'est plus aligné sur InputData "
+                f"(écart : {sorted(schema_fields ^ set(FIELD_TO_COLUMN))})."
+            )
+
+        self.features = list(features)
+        self.fields = [column_to_field[column] for column in features]
+        self.n_features = len(self.fields)
+
+        # Getters compilés : renvoient les valeurs directement dans l'ordre du modèle
+        self._get_attrs = attrgetter(*self.fields)
+        self._get_items = itemgetter(*self.fields)
+
+    def build_row(self, item: InputData) -> np.ndarray:
+        """Renvoie une matrice (1, n_features) pour un seul employé."""
+        row = np.empty((1, self.n_features), dtype=np.float64)
+        row[0] = self._get_attrs(item)
+        return row
+
+    def build_matrix(self, items: list[InputData]) -> np.ndarray:
+        """Renvoie une matrice (len(items), n_features) remplie ligne par ligne."""
+        matrix = np.empty((len(items), self.n_features), dtype=np.float64)
+        for i, item in enumerate(items):
+            matrix[i] = self._get_attrs(item)
+        return matrix
+
+    def build_matrix_from_dicts(self, records: list[dict]) -> np.ndarray:
+        """Variante de `build_matrix` pour des dictionnaires déjà validés."""
+        matrix = np.empty((len(records), self.n_features), dtype=np.float64)
+        for i, record in enumerate(records):
+            matrix[i] = self._get_items(record)
+        return matrix
@@ -0,0 +1,359 @@
+import functools
+import math
+from pathlib import Path
+
+import numpy as np
+
+# ==========================================
+# Moteur d'inférence compilé pour RandomForest
+# ==========================================
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+PARITY_DATASET_PATH = BASE_DIR / "final_data_set.csv"
+
+# Sortie anticipée : risque d'erreur toléré par décision (réparti entre les vérifications
+# successives) et taille des blocs d'arbres
+EARLY_EXIT_DELTA = 0.05
+EARLY_EXIT_BLOCK = 10
+# Choix du parcours selon la taille du lot (croisements mesurés par benchmarks/early_exit.py) :
+# scalaire jusqu'à EARLY_EXIT_SCALAR_ROWS lignes, par blocs à partir de EARLY_EXIT_BLOCK_ROWS
+# et, entre les deux, tous les arbres du budget en un parcours : à ces tailles, le surcoût
+# NumPy de chaque bloc dépasse le gain des arbres évités (pas d'arrêt anticipé ; forêt de
+# 100 arbres, 64 lignes : 2,2 ms en un parcours contre 3,5 ms par blocs)
+EARLY_EXIT_SCALAR_ROWS = 2
+EARLY_EXIT_BLOCK_ROWS = 128
+
+
+class ForestParityError(AssertionError):
+    """Les probabilités du moteur compilé s'écartent de celles de sklearn."""
+
+
+def is_compilable(model) -> bool:
+    """Indique si le modèle est une forêt de classification binaire mono-sortie."""
+    estimators = getattr(model, "estimators_", None)
+    if not estimators or getattr(model, "n_outputs_", 1) != 1:
+        return False
+    if len(getattr(model, "classes_", [])) != 2:
+        return False
+    return all(hasattr(tree, "tree_") for tree in estimators)
+
+
+class CompiledForest:
+    """Forêt aplatie en tableaux NumPy contigus, évaluée par parcours vectorisé.
+
+    Tous les arbres sont concaténés dans les mêmes tableaux (`feature`, `threshold`,
+    `left`, `right`, `value`) ; `roots` donne l'indice de la racine de chaque arbre.
+    Les feuilles bouclent sur elles-mêmes (left == right == indice du nœud), ce qui sert
+    à la fois de marqueur `is_leaf` et de point fixe pour le parcours.
+    `value` contient la probabilité de la classe positive pour chaque nœud.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, n_features, classes):
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.right = np.ascontiguousarray(right, dtype=np.intp)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        self.n_features = int(n_features)
+        self.classes_ = np.asarray(classes)
+        self.n_trees = len(self.roots)
+        self.is_leaf = self.left == np.arange(len(self.left))
+        self.max_depth = self._compute_max_depth()
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """Aplatit les arbres d'un RandomForestClassifier entraîné."""
+        if not is_compilable(model):
+            raise TypeError("Seules les forêts de classification binaire sont compilables.")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes)
+            is_leaf = tree.children_left == -1
+
+            # Probabilité de la classe positive (value normalisée, comme predict_proba)
+            counts = tree.value[:, 0, :]
+            proba = counts[:, 1] / counts.sum(axis=1)
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            values.append(proba)
+            roots.append(offset)
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots),
+            n_features=model.n_features_in_,
+            classes=model.classes_,
+        )
+
+    def _compute_max_depth(self) -> int:
+        """Profondeur maximale de la forêt (nombre d'itérations du parcours)."""
+        depth = 0
+        frontier = self.roots[~self.is_leaf[self.roots]]
+        while len(frontier):
+            frontier = np.concatenate([self.left[frontier], self.right[frontier]])
+            frontier = frontier[~self.is_leaf[frontier]]
+            depth += 1
+        return depth
+
+    def _check_input(self, X) -> np.ndarray:
+        # sklearn évalue les arbres en float32 : même conversion pour la parité
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"X doit avoir la forme (n, {self.n_features}), reçu {X.shape}.")
+        # Comme sklearn : NaN et valeurs hors float32 (devenues inf) sont refusés, car le
+        # parcours compilé n'implémente pas le routage des valeurs manquantes
+        if not np.isfinite(X).all():
+            raise ValueError("X contient des valeurs NaN ou infinies (hors plage float32).")
+        return X
+
+    def _leaves(self, X: np.ndarray, roots: np.ndarray) -> np.ndarray:
+        """Feuilles atteintes par chaque ligne (X déjà vérifié) dans les arbres de `roots`."""
+        # Parcours "actif" : seules les paires (ligne, arbre) pas encore arrivées en feuille
+        # sont avancées à chaque niveau, ce qui évite de repayer les arbres peu profonds.
+        n_rows = X.shape[0]
+        X_flat = X.ravel()
+        nodes = np.tile(roots, n_rows)
+        row_offsets = np.repeat(np.arange(n_rows) * self.n_features, len(roots))
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            go_left = X_flat[row_offsets[active] + self.feature[current]] <= self.threshold[current]
+            current = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = current
+            active = active[~self.is_leaf[current]]
+        return nodes.reshape(n_rows, len(roots))
+
+    def apply(self, X) -> np.ndarray:
+        """Renvoie l'indice (global) de la feuille atteinte, shape (n_lignes, n_arbres)."""
+        return self._leaves(self._check_input(X), self.roots)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Même contrat que sklearn : shape (n_lignes, 2)."""
+        positive = self.value[self.apply(X)].mean(axis=1)
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+    def predict_proba_early_exit(
+        self,
+        X,
+        threshold: float,
+        delta: float = EARLY_EXIT_DELTA,
+        max_trees: int | None = None,
+        block: int = EARLY_EXIT_BLOCK,
+        early_exit: bool = True,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Probabilités estimées en arrêtant chaque ligne dès que sa décision est acquise.
+
+        Les arbres sont évalués dans l'ordre, par blocs de `block`. Après chaque bloc, une
+        ligne s'arrête si la décision `proba >= threshold` ne peut plus changer :
+        - de façon certaine : même avec 0 ou 1 sur tous les arbres restants, la moyenne
+          finale reste du même côté du seuil ;
+        - avec une probabilité d'erreur au plus `delta` : l'écart entre la moyenne
+          partielle et le seuil dépasse la borne de Hoeffding-Serfling (échantillonnage
+          sans remise parmi les arbres, votes dans [0, 1]). Le test étant répété après
+          chaque bloc, `delta` est réparti entre les ceil(budget / block) vérifications
+          (borne de l'union) : le risque vaut pour l'ensemble du parcours d'une ligne.
+        `max_trees` plafonne le nombre d'arbres évalués (budget de latence) : les lignes
+        encore indécises sont alors tranchées sur leur moyenne partielle. Sans
+        `early_exit`, c'est un simple plafond : les `max_trees` premiers arbres sont
+        évalués pour chaque ligne, sans règle d'arrêt. Entre EARLY_EXIT_SCALAR_ROWS et
+        EARLY_EXIT_BLOCK_ROWS lignes exclues, tous les arbres du budget sont évalués en un
+        parcours (plus rapide qu'un arrêt par blocs à cette taille).
+
+        Renvoie (probabilités de la classe positive, nombre d'arbres évalués par ligne).
+        """
+        X = self._check_input(X)
+        budget = min(max_trees or self.n_trees, self.n_trees)
+        log_term = np.log(2 * math.ceil(budget / block) / delta) / 2
+        if not early_exit:
+            return self._predict_budget(X, budget)
+        if len(X) <= EARLY_EXIT_SCALAR_ROWS:
+            results = [self._early_exit_row(x, threshold, log_term, budget, block) for x in X]
+            probas, trees = zip(*results, strict=True) if results else ((), ())
+            return np.array(probas, dtype=np.float64), np.array(trees, dtype=np.intp)
+        if len(X) < EARLY_EXIT_BLOCK_ROWS:
+            # Lots moyens : un seul parcours des arbres du budget reste le plus rapide
+            return self._predict_budget(X, budget)
+
+        sums = np.zeros(len(X))
+        trees = np.zeros(len(X), dtype=np.intp)
+        active = np.arange(len(X))
+        evaluated = 0
+        while active.size and evaluated < budget:
+            roots = self.roots[evaluated : min(evaluated + block, budget)]
+            sums[active] += self.value[self._leaves(X[active], roots)].sum(axis=1)
+            evaluated += len(roots)
+            trees[active] = evaluated
+
+            partial = sums[active]
+            remaining = self.n_trees - evaluated
+            certain = (partial >= threshold * self.n_trees) | (
+                partial + remaining < threshold * self.n_trees
+            )
+            mean = partial / evaluated
+            bound = np.sqrt((1 - (evaluated - 1) / self.n_trees) * log_term / evaluated)
+            confident = (mean - bound >= threshold) | (mean + bound < threshold)
+            active = active[~(certain | confident)]
+        return sums / trees, trees
+
+    def _predict_budget(self, X: np.ndarray, budget: int) -> tuple[np.ndarray, np.ndarray]:
+        """Moyenne des `budget` premiers arbres pour chaque ligne, en un parcours."""
+        probas = self.value[self._leaves(X, self.roots[:budget])].mean(axis=1)
+        return probas, np.full(len(X), budget, dtype=np.intp)
+
+    @functools.cached_property
+    def _node_lists(self) -> tuple[list, ...]:
+        # Listes Python : parcours scalaire sans surcoût d'appel NumPy par nœud
+        return (
+            self.feature.tolist(),
+            self.threshold.tolist(),
+            self.left.tolist(),
+            self.right.tolist(),
+            self.value.tolist(),
+            self.roots.tolist(),
+        )
+
+    def _early_exit_row(
+        self, x: np.ndarray, threshold: float, log_term: float, budget: int, block: int
+    ) -> tuple[float, int]:
+        """Même règle d'arrêt que le chemin vectorisé, pour une ligne, arbre par arbre."""
+        feature, thresholds, left, right, value, roots = self._node_lists
+        x = x.tolist()
+        total = 0.0
+        evaluated = 0
+        while evaluated < budget:
+            block_sum = 0.0
+            for root in roots[evaluated : min(evaluated + block, budget)]:
+                node, child = root, -1
+                while child != node:
+                    child = node
+                    node = left[node] if x[feature[node]] <= thresholds[node] else right[node]
+                block_sum += value[node]
+            total += block_sum
+            evaluated = min(evaluated + block, budget)
+
+            remaining = self.n_trees - evaluated
+            if total >= threshold * self.n_trees or total + remaining < threshold * self.n_trees:
+                break
+            mean = total / evaluated
+            bound = math.sqrt((1 - (evaluated - 1) / self.n_trees) * log_term / evaluated)
+            if mean - bound >= threshold or mean + bound < threshold:
+                break
+        return total / evaluated, evaluated
+
+    @functools.cached_property
+    def base_value(self) -> float:
+        """Probabilité moyenne des racines : point de départ de toutes les explications."""
+        return float(self.value[self.roots].mean())
+
+    def explain(self, X) -> tuple[np.ndarray, np.ndarray]:
+        """Contributions par feature (décomposition des chemins, méthode de Saabas).
+
+        Chaque nœud traversé attribue à la feature testée l'écart de probabilité entre
+        l'enfant choisi et lui-même ; moyennées sur les arbres, les contributions vérifient
+        `base_value + contributions.sum(axis=1) == proba`. Même parcours actif que `apply`,
+        les écarts étant cumulés à chaque niveau par un seul `bincount` pondéré.
+
+        Renvoie (probabilités de la classe positive, contributions (n_lignes, n_features)).
+        """
+        X = self._check_input(X)
+        n_rows = X.shape[0]
+        X_flat = X.ravel()
+        nodes = np.tile(self.roots, n_rows)
+        row_offsets = np.repeat(np.arange(n_rows) * self.n_features, self.n_trees)
+        contributions = np.zeros(n_rows * self.n_features)
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            feature_index = row_offsets[active] + self.feature[current]
+            go_left = X_flat[feature_index] <= self.threshold[current]
+            child = np.where(go_left, self.left[current], self.right[current])
+            contributions += np.bincount(
+                feature_index,
+                weights=self.value[child] - self.value[current],
+                minlength=contributions.size,
+            )
+            nodes[active] = child
+            active = active[~self.is_leaf[child]]
+
+        probas = self.value[nodes].reshape(n_rows, self.n_trees).mean(axis=1)
+        return probas, contributions.reshape(n_rows, self.n_features) / self.n_trees
+
+
+class ServingForest:
+    """Moteur de service : forêt compilée, avec délégation optionnelle à sklearn.
+
+    Le parcours NumPy élimine le surcoût fixe de sklearn (~25 ms par appel) et domine
+    sur les petits lots ; au-delà de `max_compiled_rows` lignes, le code Cython de sklearn
+    redevient plus rapide et prend le relais s'il est disponible.
+    """
+
+    def __init__(self, compiled: CompiledForest, reference=None, max_compiled_rows: int = 400):
+        self.compiled = compiled
+        self.reference = reference
+        self.max_compiled_rows = max_compiled_rows
+        self.classes_ = compiled.classes_
+        self.n_features_in_ = compiled.n_features
+
+    def predict_proba(self, X) -> np.ndarray:
+        if self.reference is not None and len(X) > self.max_compiled_rows:
+            return np.asarray(self.reference.predict_proba(X), dtype=np.float64)
+        return self.compiled.predict_proba(X)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+
+def explainable_forest(model) -> CompiledForest | None:
+    """Forêt compilée à utiliser pour expliquer les prédictions de `model` (None : aucune)."""
+    if isinstance(model, CompiledForest):
+        return model
+    if isinstance(model, ServingForest):
+        return model.compiled
+    if is_compilable(model):
+        return _compile_for_explanations(model)
+    return None
+
+
+@functools.lru_cache(maxsize=2)
+def _compile_for_explanations(model) -> CompiledForest:
+    # SERVING_ENGINE=sklearn : compilée une fois par modèle, à la première explication
+    return CompiledForest.from_sklearn(model)
+
+
+# ==========================================
+# Contrôle de parité avec sklearn
+# ==========================================
+
+
+def load_parity_dataset(features: list[str], path: Path = PARITY_DATASET_PATH) -> np.ndarray:
+    """Charge les colonnes du modèle depuis le dataset d'entraînement (séparateur ';')."""
+    import pandas as pd
+
+    return pd.read_csv(path, sep=";", usecols=features)[features].to_numpy(dtype=np.float64)
+
+
+def check_parity(compiled: CompiledForest, reference, X, atol: float = 1e-9) -> float:
+    """Compare les probabilités des deux moteurs ; lève ForestParityError au-delà de `atol`."""
+    expected = np.asarray(reference.predict_proba(X), dtype=np.float64)[:, 1]
+    max_diff = float(np.max(np.abs(compiled.predict_proba(X)[:, 1] - expected), initial=0.0))
+    if max_diff > atol:
+        raise ForestParityError(
+            f"Écart de probabilité {max_diff:.3e} > tolérance {atol:.1e} sur {len(X)} lignes."
+        )
+    return max_diff
@@ -1,46 +1,207 @@
+import os
 import pickle
+import time
+import warnings
 from pathlib import Path
 
+from app.models.artifact import MANIFEST_NAME, ArtifactError, load_artifact, sha256_file
+from app.models.features import DEFAULT_FEATURES, FeatureBuilder
+from app.models.forest import (
+    CompiledForest,
+    ForestParityError,
+    ServingForest,
+    check_parity,
+    is_compilable,
+    load_parity_dataset,
+)
+from app.models.registry import ModelLoadError, ModelVersion
+from app.services.metrics import metrics
+
+# Les features sont envoyées en NumPy (ordre validé au chargement par FeatureBuilder) :
+# l'avertissement sklearn sur l'absence de noms de colonnes est donc sans objet.
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
 # Définition des chemins
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 MODEL_PATH = BASE_DIR / "model" / "modele_churn_light.pkl"
+# Artefact mappé en mémoire produit par export_model.py (prioritaire sur le pickle)
+MODEL_ARTIFACT_DIR = Path(os.getenv("MODEL_ARTIFACT_DIR", BASE_DIR / "model" / "artifact"))
+# Vérification du SHA-256 de l'artefact au chargement
+MODEL_ARTIFACT_VERIFY = os.getenv("MODEL_ARTIFACT_VERIFY", "1") == "1"
+
+# Moteur de service : "compiled" (forêt aplatie en NumPy) ou "sklearn" (repli)
+SERVING_ENGINE = os.getenv("SERVING_ENGINE", "compiled")
+# Taille de lot au-delà de laquelle le moteur compilé délègue à sklearn (croisement mesuré)
+COMPILED_MAX_ROWS = int(os.getenv("COMPILED_MAX_ROWS", "400"))
+# Vérifie au chargement la parité compilé/sklearn sur final_data_set.csv
+FOREST_PARITY_CHECK = os.getenv("FOREST_PARITY_CHECK", "0") == "1"
+FOREST_PARITY_ATOL = float(os.getenv("FOREST_PARITY_ATOL", "1e-9"))
+
+DEFAULT_THRESHOLD = 0.235  # Valeur par défaut de sécurité
+
+
+def model_fingerprint(path: Path) -> str:
+    """Version d'un pickle : début de son SHA-256 (identique à celle de export_model.py)."""
+    return sha256_file(path)[:12]
+
+
+# ==========================================
+# 1. Artefact mappé en mémoire (partagé entre workers)
+# ==========================================
+
 
-print(f"Chargement du modèle depuis : {MODEL_PATH}")
+def load_artifact_version(directory: Path = MODEL_ARTIFACT_DIR) -> ModelVersion:
+    """Charge l'artefact en mmap ; lève ArtifactError s'il est absent ou invalide."""
+    print(f"Chargement de l'artefact depuis : {directory}")
+    compiled_forest, manifest = load_artifact(directory, verify=MODEL_ARTIFACT_VERIFY)
+    print(
+        f"✅ Artefact {manifest['model_version']} mappé en mémoire "
+        f"({compiled_forest.n_trees} arbres). Seuil personnalisé : {manifest['threshold']}"
+    )
+    return ModelVersion(
+        ServingForest(compiled_forest),
+        manifest["threshold"],
+        manifest["features"],
+        manifest["model_version"],
+        source="artifact",
+    )
 
-ml_model = None
-churn_threshold = 0.235  # Valeur par défaut de sécurité
-expected_features = []  # Liste des features attendues
 
-if not MODEL_PATH.exists():
-    print(f"❌ ERREUR : Le fichier {MODEL_PATH} est introuvable.")
-else:
+# ==========================================
+# 2. Repli : package pickle
+# ==========================================
+
+
+def load_pickle_version(path: Path = MODEL_PATH) -> ModelVersion:
+    """Charge le package pickle puis, si possible, le compile pour le service."""
+    if not path.exists():
+        raise ModelLoadError(f"Le fichier {path} est introuvable.")
+
+    print(f"Chargement du modèle depuis : {path}")
     try:
         # Chargement du package complet
-        with open(MODEL_PATH, "rb") as file:
+        with open(path, "rb") as file:
             model_package = pickle.load(file)
+    except Exception as e:
+        raise ModelLoadError(f"Impossible de charger le modèle : {e}") from e
+
+    # Extraction des métadonnées
+    if isinstance(model_package, dict) and "model" in model_package:
+        model = model_package["model"]
+        threshold = model_package.get("threshold", DEFAULT_THRESHOLD)
+        features = model_package.get("features", [])
+
+        print(f"✅ Modèle chargé. Seuil personnalisé : {threshold}")
+        print(f"✅ Nombre de features attendues : {len(features)}")
+
+        # Affichage des features pour debug
+        if features:
+            print(f"✅ Features : {features}")
+    else:
+        # Fallback : modèle brut sans métadonnées
+        model, threshold, features = model_package, DEFAULT_THRESHOLD, []
+        print("⚠️ Modèle chargé sans métadonnées (package non structuré)")
+
+    # Volontairement HORS du try/except : un pickle dont la liste de features ne
+    # correspond pas à feature_names_in_ doit empêcher le démarrage (ValueError).
+    if hasattr(model, "feature_names_in_"):
+        sklearn_features = list(model.feature_names_in_)
+        if features and list(features) != sklearn_features:
+            raise ValueError(
+                "Les features du package ne correspondent pas à feature_names_in_ du modèle : "
+                f"{list(features)} != {sklearn_features}"
+            )
+        features = sklearn_features
+
+    features = list(features) or DEFAULT_FEATURES
+    serving_model = to_serving_engine(model, features)
+    return ModelVersion(serving_model, threshold, features, model_fingerprint(path), "pickle")
 
-        # Extraction des métadonnées
-        if isinstance(model_package, dict) and "model" in model_package:
-            ml_model = model_package["model"]
-            churn_threshold = model_package.get("threshold", 0.235)
-            expected_features = model_package.get("features", [])
 
-            print(f"✅ Modèle chargé. Seuil personnalisé : {churn_threshold}")
-            print(f"✅ Nombre de features attendues : {len(expected_features)}")
+def to_serving_engine(model, features: list[str]):
+    """Remplace une forêt sklearn par la forêt compilée (sklearn reste le repli)."""
+    if SERVING_ENGINE != "compiled" or not is_compilable(model):
+        print(f"ℹ️ Moteur de service : sklearn (SERVING_ENGINE={SERVING_ENGINE}).")
+        return model
 
-            # Affichage des features pour debug
-            if expected_features:
-                print(f"✅ Features : {expected_features}")
+    compiled_forest = CompiledForest.from_sklearn(model)
+    try:
+        if FOREST_PARITY_CHECK:
+            X_parity = load_parity_dataset(features)
+            max_diff = check_parity(compiled_forest, model, X_parity, FOREST_PARITY_ATOL)
+            print(f"✅ Parité compilé/sklearn vérifiée (écart max : {max_diff:.2e}).")
+    except (ForestParityError, OSError, ValueError) as e:
+        print(f"⚠️ Moteur compilé désactivé, repli sur sklearn : {e}")
+        return model
+
+    print(
+        f"✅ Forêt compilée : {compiled_forest.n_trees} arbres, "
+        f"profondeur max {compiled_forest.max_depth}."
+    )
+    return ServingForest(compiled_forest, model, COMPILED_MAX_ROWS)
+
+
+def load_model_version() -> ModelVersion | None:
+    """Charge le modèle à servir : artefact si disponible, sinon pickle.
+
+    Utilisé au démarrage et par le registre lors d'un rechargement à chaud. Renvoie
+    None si aucun modèle n'est disponible. La durée du chargement est exposée sur /metrics.
+    """
+    started = time.perf_counter()
+    version = _load_model_version()
+    if version is not None:
+        metrics.gauge(
+            "model_load_seconds",
+            "Durée du dernier chargement du modèle.",
+            {"source": version.source},
+        ).set(time.perf_counter() - started)
+    return version
+
+
+def artifact_is_stale(directory: Path = MODEL_ARTIFACT_DIR, path: Path = MODEL_PATH) -> bool:
+    """Pickle modifié après le dernier export : l'artefact sert encore l'ancien modèle."""
+    try:
+        return path.stat().st_mtime_ns > (directory / MANIFEST_NAME).stat().st_mtime_ns
+    except OSError:
+        return False
+
+
+def _load_model_version() -> ModelVersion | None:
+    if SERVING_ENGINE == "compiled" and (MODEL_ARTIFACT_DIR / MANIFEST_NAME).exists():
+        if artifact_is_stale(MODEL_ARTIFACT_DIR, MODEL_PATH):
+            # Nouveau pickle déposé (rechargement à chaud) : il prime sur l'artefact périmé
+            print(
+                f"⚠️ {MODEL_PATH.name} est plus récent que l'artefact, repli sur le pickle "
+                "(relancer export_model.py pour le partager entre workers)."
+            )
         else:
-            # Fallback : modèle brut sans métadonnées
-            ml_model = model_package
-            print("⚠️ Modèle chargé sans métadonnées (package non structuré)")
+            try:
+                return load_artifact_version(MODEL_ARTIFACT_DIR)
+            except (ArtifactError, OSError, KeyError, ValueError) as e:
+                print(f"⚠️ Artefact inutilisable, repli sur le pickle : {e}")
+
+    try:
+        return load_pickle_version(MODEL_PATH)
+    except ModelLoadError as e:
+        print(f"❌ ERREUR : {e}")
+        return None
 
-            # Tente de récupérer les features depuis sklearn
-            if hasattr(ml_model, "feature_names_in_"):
-                expected_features = list(ml_model.feature_names_in_)
-                print(f"✅ Features récupérées depuis sklearn : {expected_features}")
 
-    except Exception as e:
-        print(f"❌ ERREUR : Impossible de charger le modèle : {e}")
-        ml_model = None
+# ==========================================
+# Chargement initial
+# ==========================================
+
+active_version = load_model_version()
+
+ml_model = active_version.model if active_version else None
+churn_threshold = active_version.threshold if active_version else DEFAULT_THRESHOLD
+model_version = active_version.version if active_version else None
+# Modèle sklearn brut, conservé pour les usages hors-ligne (absent avec l'artefact)
+sklearn_model = getattr(ml_model, "reference", ml_model)
+
+# ==========================================
+# Compilation du mapping des features
+# ==========================================
+
+feature_builder = FeatureBuilder(active_version.features if active_version else DEFAULT_FEATURES)
+print(f"✅ Mapping des features compilé ({feature_builder.n_features} colonnes).")
@@ -0,0 +1,211 @@
+import datetime
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+# ==========================================
+# Configuration (variables d'environnement)
+# ==========================================
+
+# Période de surveillance des fichiers du modèle, en secondes (0 désactive)
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+# Nombre de lignes de test passées au modèle avant sa mise en service
+MODEL_WARMUP_ROWS = int(os.getenv("MODEL_WARMUP_ROWS", "8"))
+
+
+class ModelLoadError(RuntimeError):
+    """Le modèle n'a pas pu être chargé, ou a échoué à l'échauffement."""
+
+
+class ReloadInProgress(RuntimeError):
+    """Un rechargement est déjà en cours."""
+
+
+class InferenceError(RuntimeError):
+    """Le modèle servi a échoué pendant le calcul d'une prédiction."""
+
+
+class ModelVersion:
+    """Modèle servi et ses métadonnées, figés au chargement.
+
+    Une requête lit la version active UNE fois puis n'utilise que cet objet : si un
+    nouveau modèle est activé pendant son traitement, elle se termine sur l'ancien.
+    """
+
+    __slots__ = ("features", "loaded_at", "model", "source", "threshold", "version")
+
+    def __init__(self, model, threshold: float, features: list[str], version: str, source: str):
+        self.model = model
+        self.threshold = threshold
+        self.features = list(features)
+        self.version = version
+        self.source = source
+        self.loaded_at = datetime.datetime.now()
+
+    def with_threshold(self, threshold: float) -> "ModelVersion":
+        """Même modèle et même version, avec un autre seuil de décision."""
+        updated = ModelVersion(self.model, threshold, self.features, self.version, self.source)
+        updated.loaded_at = self.loaded_at
+        return updated
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "threshold": self.threshold,
+            "n_features": len(self.features),
+            "loaded_at": self.loaded_at.isoformat(timespec="seconds"),
+        }
+
+
+class ModelRegistry:
+    """Registre du modèle actif, rechargeable à chaud.
+
+    `reload()` charge la nouvelle version via `loader` (sans toucher à la version active),
+    vérifie ses features, l'échauffe sur quelques lignes puis la publie par une simple
+    affectation d'attribut, atomique pour les lecteurs. Un seul rechargement à la fois.
+    """
+
+    def __init__(
+        self,
+        loader,
+        initial: ModelVersion | None = None,
+        expected_features: list[str] | None = None,
+        warmup_rows: int = MODEL_WARMUP_ROWS,
+    ):
+        self.loader = loader
+        self.expected_features = list(expected_features or (initial.features if initial else []))
+        self.warmup_rows = warmup_rows
+
+        self._active = initial
+        self._reload_lock = threading.Lock()
+        self._watch_stop = threading.Event()
+        self._watch_thread: threading.Thread | None = None
+        self.stats = {"reloads": 0, "failures": 0, "last_error": None}
+
+    @property
+    def active(self) -> ModelVersion | None:
+        return self._active
+
+    # ------------------------------------------
+    # Chargement et activation
+    # ------------------------------------------
+
+    def warm_up(self, candidate: ModelVersion):
+        """Vérifie que le modèle produit des probabilités valides sur des lignes de test."""
+        rows = np.random.default_rng(0).random((self.warmup_rows, len(candidate.features)))
+        probas = np.asarray(candidate.model.predict_proba(rows), dtype=np.float64)
+        if probas.shape != (self.warmup_rows, 2) or not np.isfinite(probas).all():
+            raise ModelLoadError(f"Échauffement invalide : sortie de forme {probas.shape}.")
+
+    def reload(self) -> ModelVersion:
+        """Charge, valide, échauffe puis active une nouvelle version du modèle."""
+        if not self._reload_lock.acquire(blocking=False):
+            raise ReloadInProgress("Un rechargement du modèle est déjà en cours.")
+        try:
+            candidate = self.loader()
+            if candidate is None:
+                raise ModelLoadError("Aucun modèle disponible.")
+            # Le mapping des features (FeatureBuilder, clés de cache) est compilé au
+            # démarrage : un changement de colonnes ou d'ordre impose un redémarrage
+            if self.expected_features and candidate.features != self.expected_features:
+                raise ModelLoadError(
+                    "Les features du nouveau modèle diffèrent du modèle servi : "
+                    f"{candidate.features} != {self.expected_features}"
+                )
+            self.warm_up(candidate)
+        except Exception as e:
+            self.stats["failures"] += 1
+            self.stats["last_error"] = str(e)
+            raise
+        else:
+            previous, self._active = self._active, candidate
+            self.stats["reloads"] += 1
+            self.stats["last_error"] = None
+            print(
+                f"✅ Modèle {candidate.version} activé "
+                f"(précédent : {previous.version if previous else None})."
+            )
+            return candidate
+        finally:
+            self._reload_lock.release()
+
+    def set_threshold(self, threshold: float) -> ModelVersion:
+        """Change le seuil de la version active sans recharger le modèle.
+
+        Publié comme un rechargement (nouvel objet, affectation atomique) : le cache des
+        prédictions, dont la génération inclut le seuil, est invalidé de lui-même. Un
+        rechargement ultérieur reprend le seuil enregistré avec le modèle.
+        """
+        if not 0.0 <= threshold <= 1.0:
+            raise ValueError(f"Seuil hors de [0, 1] : {threshold}")
+        if not self._reload_lock.acquire(blocking=False):
+            raise ReloadInProgress("Un rechargement du modèle est en cours.")
+        try:
+            if self._active is None:
+                raise ModelLoadError("Aucun modèle actif.")
+            previous, self._active = self._active, self._active.with_threshold(threshold)
+            print(f"✅ Seuil du modèle {previous.version} : {previous.threshold} -> {threshold}")
+            return self._active
+        finally:
+            self._reload_lock.release()
+
+    # ------------------------------------------
+    # Surveillance des fichiers du modèle
+    # ------------------------------------------
+
+    def watch(self, paths: list[Path], interval: float = MODEL_WATCH_INTERVAL):
+        """Recharge le modèle quand l'un des fichiers surveillés change (mtime, taille)."""
+        if interval <= 0 or self._watch_thread is not None:
+            return
+        self._watch_stop.clear()
+        paths = list(paths)
+        self._watch_thread = threading.Thread(
+            target=self._watch,
+            args=(paths, interval, self._signature(paths)),
+            name="model-watch",
+            daemon=True,
+        )
+        self._watch_thread.start()
+
+    def stop_watch(self):
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join(5.0)
+            self._watch_thread = None
+
+    @staticmethod
+    def _signature(paths: list[Path]):
+        signature = []
+        for path in paths:
+            try:
+                stat = Path(path).stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return signature
+
+    def _watch(self, paths: list[Path], interval: float, seen: list):
+        while not self._watch_stop.wait(interval):
+            current = self._signature(paths)
+            if current == seen:
+                continue
+            # Mémorisé même en cas d'échec : une écriture encore en cours modifiera à
+            # nouveau la signature et déclenchera une nouvelle tentative
+            seen = current
+            try:
+                self.reload()
+            except ReloadInProgress:
+                pass
+            except (ModelLoadError, OSError, ValueError) as e:
+                print(f"⚠️ Rechargement automatique du modèle impossible : {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            "active": self._active.describe() if self._active else None,
+            "reloading": self._reload_lock.locked(),
+            "watching": self._watch_thread is not None,
+            **self.stats,
+        }
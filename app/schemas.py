@@ -0,0 +1,90 @@
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from app.services.metrics import metrics
+
+# ==========================================
+# Schémas d'entrée de l'API
+# ==========================================
+
+
+class InputData(BaseModel):
+    """Schéma des 10 caractéristiques correspondant EXACTEMENT au modèle."""
+
+    ratio_surcharge_anciennete: float = Field(..., json_schema_extra={"example": 0.14})
+    nombre_participation_pee: int = Field(..., json_schema_extra={"example": 0})
+    statut_marital_divorce: float = Field(
+        ...,
+        json_schema_extra={"example": 0.0},
+        description="1.0 si divorcé(e), 0.0 sinon",
+    )
+    age: int = Field(..., ge=18, le=100, json_schema_extra={"example": 41})
+    annees_dans_l_entreprise: int = Field(..., ge=0, json_schema_extra={"example": 2})
+    frequence_deplacement_frequent: float = Field(
+        ...,
+        json_schema_extra={"example": 0.0},
+        description="1.0 si déplacements fréquents, 0.0 sinon",
+    )
+    poste_representant_commercial: float = Field(
+        ...,
+        json_schema_extra={"example": 0.0},
+        description="1.0 si Représentant Commercial, 0.0 sinon",
+    )
+    niveau_education: int = Field(
+        ..., ge=1, le=5, json_schema_extra={"example": 3}, description="Niveau 1-5"
+    )
+    domaine_etude_marketing: float = Field(
+        ...,
+        json_schema_extra={"example": 0.0},
+        description="1.0 si Marketing, 0.0 sinon",
+    )
+    poste_consultant: float = Field(
+        ...,
+        json_schema_extra={"example": 1.0},
+        description="1.0 si Consultant, 0.0 sinon",
+    )
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def measure_validation(cls, data: Any, handler):
+        """Mesure la validation (étape "validation" de /metrics), y compris en échec."""
+        with metrics.stage("validation"):
+            return handler(data)
+
+    # NaN / inf refusés (422) : le moteur compilé ne sait pas les router comme sklearn
+    model_config = ConfigDict(
+        allow_inf_nan=False,
+        json_schema_extra={
+            "example": {
+                "ratio_surcharge_anciennete": 0.14,
+                "nombre_participation_pee": 0,
+                "statut_marital_divorce": 0.0,
+                "age": 41,
+                "annees_dans_l_entreprise": 2,
+                "frequence_deplacement_frequent": 1.0,
+                "poste_representant_commercial": 0.0,
+                "niveau_education": 3,
+                "domaine_etude_marketing": 0.0,
+                "poste_consultant": 1.0,
+            }
+        },
+    )
+
+
+class BatchInput(BaseModel):
+    """Lot d'employés à scorer en un seul appel.
+
+    Les enregistrements sont validés un par un contre `InputData` : une ligne invalide
+    n'invalide pas le lot, son erreur est renvoyée à sa position.
+    """
+
+    records: list[Any] = Field(
+        ..., json_schema_extra={"example": [InputData.model_config["json_schema_extra"]["example"]]}
+    )
+
+
+class ThresholdUpdate(BaseModel):
+    """Nouveau seuil de décision (probabilité >= seuil : départ prédit)."""
+
+    threshold: float = Field(..., ge=0.0, le=1.0, json_schema_extra={"example": 0.3})
@@ -0,0 +1,253 @@
+import asyncio
+import collections
+import os
+import threading
+import time
+
+from sqlalchemy.pool import QueuePool
+from starlette.responses import JSONResponse
+
+from app.services.metrics import metrics
+
+# ==========================================
+# Configuration (variables d'environnement)
+# ==========================================
+
+# Prédictions traitées simultanément par worker (0 : pas de limite)
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "0"))
+# Requêtes en attente d'une place au-delà de la limite ; au-delà : 503 immédiat
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))
+# Attente maximale (s) dans la file avant un 503
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "1.0"))
+# Valeur de l'en-tête Retry-After (s) des réponses 503
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+# Routes soumises au contrôle d'admission
+ADMISSION_PATH_PREFIX = "/predict"
+
+# Mode dégradé : prédictions servies sans écriture dans prediction_logs quand la BDD
+# est saturée (pool épuisé) ou en échec, pendant DEGRADED_MODE_SECONDS
+DEGRADED_MODE_ENABLED = os.getenv("DEGRADED_MODE_ENABLED", "0") == "1"
+DEGRADED_MODE_SECONDS = float(os.getenv("DEGRADED_MODE_SECONDS", "5"))
+
+
+# ==========================================
+# Contrôle d'admission (concurrence bornée + file d'attente bornée)
+# ==========================================
+
+
+class AdmissionController:
+    """Limite le nombre de prédictions en cours dans un worker.
+
+    Au-delà de `max_concurrency`, les requêtes attendent dans une file FIFO d'au plus
+    `queue_size` places et `queue_timeout` secondes ; sinon elles sont refusées tout de
+    suite. Sans cette borne, le surplus s'entasse dans le threadpool et le pool de
+    connexions, et la latence de toutes les requêtes croît jusqu'aux timeouts clients.
+    Utilisé depuis la boucle d'événements uniquement : aucun verrou n'est nécessaire.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = ADMISSION_MAX_CONCURRENCY,
+        queue_size: int = ADMISSION_QUEUE_SIZE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: collections.deque[asyncio.Future] = collections.deque()
+        self.stats = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrency > 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Réserve une place ; False si la requête doit être refusée (503)."""
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self._admit()
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self._reject("queue_full")
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats["queued"] += 1
+        self._publish()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except TimeoutError:
+            # Place transmise au moment même de l'expiration : elle est conservée
+            if not (waiter.done() and not waiter.cancelled()):
+                self._waiters.remove(waiter)
+                self._reject("timeout")
+                return False
+        except asyncio.CancelledError:
+            # Client parti pendant l'attente : place rendue si elle venait d'être transmise
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+        finally:
+            metrics.histogram("admission_wait_seconds", "Attente en file avant admission.").observe(
+                time.perf_counter() - started
+            )
+
+        # Place transmise par `release` : `in_flight` est déjà compté
+        self.stats["admitted"] += 1
+        self._publish()
+        return True
+
+    def release(self):
+        """Libère une place, transmise directement à la plus ancienne requête en attente."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._publish()
+                return
+        self.in_flight -= 1
+        self._publish()
+
+    def _admit(self):
+        self.in_flight += 1
+        self.stats["admitted"] += 1
+        self._publish()
+
+    def _reject(self, reason: str):
+        self.stats[f"rejected_{reason}"] += 1
+        metrics.counter(
+            "admission_rejected_total",
+            "Requêtes refusées (503) par le contrôle d'admission.",
+            {"reason": reason},
+        ).inc()
+        self._publish()
+
+    def _publish(self):
+        metrics.gauge("admission_in_flight", "Prédictions en cours.").set(self.in_flight)
+        metrics.gauge("admission_queue_depth", "Requêtes en attente d'admission.").set(
+            self.queue_depth
+        )
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "max_concurrency": self.max_concurrency,
+            "queue_size": self.queue_size,
+            "queue_timeout": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            **self.stats,
+        }
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI : contrôle d'admission des routes /predict*, avant le threadpool.
+
+    Le refus (503 + Retry-After) est décidé sur la boucle d'événements, sans lire le
+    corps ni occuper de thread ou de connexion BDD. La place est rendue à la fin de la
+    réponse, flux compris.
+    """
+
+    def __init__(self, app, controller: AdmissionController, prefix: str = ADMISSION_PATH_PREFIX):
+        self.app = app
+        self.controller = controller
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not self.controller.enabled
+            or not scope["path"].startswith(self.prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.controller.acquire():
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Capacité de prédiction atteinte, réessayez plus tard."},
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+
+# ==========================================
+# Mode dégradé (prédictions sans journalisation)
+# ==========================================
+
+
+def pool_saturated(pool) -> bool:
+    """Plus aucune connexion libre et débordement maximal atteint (QueuePool)."""
+    if not isinstance(pool, QueuePool):
+        return False
+    return pool.checkedin() == 0 and pool.overflow() >= pool._max_overflow
+
+
+class DegradedMode:
+    """Décide de sauter l'écriture des logs quand la BDD est saturée ou en échec.
+
+    Une saturation du pool ou un échec d'écriture active le mode pour `hold_seconds`
+    (prolongé à chaque nouvel incident) : les prédictions continuent d'être servies,
+    sans `log_id`. Le temps passé en mode dégradé et les logs sautés sont comptés.
+    """
+
+    def __init__(self, enabled: bool = DEGRADED_MODE_ENABLED, hold_seconds=DEGRADED_MODE_SECONDS):
+        self.enabled = enabled
+        self.hold_seconds = hold_seconds
+        self._until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"activations": 0, "seconds": 0.0, "skipped_logs": 0}
+
+    @property
+    def active(self) -> bool:
+        return time.monotonic() < self._until
+
+    def should_skip(self, pool) -> bool:
+        """True si les logs doivent être sautés (mode actif, ou pool saturé à l'instant)."""
+        if not self.enabled:
+            return False
+        if pool_saturated(pool):
+            self.trip()
+        return self.active
+
+    def trip(self):
+        """Active (ou prolonge) le mode dégradé."""
+        now = time.monotonic()
+        with self._lock:
+            until = now + self.hold_seconds
+            added = until - max(self._until, now)
+            if self._until <= now:
+                self.stats["activations"] += 1
+            self._until = until
+            self.stats["seconds"] += added
+        metrics.counter(
+            "degraded_mode_seconds_total", "Temps passé en mode dégradé (logs non écrits)."
+        ).inc(added)
+
+    def skip(self, n_logs: int):
+        with self._lock:
+            self.stats["skipped_logs"] += n_logs
+        metrics.counter(
+            "prediction_logs_skipped_total", "Logs de prédiction non écrits (mode dégradé)."
+        ).inc(n_logs)
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "active": self.active,
+            "hold_seconds": self.hold_seconds,
+            **self.stats,
+        }
@@ -0,0 +1,170 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+from app.services.metrics import SIZE_BUCKETS, Histogram
+
+# ==========================================
+# Configuration (variables d'environnement)
+# ==========================================
+
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "0") == "1"
+# Fenêtre de regroupement après la première requête en attente (millisecondes)
+MICROBATCH_WINDOW_MS = float(os.getenv("MICROBATCH_WINDOW_MS", "2"))
+# Nombre maximal de lignes par appel au modèle
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+# Attente maximale d'un appelant avant abandon (secondes)
+MICROBATCH_TIMEOUT = float(os.getenv("MICROBATCH_TIMEOUT", "5"))
+
+
+class MicroBatcher:
+    """Regroupe les prédictions concurrentes en un seul appel vectorisé au modèle.
+
+    Chaque requête dépose sa matrice de features et la version du modèle qu'elle a lue,
+    puis attend son résultat. Un thread dédié ouvre une fenêtre de `window_ms` à partir
+    de la première requête en attente (ou s'arrête à `max_batch_size` lignes), empile les
+    matrices d'une même version, appelle `predict_fn(features, model)` une fois par
+    version puis redistribue les lignes à chaque appelant. Un rechargement du modèle
+    pendant la fenêtre ne change donc pas la version qui score une requête déjà déposée.
+    """
+
+    def __init__(
+        self,
+        predict_fn,
+        window_ms: float = MICROBATCH_WINDOW_MS,
+        max_batch_size: int = MICROBATCH_MAX_SIZE,
+        timeout: float = MICROBATCH_TIMEOUT,
+    ):
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+
+        self._queue: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        # Sérialise "vérifier l'état + déposer" face à stop() : aucune requête ne peut
+        # être déposée après l'arrêt, donc aucune ne reste orpheline dans la file
+        self._state_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+        self.batch_sizes = Histogram(SIZE_BUCKETS)
+        self.queue_wait = Histogram()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        with self._state_lock:
+            self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="inference-microbatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Arrête le planificateur ; les requêtes déjà en file sont traitées avant."""
+        with self._state_lock:
+            self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def predict(self, features: np.ndarray, model=None):
+        """Soumet une matrice de features (scorée par `model`) et bloque jusqu'à son résultat.
+
+        Si le planificateur est arrêté, la prédiction est faite directement (sans
+        regroupement). En cas de dépassement du délai, la demande est annulée pour ne
+        pas être scorée inutilement plus tard.
+        """
+        future: Future = Future()
+        with self._state_lock:
+            accepted = self.running and not self._stop.is_set()
+            if accepted:
+                self._queue.put((features, future, time.perf_counter(), model))
+        if not accepted:
+            return self.predict_fn(features, model)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    # ------------------------------------------
+    # Thread de regroupement
+    # ------------------------------------------
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            pending = [first]
+            n_rows = len(first[0])
+            deadline = first[2] + self.window
+            while n_rows < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else None
+                except queue.Empty:
+                    item = None
+                if item is None:
+                    break
+                pending.append(item)
+                n_rows += len(item[0])
+
+            self._process(pending)
+
+    def _process(self, pending: list):
+        # Les demandes annulées (délai dépassé côté appelant) ne sont pas scorées
+        pending = [item for item in pending if item[1].set_running_or_notify_cancel()]
+        if not pending:
+            return
+
+        started = time.perf_counter()
+        for _, _, enqueued_at, _ in pending:
+            self.queue_wait.observe(started - enqueued_at)
+
+        # Un appel au modèle par version : chaque demande est scorée par celle qu'elle a lue
+        groups: dict[int, list] = {}
+        for item in pending:
+            groups.setdefault(id(item[3]), []).append(item)
+        for group in groups.values():
+            self._score(group)
+
+    def _score(self, group: list):
+        model = group[0][3]
+        self.batch_sizes.observe(sum(len(item[0]) for item in group))
+        try:
+            predictions, probas = self.predict_fn(np.vstack([item[0] for item in group]), model)
+        except (RuntimeError, ValueError, TypeError) as e:
+            # Erreur du modèle (InferenceError côté API) : transmise à chaque appelant
+            for _, future, _, _ in group:
+                future.set_exception(e)
+            return
+
+        start = 0
+        for features, future, _, _ in group:
+            end = start + len(features)
+            future.set_result((predictions[start:end], probas[start:end]))
+            start = end
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.running,
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "queue_depth": self._queue.qsize(),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+        }
@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+from app.models.features import CONTINUOUS_FIELDS, FeatureBuilder
+
+# ==========================================
+# Configuration (variables d'environnement)
+# ==========================================
+
+# Nombre maximal d'entrées (0 désactive le cache)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+# Durée de vie d'une entrée, en secondes
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+# Arrondi appliqué aux variables continues pour construire la clé
+CACHE_FLOAT_DECIMALS = int(os.getenv("CACHE_FLOAT_DECIMALS", "9"))
+
+
+class FeatureKeyNormalizer:
+    """Transforme des vecteurs de features en clés de cache canoniques.
+
+    Les variables continues sont arrondies à `decimals` décimales et les zéros signés
+    (-0.0, fréquents sur les indicatrices one-hot) sont ramenés à 0.0, pour que deux
+    profils identiques produisent toujours la même clé. Les indicatrices ne sont pas
+    binarisées : une valeur atypique (ex. 0.3) garde sa propre clé.
+    """
+
+    def __init__(self, builder: FeatureBuilder, decimals: int = CACHE_FLOAT_DECIMALS):
+        self.decimals = decimals
+        self.continuous = [builder.fields.index(field) for field in CONTINUOUS_FIELDS]
+
+    def keys(self, features: np.ndarray) -> list[bytes]:
+        """Renvoie une clé (bytes) par ligne de la matrice de features."""
+        normalized = np.array(features, dtype=np.float64)
+        normalized[:, self.continuous] = np.round(normalized[:, self.continuous], self.decimals)
+        normalized += 0.0  # -0.0 + 0.0 == +0.0 : supprime les zéros négatifs
+        return [row.tobytes() for row in normalized]
+
+
+class PredictionCache:
+    """Cache LRU borné avec expiration (TTL) des résultats d'inférence.
+
+    Chaque lecture ou écriture porte une "génération" (modèle servi, seuil) : dès qu'elle
+    change, le cache est vidé, ce qui invalide automatiquement les résultats d'un ancien
+    modèle ou d'un ancien seuil.
+    """
+
+    def __init__(self, max_size: int = PREDICTION_CACHE_SIZE, ttl: float = PREDICTION_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[bytes, tuple[float, Any]] = OrderedDict()
+        self._generation: Any = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _check_generation(self, generation):
+        if generation != self._generation:
+            if self._entries:
+                self.stats["invalidations"] += 1
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, key: bytes, generation) -> Any | None:
+        with self._lock:
+            self._check_generation(generation)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                    self.stats["evictions"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key: bytes, value, generation):
+        with self._lock:
+            self._check_generation(generation)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        """Statistiques exposées par l'API (taux de succès inclus)."""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            }
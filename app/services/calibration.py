@@ -0,0 +1,105 @@
+import datetime
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sqlalchemy import select
+
+from app.models.registry import ModelVersion
+from database import EmployeeHistory
+
+# Nombre de versions du modèle dont les scores sont conservés
+MAX_SCORED_VERSIONS = 4
+
+
+class EmptyHistoryError(LookupError):
+    """Aucun employé étiqueté (target_churn) dans employees_history."""
+
+
+def load_labelled_history(db, fields: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Features (ordre du modèle) et cible des employés dont le départ est connu.
+
+    Les employés aux features incomplètes (NULL) sont écartés, comme à l'entraînement et
+    au scoring de la population : le modèle n'accepte pas de valeurs manquantes.
+    """
+    columns = [getattr(EmployeeHistory, field) for field in fields]
+    rows = db.execute(
+        select(*columns, EmployeeHistory.target_churn).where(
+            EmployeeHistory.target_churn.is_not(None)
+        )
+    ).all()
+    data = np.asarray(rows, dtype=np.float64).reshape(len(rows), len(fields) + 1)
+    data = data[~np.isnan(data).any(axis=1)]
+    if not len(data):
+        raise EmptyHistoryError(
+            "Aucun employé étiqueté dans employees_history (charger l'historique avec init_db.py)."
+        )
+    return data[:, :-1], data[:, -1].astype(np.int64)
+
+
+class LabelledScores:
+    """Probabilités de l'historique étiqueté pour une version du modèle, triées une fois.
+
+    Le tri et le cumul des positifs rendent chaque seuil évaluable par une recherche
+    dichotomique : un balayage complet ne touche plus jamais à la forêt.
+    """
+
+    def __init__(self, model: ModelVersion, probas: np.ndarray, labels: np.ndarray):
+        self.model = model.model
+        self.version = model.version
+        self.scored_at = datetime.datetime.now()
+        order = np.argsort(probas, kind="stable")
+        self.probas = probas[order]
+        # positives_above[i] : nombre de départs réels parmi les lignes i..n-1 (scores >= probas[i])
+        self.positives_above = np.concatenate([np.cumsum(labels[order][::-1])[::-1], [0]])
+        self.n = len(probas)
+        self.positives = int(labels.sum())
+
+    def sweep(self, thresholds: np.ndarray) -> dict[str, np.ndarray]:
+        """Précision, rappel, F1 et volume d'alertes pour chaque seuil (proba >= seuil)."""
+        first_alert = np.searchsorted(self.probas, thresholds, side="left")
+        alerts = self.n - first_alert
+        true_positives = self.positives_above[first_alert]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            precision = np.where(alerts > 0, true_positives / alerts, 0.0)
+            recall = true_positives / self.positives if self.positives else np.zeros(len(alerts))
+            f1 = np.where(
+                precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0
+            )
+        return {
+            "threshold": thresholds,
+            "precision": precision,
+            "recall": recall,
+            "f1": f1,
+            "alerts": alerts,
+            "alert_rate": alerts / self.n,
+        }
+
+
+class ThresholdCalibrator:
+    """Scores de l'historique étiqueté mis en cache par version du modèle."""
+
+    def __init__(self, max_versions: int = MAX_SCORED_VERSIONS):
+        self.max_versions = max_versions
+        self._scores: OrderedDict[str, LabelledScores] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def scores(self, model: ModelVersion, db, fields: list[str], refresh=False) -> LabelledScores:
+        """Scores de `model`, calculés au premier appel (ou si `refresh`) puis réutilisés."""
+        with self._lock:
+            cached = self._scores.get(model.version)
+            if cached is not None and cached.model is model.model and not refresh:
+                self._scores.move_to_end(model.version)
+                return cached
+
+            X, labels = load_labelled_history(db, fields)
+            probas = np.asarray(model.model.predict_proba(X), dtype=np.float64)[:, 1]
+            scores = self._scores[model.version] = LabelledScores(model, probas, labels)
+            self._scores.move_to_end(model.version)
+            while len(self._scores) > self.max_versions:
+                self._scores.popitem(last=False)
+            return scores
+
+    def clear(self):
+        with self._lock:
+            self._scores.clear()
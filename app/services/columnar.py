@@ -0,0 +1,241 @@
+import json
+import os
+import struct
+
+import annotated_types
+import numpy as np
+
+from app.schemas import InputData
+
+# ==========================================
+# Configuration (variables d'environnement)
+# ==========================================
+
+# Nombre maximal de lignes acceptées par un appel à /predict/columnar
+COLUMNAR_MAX_ROWS = int(os.getenv("COLUMNAR_MAX_ROWS", "1000000"))
+# Lignes scorées par appel au modèle : la forêt compilée alloue des tableaux lignes x arbres
+COLUMNAR_CHUNK_ROWS = int(os.getenv("COLUMNAR_CHUNK_ROWS", "32768"))
+
+# Formats acceptés : colonnes JSON ({"age": [...], ...}) ou matrice binaire
+JSON_CONTENT_TYPE = "application/json"
+MATRIX_CONTENT_TYPE = "application/vnd.churn.matrix"
+COLUMNAR_CONTENT_TYPES = (JSON_CONTENT_TYPE, MATRIX_CONTENT_TYPE)
+
+# Matrice binaire : longueur de l'en-tête (uint32 little-endian), en-tête JSON
+# ({"fields": [...], "dtype": "<f4" | "<f8", "rows": n}) complété par des espaces jusqu'à
+# un multiple de 8 octets, puis la matrice brute (rows x fields, ordre C, little-endian)
+MATRIX_DTYPES = ("<f4", "<f8")
+HEADER_LENGTH = struct.Struct("<I")
+ALIGNMENT = 8
+
+# Colonnes de la réponse binaire (prédiction -1 et probabilité NaN : ligne invalide)
+RESPONSE_FIELDS = ["prediction", "probability"]
+
+# Contraintes de `InputData`, appliquées colonne par colonne
+INTEGER_FIELDS = {field for field, info in InputData.model_fields.items() if info.annotation is int}
+FIELD_BOUNDS = {
+    field: (
+        next((m.ge for m in info.metadata if isinstance(m, annotated_types.Ge)), None),
+        next((m.le for m in info.metadata if isinstance(m, annotated_types.Le)), None),
+    )
+    for field, info in InputData.model_fields.items()
+}
+
+
+class ColumnarPayloadError(ValueError):
+    """Corps illisible dans son ensemble (format, colonnes manquantes, tailles incohérentes)."""
+
+
+class ColumnarTooLargeError(ColumnarPayloadError):
+    """Lot de plus de `max_rows` lignes, refusé avant toute conversion des colonnes."""
+
+    def __init__(self, rows: int, max_rows: int):
+        super().__init__(f"Lot trop volumineux : {rows} lignes (maximum {max_rows}).")
+        self.rows = rows
+        self.max_rows = max_rows
+
+
+def check_rows(rows: int, max_rows: int | None):
+    if max_rows is not None and rows > max_rows:
+        raise ColumnarTooLargeError(rows, max_rows)
+
+
+# ==========================================
+# Décodage
+# ==========================================
+
+
+def decode_json_columns(body: bytes, max_rows: int | None = None) -> dict[str, np.ndarray]:
+    """`{"age": [41, 35], ...}` -> une colonne float64 par champ (null : NaN).
+
+    La longueur des listes est vérifiée avant leur conversion en tableaux.
+    """
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise ColumnarPayloadError(f"JSON invalide : {e}") from e
+    if not isinstance(payload, dict):
+        raise ColumnarPayloadError("Le corps doit être un objet {champ: [valeurs]}.")
+
+    columns = {}
+    for field in InputData.model_fields:
+        if field not in payload:
+            continue
+        if isinstance(payload[field], list):
+            check_rows(len(payload[field]), max_rows)
+        try:
+            columns[field] = np.asarray(payload[field], dtype=np.float64)
+        except (TypeError, ValueError) as e:
+            raise ColumnarPayloadError(f"Colonne {field} non numérique : {e}") from e
+        if columns[field].ndim != 1:
+            raise ColumnarPayloadError(f"La colonne {field} doit être une liste de nombres.")
+    return columns
+
+
+def encode_matrix(matrix: np.ndarray, fields: list[str], dtype: str = "<f8", **meta) -> bytes:
+    """Matrice binaire (format décrit plus haut) ; `meta` complète l'en-tête JSON."""
+    if dtype not in MATRIX_DTYPES:
+        raise ValueError(f"dtype non supporté : {dtype} (attendu : {MATRIX_DTYPES}).")
+    matrix = np.ascontiguousarray(matrix, dtype=dtype)
+    header = json.dumps({"fields": fields, "dtype": dtype, "rows": len(matrix), **meta}).encode()
+    header += b" " * (-(HEADER_LENGTH.size + len(header)) % ALIGNMENT)
+    return HEADER_LENGTH.pack(len(header)) + header + matrix.tobytes()
+
+
+def decode_matrix(body: bytes, max_rows: int | None = None) -> tuple[dict, np.ndarray]:
+    """En-tête et matrice (vue sur le corps, sans copie) d'une matrice binaire.
+
+    Le nombre de lignes annoncé par l'en-tête est vérifié avant toute autre lecture.
+    """
+    if len(body) < HEADER_LENGTH.size:
+        raise ColumnarPayloadError("Matrice binaire tronquée (en-tête absent).")
+    (header_length,) = HEADER_LENGTH.unpack_from(body)
+    offset = HEADER_LENGTH.size + header_length
+    try:
+        header = json.loads(body[HEADER_LENGTH.size : offset])
+        fields, dtype, rows = header["fields"], header["dtype"], int(header["rows"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ColumnarPayloadError(f"En-tête de matrice invalide : {e}") from e
+    check_rows(rows, max_rows)
+    if dtype not in MATRIX_DTYPES:
+        raise ColumnarPayloadError(f"dtype non supporté : {dtype} (attendu : {MATRIX_DTYPES}).")
+
+    expected = rows * len(fields) * np.dtype(dtype).itemsize
+    if len(body) - offset != expected:
+        raise ColumnarPayloadError(
+            f"Taille de la matrice incohérente : {len(body) - offset} octets, "
+            f"{expected} attendus ({rows} lignes x {len(fields)} colonnes {dtype})."
+        )
+    matrix = np.frombuffer(body, dtype=dtype, offset=offset).reshape(rows, len(fields))
+    return header, matrix
+
+
+def decode_matrix_columns(body: bytes, max_rows: int | None = None) -> dict[str, np.ndarray]:
+    header, matrix = decode_matrix(body, max_rows)
+    return {field: matrix[:, j] for j, field in enumerate(header["fields"])}
+
+
+def decode_columns(
+    body: bytes, content_type: str, max_rows: int | None = None
+) -> dict[str, np.ndarray]:
+    """Colonnes du corps ; ColumnarTooLargeError au-delà de `max_rows` lignes."""
+    if content_type == MATRIX_CONTENT_TYPE:
+        return decode_matrix_columns(body, max_rows)
+    return decode_json_columns(body, max_rows)
+
+
+# ==========================================
+# Validation vectorisée (mêmes règles que InputData)
+# ==========================================
+
+
+def validate_columns(
+    columns: dict[str, np.ndarray], fields: list[str]
+) -> tuple[np.ndarray, np.ndarray, dict[int, list[dict]]]:
+    """Matrice des features (ordre `fields`), masque des lignes valides et erreurs par ligne.
+
+    Chaque contrainte est évaluée sur la colonne entière ; seules les lignes fautives
+    (rares) sont ensuite parcourues pour produire des erreurs au format de Pydantic.
+    """
+    missing = [field for field in fields if field not in columns]
+    if missing:
+        raise ColumnarPayloadError(f"Colonnes manquantes : {missing}.")
+    lengths = {len(columns[field]) for field in fields}
+    if len(lengths) != 1:
+        raise ColumnarPayloadError(f"Colonnes de longueurs différentes : {sorted(lengths)}.")
+
+    matrix = np.empty((lengths.pop(), len(fields)), dtype=np.float64)
+    errors: dict[int, list[dict]] = {}
+
+    def reject(mask: np.ndarray, field: str, error_type: str, msg: str):
+        for i in np.flatnonzero(mask).tolist():
+            errors.setdefault(i, []).append({"type": error_type, "loc": [field], "msg": msg})
+
+    for j, field in enumerate(fields):
+        column = matrix[:, j]
+        column[:] = columns[field]
+        finite = np.isfinite(column)
+        reject(~finite, field, "finite_number", "Input should be a finite number")
+
+        ge, le = FIELD_BOUNDS[field]
+        if ge is not None:
+            reject(
+                finite & (column < ge),
+                field,
+                "greater_than_equal",
+                f"Input should be greater than or equal to {ge}",
+            )
+        if le is not None:
+            reject(
+                finite & (column > le),
+                field,
+                "less_than_equal",
+                f"Input should be less than or equal to {le}",
+            )
+        if field in INTEGER_FIELDS:
+            reject(
+                finite & (column != np.trunc(column)),
+                field,
+                "int_from_float",
+                "Input should be a valid integer, got a number with a fractional part",
+            )
+
+    valid = np.ones(len(matrix), dtype=bool)
+    valid[list(errors)] = False
+    return matrix, valid, errors
+
+
+# ==========================================
+# Encodage de la réponse (même format que la requête)
+# ==========================================
+
+
+def encode_response(
+    content_type: str,
+    meta: dict,
+    predictions: np.ndarray,
+    probas: np.ndarray,
+    errors: dict[int, list[dict]],
+) -> bytes:
+    """Résultats alignés sur les lignes de la requête ; les lignes invalides sont vides.
+
+    JSON : `prediction` / `probability` (null si invalide) et `errors` par indice.
+    Binaire : matrice (prediction, probability) en float64, erreurs dans l'en-tête.
+    """
+    error_list = [{"index": i, "errors": errors[i]} for i in sorted(errors)]
+    if content_type == MATRIX_CONTENT_TYPE:
+        matrix = np.column_stack([predictions.astype(np.float64), probas])
+        return encode_matrix(matrix, RESPONSE_FIELDS, **meta, errors=error_list)
+
+    prediction_list = predictions.tolist()
+    probability_list = probas.tolist()
+    for i in errors:
+        prediction_list[i] = probability_list[i] = None
+    for i in np.flatnonzero(np.isnan(probas)).tolist():
+        probability_list[i] = None  # Modèle sans predict_proba
+    payload = meta | {
+        "prediction": prediction_list,
+        "probability": probability_list,
+        "errors": error_list,
+    }
+    return json.dumps(payload).encode()
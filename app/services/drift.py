@@ -0,0 +1,445 @@
+import datetime
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# ==========================================
+# Configuration (variables d'environnement)
+# ==========================================
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+CSV_PATH = BASE_DIR / "final_data_set.csv"
+
+DRIFT_MONITORING_ENABLED = os.getenv("DRIFT_MONITORING_ENABLED", "1") == "1"
+# Référence précalculée (générée par drift_baseline.py, ou au premier démarrage)
+DRIFT_BASELINE_PATH = Path(
+    os.getenv("DRIFT_BASELINE_PATH", BASE_DIR / "model" / "drift_baseline.json")
+)
+# Durée d'une fenêtre d'agrégation et nombre de fenêtres conservées
+DRIFT_WINDOW_SECONDS = int(os.getenv("DRIFT_WINDOW_SECONDS", "3600"))
+DRIFT_MAX_WINDOWS = int(os.getenv("DRIFT_MAX_WINDOWS", "168"))
+# Seuil de PSI au-delà duquel une variable est signalée (0.1 : modéré, 0.25 : fort)
+DRIFT_PSI_ALERT = float(os.getenv("DRIFT_PSI_ALERT", "0.2"))
+
+# Variables à peu de modalités : une classe par valeur plutôt que des quantiles
+MAX_DISCRETE_VALUES = 10
+N_QUANTILE_BINS = 10
+# Histogramme fixe des probabilités de churn
+PROBABILITY_EDGES = np.linspace(0.1, 0.9, 9)
+# Lissage des proportions nulles dans le PSI
+PSI_EPSILON = 1e-4
+
+
+# ==========================================
+# Référence (données d'entraînement)
+# ==========================================
+
+
+def bin_edges(values: np.ndarray) -> np.ndarray:
+    """Bornes intérieures des classes : une par modalité, ou déciles si continue."""
+    unique = np.unique(values[np.isfinite(values)])
+    if len(unique) <= MAX_DISCRETE_VALUES:
+        return (unique[:-1] + unique[1:]) / 2
+    quantiles = np.quantile(values, np.linspace(0, 1, N_QUANTILE_BINS + 1)[1:-1])
+    return np.unique(quantiles)
+
+
+def bin_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Effectifs par classe (len(edges) + 1 classes, bornes ouvertes aux extrémités)."""
+    return np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+
+
+def compute_baseline(
+    X: np.ndarray,
+    features: list[str],
+    probas: np.ndarray | None = None,
+    model_version: str | None = None,
+) -> dict:
+    """Statistiques de référence par variable (et des probabilités si fournies)."""
+    X = np.asarray(X, dtype=np.float64)
+    baseline = {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "count": len(X),
+        "features": {},
+        "probability": None,
+    }
+    for j, feature in enumerate(features):
+        edges = bin_edges(X[:, j])
+        counts = bin_counts(X[:, j], edges)
+        baseline["features"][feature] = {
+            "mean": float(X[:, j].mean()),
+            "std": float(X[:, j].std()),
+            "edges": edges.tolist(),
+            "proportions": (counts / counts.sum()).tolist(),
+        }
+    if probas is not None:
+        baseline["probability"] = probability_reference(probas, model_version)
+    return baseline
+
+
+def probability_reference(probas: np.ndarray, model_version: str | None = None) -> dict:
+    """Distribution des probabilités d'un modèle sur les données d'entraînement."""
+    counts = bin_counts(np.asarray(probas, dtype=np.float64), PROBABILITY_EDGES)
+    return {
+        "mean": float(np.mean(probas)),
+        "proportions": (counts / counts.sum()).tolist(),
+        "model_version": model_version,
+    }
+
+
+def save_baseline(baseline: dict, path: Path = DRIFT_BASELINE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(baseline, indent=2, ensure_ascii=False), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def load_baseline(path: Path = DRIFT_BASELINE_PATH) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def training_matrix_from_csv(features: list[str], csv_path: Path = CSV_PATH) -> np.ndarray:
+    """Données d'entraînement (final_data_set.csv), colonnes dans l'ordre du modèle."""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, sep=";", usecols=features)
+    return df[features].to_numpy(dtype=np.float64)
+
+
+def training_matrix_from_db(features: list[str], bind) -> np.ndarray:
+    """Historique des employés (table employees_history), colonnes dans l'ordre du modèle."""
+    import pandas as pd
+    from sqlalchemy import select
+
+    from app.models.features import FIELD_TO_COLUMN
+    from database import EmployeeHistory
+
+    column_to_field = {column: field for field, column in FIELD_TO_COLUMN.items()}
+    fields = [column_to_field[feature] for feature in features]
+    query = select(*(getattr(EmployeeHistory, field) for field in fields))
+    with bind.connect() as connection:
+        df = pd.read_sql(query, connection)
+    return df[fields].to_numpy(dtype=np.float64)
+
+
+def model_probabilities(X: np.ndarray, model) -> np.ndarray | None:
+    if model is None or not hasattr(model, "predict_proba"):
+        return None
+    return np.asarray(model.predict_proba(X), dtype=np.float64)[:, 1]
+
+
+def build_baseline(
+    X: np.ndarray, features: list[str], model=None, model_version: str | None = None
+) -> dict:
+    """Référence des features et, si un modèle est fourni, de ses probabilités."""
+    return compute_baseline(X, features, model_probabilities(X, model), model_version)
+
+
+# ==========================================
+# Indicateurs de dérive
+# ==========================================
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population Stability Index entre deux distributions de proportions."""
+    expected = np.clip(np.asarray(expected, dtype=np.float64), PSI_EPSILON, None)
+    actual = np.clip(np.asarray(actual, dtype=np.float64), PSI_EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks_binned(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Statistique de Kolmogorov-Smirnov calculée sur les classes (écart max des CDF)."""
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual)), initial=0.0))
+
+
+# ==========================================
+# Agrégats glissants
+# ==========================================
+
+
+class FeatureBins:
+    """Classes de toutes les variables, évaluées en une seule opération vectorisée.
+
+    Les bornes sont alignées dans une matrice complétée par +inf ; les histogrammes des
+    variables sont concaténés dans un seul tableau (variable j à partir de offsets[j]).
+    """
+
+    def __init__(self, edges: list[np.ndarray]):
+        width = max((len(e) for e in edges), default=0)
+        self.matrix = np.full((len(edges), width), np.inf)
+        for j, feature_edges in enumerate(edges):
+            self.matrix[j, : len(feature_edges)] = feature_edges
+        sizes = np.array([len(e) + 1 for e in edges])
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+        self.slices = [slice(o, o + n) for o, n in zip(self.offsets, sizes, strict=True)]
+        self.size = int(sizes.sum())
+
+    def counts(self, X: np.ndarray) -> np.ndarray:
+        # Nombre de bornes <= x, soit searchsorted(side="right") pour chaque variable
+        index = (X[:, :, None] >= self.matrix[None]).sum(axis=2) + self.offsets
+        return np.bincount(index.ravel(), minlength=self.size)
+
+
+class WindowAggregate:
+    """Agrégats d'une fenêtre : effectif, moyenne et variance (Welford), histogrammes."""
+
+    def __init__(self, start: int, n_features: int, bins: FeatureBins):
+        self.start = start
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.histogram = np.zeros(bins.size, dtype=np.int64)
+        self.proba_count = 0
+        self.proba_sum = 0.0
+        self.proba_histogram = np.zeros(len(PROBABILITY_EDGES) + 1, dtype=np.int64)
+
+    def update(self, X: np.ndarray, bins: FeatureBins, probas: np.ndarray | None):
+        # Welford par lot (combinaison de Chan) : un seul passage vectorisé par appel
+        n = len(X)
+        batch_mean = X.sum(axis=0) / n
+        # Une seule ligne (cas de /predict) : dispersion interne nulle, calcul évité
+        batch_m2 = ((X - batch_mean) ** 2).sum(axis=0) if n > 1 else 0.0
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * (n / total)
+        self.m2 += batch_m2 + delta**2 * (self.count * n / total)
+        self.count = total
+        self.histogram += bins.counts(X)
+
+        if probas is not None:
+            self.proba_count += len(probas)
+            self.proba_sum += float(probas.sum())
+            self.proba_histogram += bin_counts(probas, PROBABILITY_EDGES)
+
+    def reset_probabilities(self):
+        self.proba_count = 0
+        self.proba_sum = 0.0
+        self.proba_histogram[:] = 0
+
+    def merge(self, other: "WindowAggregate"):
+        """Ajoute une autre fenêtre (combinaison exacte des moyennes et variances)."""
+        total = self.count + other.count
+        if other.count:
+            delta = other.mean - self.mean
+            self.mean += delta * (other.count / total)
+            self.m2 += other.m2 + delta**2 * (self.count * other.count / total)
+            self.count = total
+        self.histogram += other.histogram
+        self.proba_count += other.proba_count
+        self.proba_sum += other.proba_sum
+        self.proba_histogram += other.proba_histogram
+
+
+class DriftMonitor:
+    """Suivi incrémental de la dérive des entrées et des scores servis.
+
+    Chaque prédiction met à jour les agrégats de la fenêtre courante (coût proportionnel
+    au lot, vectorisé) ; le rapport combine au plus `max_windows` fenêtres, quel que soit
+    le nombre de prédictions journalisées : il ne relit jamais `prediction_logs`.
+
+    Les probabilités dépendent du modèle : quand la version servie change, celles de
+    l'ancienne version sont écartées et ne sont comparées qu'à la référence de la même
+    version (`baseline["probability"]["model_version"]`).
+    """
+
+    def __init__(
+        self,
+        baseline: dict,
+        features: list[str],
+        window_seconds: int = DRIFT_WINDOW_SECONDS,
+        max_windows: int = DRIFT_MAX_WINDOWS,
+        psi_alert: float = DRIFT_PSI_ALERT,
+        clock=time.time,
+    ):
+        self.baseline = baseline
+        self.features = list(features)
+        self.window_seconds = window_seconds
+        self.max_windows = max_windows
+        self.psi_alert = psi_alert
+        self.clock = clock
+
+        self.bins = FeatureBins([np.asarray(baseline["features"][f]["edges"]) for f in features])
+        self._windows: list[WindowAggregate] = []
+        self._lock = threading.Lock()
+        # Version du modèle dont les probabilités sont agrégées
+        self.served_version: str | None = None
+
+    @property
+    def probability_version(self) -> str | None:
+        reference = self.baseline.get("probability")
+        return reference.get("model_version") if reference else None
+
+    def set_probability_reference(self, reference: dict | None):
+        """Remplace la référence des probabilités (nouvelle version du modèle)."""
+        with self._lock:
+            self.baseline = self.baseline | {"probability": reference}
+
+    def _current_window(self) -> WindowAggregate:
+        start = int(self.clock() // self.window_seconds * self.window_seconds)
+        if not self._windows or self._windows[-1].start != start:
+            self._windows.append(WindowAggregate(start, len(self.features), self.bins))
+            del self._windows[: -self.max_windows]
+        return self._windows[-1]
+
+    def observe(self, X: np.ndarray, probas=None, model_version: str | None = None):
+        """Ajoute un lot de features (ordre du modèle) et, si disponibles, ses probabilités
+        (calculées par la version `model_version`)."""
+        X = np.asarray(X, dtype=np.float64)
+        if probas is not None:
+            probas = np.asarray(probas, dtype=np.float64)
+            if not np.isfinite(probas).all():
+                probas = None
+        with self._lock:
+            if probas is not None and model_version != self.served_version:
+                for window in self._windows:
+                    window.reset_probabilities()
+                self.served_version = model_version
+            self._current_window().update(X, self.bins, probas)
+
+    def report(self, windows: int | None = None) -> dict:
+        """Compare les `windows` dernières fenêtres (toutes par défaut) à la référence."""
+        with self._lock:
+            selected = self._windows[-windows:] if windows else list(self._windows)
+            merged = WindowAggregate(0, len(self.features), self.bins)
+            for window in selected:
+                merged.merge(window)
+            proba_reference = self.baseline.get("probability")
+            version = proba_reference.get("model_version") if proba_reference else None
+            if version is not None and version != self.served_version:
+                proba_reference = None  # Référence d'une autre version : pas de comparaison
+
+        report = {
+            "count": merged.count,
+            "windows": len(selected),
+            "window_seconds": self.window_seconds,
+            "from": _iso(selected[0].start) if selected else None,
+            "psi_alert": self.psi_alert,
+            "features": {},
+            "probability": None,
+        }
+        if not merged.count:
+            return report
+
+        variance = merged.m2 / merged.count
+        for j, feature in enumerate(self.features):
+            reference = self.baseline["features"][feature]
+            proportions = merged.histogram[self.bins.slices[j]] / merged.count
+            score = psi(reference["proportions"], proportions)
+            report["features"][feature] = {
+                "mean": float(merged.mean[j]),
+                "std": float(np.sqrt(variance[j])),
+                "baseline_mean": reference["mean"],
+                "baseline_std": reference["std"],
+                "psi": score,
+                "ks": ks_binned(reference["proportions"], proportions),
+                "drift": score > self.psi_alert,
+            }
+
+        if merged.proba_count:
+            proportions = merged.proba_histogram / merged.proba_count
+            report["probability"] = {
+                "model_version": self.served_version,
+                "count": merged.proba_count,
+                "mean": merged.proba_sum / merged.proba_count,
+                "histogram": proportions.tolist(),
+                "baseline_mean": proba_reference["mean"] if proba_reference else None,
+                "psi": (
+                    psi(proba_reference["proportions"], proportions) if proba_reference else None
+                ),
+            }
+        report["drifting_features"] = [
+            feature for feature, stats in report["features"].items() if stats["drift"]
+        ]
+        return report
+
+
+def _iso(timestamp: int) -> str:
+    return datetime.datetime.fromtimestamp(timestamp).isoformat(timespec="seconds")
+
+
+class LazyDriftMonitor:
+    """Moniteur de l'API, construit au premier besoin plutôt qu'à l'import.
+
+    `ensure()` (lifespan, puis chaque appel à /monitoring/drift) relit la référence sur
+    disque ou, à défaut, la calcule sur final_data_set.csv puis la sauve
+    (drift_baseline.py permet de la recalculer depuis employees_history). La référence des
+    probabilités est recalculée dès que la version servie change (rechargement à chaud).
+    Tant que le moniteur n'est pas construit, les prédictions ne sont pas suivies.
+    """
+
+    def __init__(
+        self, features: list[str], path: Path = DRIFT_BASELINE_PATH, csv_path: Path = CSV_PATH
+    ):
+        self.features = list(features)
+        self.path = path
+        self.csv_path = csv_path
+        self.monitor: DriftMonitor | None = None
+        # Référence indisponible (CSV absent, illisible) : suivi désactivé, sans nouvel essai
+        self.unavailable = False
+        self._training: np.ndarray | None = None
+        self._lock = threading.Lock()
+
+    def training_matrix(self) -> np.ndarray:
+        if self._training is None:
+            self._training = training_matrix_from_csv(self.features, self.csv_path)
+        return self._training
+
+    def ensure(self, version=None) -> DriftMonitor | None:
+        """Moniteur, avec la référence des probabilités de `version` (ModelVersion)."""
+        with self._lock:
+            if self.monitor is None and not self.unavailable:
+                try:
+                    self.monitor = DriftMonitor(self._load_feature_reference(), self.features)
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Suivi de la dérive désactivé (référence indisponible) : {e}")
+                    self.unavailable = True
+                    return None
+            if self.monitor is not None and version is not None:
+                self._refresh_probabilities(version)
+            return self.monitor
+
+    def observe(self, X: np.ndarray, probas=None, model_version: str | None = None):
+        monitor = self.monitor
+        if monitor is not None:
+            monitor.observe(X, probas, model_version)
+
+    def _load_feature_reference(self) -> dict:
+        baseline = load_baseline(self.path)
+        if baseline is None or set(baseline["features"]) != set(self.features):
+            baseline = build_baseline(self.training_matrix(), self.features)
+            self._save(baseline)
+        return baseline
+
+    def _refresh_probabilities(self, version):
+        if self.monitor.probability_version == version.version:
+            return
+        try:
+            probas = model_probabilities(self.training_matrix(), version.model)
+        except (OSError, RuntimeError, TypeError, ValueError) as e:
+            print(f"⚠️ Référence des probabilités non calculée ({version.version}) : {e}")
+            return
+        if probas is None:
+            return
+        self.monitor.set_probability_reference(probability_reference(probas, version.version))
+        print(f"✅ Référence de dérive des probabilités calculée pour {version.version}.")
+        self._save(self.monitor.baseline)
+
+    def _save(self, baseline: dict):
+        try:
+            save_baseline(baseline, self.path)
+        except OSError as e:
+            print(f"⚠️ Référence de dérive non sauvegardée : {e}")
+
+
+def create_drift_monitor(features: list[str]) -> LazyDriftMonitor | None:
+    """Moniteur de l'API (None si le suivi est désactivé) ; aucune lecture à l'import."""
+    if not DRIFT_MONITORING_ENABLED:
+        return None
+    return LazyDriftMonitor(features)
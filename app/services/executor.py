@@ -0,0 +1,39 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# ==========================================
+# Configuration (variables d'environnement)
+# ==========================================
+
+# Threads dédiés à l'inférence (CPU) : ne concurrencent pas le threadpool des requêtes
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+class InferenceExecutor:
+    """Pool de threads dimensionné pour l'inférence, appelable depuis la boucle asyncio.
+
+    Les routes asynchrones y délèguent le calcul du modèle : la boucle d'événements reste
+    libre pour les E/S (BDD, réseau) et le nombre d'inférences simultanées est borné par
+    `max_workers`, indépendamment du nombre de requêtes en vol.
+    """
+
+    def __init__(self, max_workers: int = INFERENCE_WORKERS):
+        self.max_workers = max_workers
+        self._pool: ThreadPoolExecutor | None = None
+
+    def start(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="inference")
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    async def run(self, fn, *args):
+        """Exécute `fn(*args)` sur le pool (démarré à la demande) et attend son résultat."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, partial(fn, *args))
@@ -0,0 +1,137 @@
+import base64
+import csv
+import datetime
+import io
+import json
+import os
+
+from sqlalchemy import select, tuple_
+
+from app.schemas import InputData
+from database import PredictionLog
+
+# ==========================================
+# Configuration (variables d'environnement)
+# ==========================================
+
+# Taille de page maximale de /logs
+LOGS_MAX_PAGE_SIZE = int(os.getenv("LOGS_MAX_PAGE_SIZE", "1000"))
+# Lignes lues par aller-retour du curseur serveur lors d'un export
+LOGS_EXPORT_CHUNK_SIZE = int(os.getenv("LOGS_EXPORT_CHUNK_SIZE", "5000"))
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Colonnes renvoyées par /logs et /logs/export (hors ancienne colonne JSON `inputs`)
+LOG_COLUMNS = [
+    PredictionLog.id,
+    PredictionLog.request_id,
+    PredictionLog.timestamp,
+    *(getattr(PredictionLog, field) for field in InputData.model_fields),
+    PredictionLog.prediction,
+    PredictionLog.probability,
+    PredictionLog.model_version,
+]
+LOG_FIELDS = [column.key for column in LOG_COLUMNS]
+
+
+class InvalidCursor(ValueError):
+    """Curseur de pagination illisible (non produit par /logs)."""
+
+
+# ==========================================
+# Requêtes (pagination par clé : (timestamp, id))
+# ==========================================
+
+
+def encode_cursor(timestamp: datetime.datetime, log_id: int) -> str:
+    raw = json.dumps([timestamp.isoformat(), log_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, log_id = json.loads(raw)
+        return datetime.datetime.fromisoformat(timestamp), int(log_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Curseur invalide : {cursor!r}") from e
+
+
+def log_query(
+    start: datetime.datetime | None = None,
+    end: datetime.datetime | None = None,
+    prediction: int | None = None,
+    min_probability: float | None = None,
+    max_probability: float | None = None,
+    model_version: str | None = None,
+    cursor: str | None = None,
+):
+    """Logs filtrés, du plus récent au plus ancien (ordre de l'index (timestamp, id)).
+
+    Le curseur reprend strictement après la dernière ligne de la page précédente :
+    chaque page est une lecture d'index bornée, sans OFFSET à parcourir.
+    """
+    query = select(*LOG_COLUMNS)
+    if start is not None:
+        query = query.where(PredictionLog.timestamp >= start)
+    if end is not None:
+        query = query.where(PredictionLog.timestamp < end)
+    if prediction is not None:
+        query = query.where(PredictionLog.prediction == prediction)
+    if min_probability is not None:
+        query = query.where(PredictionLog.probability >= min_probability)
+    if max_probability is not None:
+        query = query.where(PredictionLog.probability <= max_probability)
+    if model_version is not None:
+        query = query.where(PredictionLog.model_version == model_version)
+    if cursor is not None:
+        query = query.where(
+            tuple_(PredictionLog.timestamp, PredictionLog.id) < tuple_(*decode_cursor(cursor))
+        )
+    return query.order_by(PredictionLog.timestamp.desc(), PredictionLog.id.desc())
+
+
+def fetch_page(db, query, limit: int) -> dict:
+    """Page de `limit` logs et curseur de la suivante (None sur la dernière page)."""
+    rows = db.execute(query.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+    return {"items": [row._asdict() for row in rows], "next_cursor": next_cursor}
+
+
+# ==========================================
+# Export en flux (curseur côté serveur)
+# ==========================================
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime.datetime) else value
+
+
+def iter_export(db, query, export_format: str, chunk_size: int = LOGS_EXPORT_CHUNK_SIZE):
+    """Produit l'export par paquets de `chunk_size` lignes.
+
+    `yield_per` ouvre un curseur côté serveur (`stream_results`) : seul le paquet en
+    cours est en mémoire, quel que soit le nombre de lignes exportées.
+    """
+    result = db.execute(query.execution_options(yield_per=chunk_size))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n") if export_format == "csv" else None
+    if writer is not None:
+        writer.writerow(LOG_FIELDS)
+
+    for rows in result.partitions():
+        if writer is not None:
+            writer.writerows([_value(value) for value in row] for row in rows)
+        else:
+            for row in rows:
+                buffer.write(json.dumps(dict(zip(LOG_FIELDS, map(_value, row), strict=True))))
+                buffer.write("\n")
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
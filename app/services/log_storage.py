@@ -0,0 +1,363 @@
+import datetime
+import os
+import sqlite3
+from pathlib import Path
+
+from sqlalchemy import Date, bindparam, cast, delete, func, inspect, select, text, update
+
+from app.schemas import InputData
+from database import PredictionLog, PredictionLogDaily
+
+# ==========================================
+# Configuration (variables d'environnement)
+# ==========================================
+
+# Durée de conservation des logs détaillés ; au-delà, seuls les agrégats journaliers restent
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "90"))
+# SQLite : répertoire des archives des logs compactés (vide : pas d'archive)
+LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", "")
+# PostgreSQL : partitions mensuelles créées à l'avance
+LOG_PARTITION_MONTHS_AHEAD = int(os.getenv("LOG_PARTITION_MONTHS_AHEAD", "2"))
+
+TABLE = PredictionLog.__tablename__
+FEATURE_FIELDS = list(InputData.model_fields)
+
+
+# ==========================================
+# Migration : features JSON -> colonnes typées
+# ==========================================
+
+
+def backfill_feature_columns(bind, batch_size: int = 5000) -> int:
+    """Recopie `inputs` (JSON) dans les colonnes typées puis vide `inputs`.
+
+    Traite les lignes par paquets d'`id` croissants (une transaction par paquet) :
+    le job peut être interrompu et relancé sans reprendre depuis le début.
+    """
+    statement = (
+        update(PredictionLog.__table__)
+        .where(PredictionLog.__table__.c.id == bindparam("row_id"))
+        .values({field: bindparam(field) for field in FEATURE_FIELDS} | {"inputs": None})
+    )
+    migrated, last_id = 0, 0
+    while True:
+        with bind.begin() as conn:
+            rows = conn.execute(
+                select(PredictionLog.id, PredictionLog.inputs)
+                .where(PredictionLog.id > last_id, PredictionLog.inputs.is_not(None))
+                .order_by(PredictionLog.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return migrated
+            params = [
+                {"row_id": row_id, **{field: (inputs or {}).get(field) for field in FEATURE_FIELDS}}
+                for row_id, inputs in rows
+            ]
+            conn.execute(statement, params)
+        migrated += len(rows)
+        last_id = rows[-1].id
+
+
+# ==========================================
+# Compaction en agrégats journaliers
+# ==========================================
+
+
+def day_expression(dialect_name: str):
+    # SQLite stocke les dates en texte : CAST(... AS DATE) n'y tronque pas l'heure
+    if dialect_name == "sqlite":
+        return func.date(PredictionLog.timestamp)
+    return cast(PredictionLog.timestamp, Date)
+
+
+def daily_aggregates(conn, before: datetime.datetime) -> list[dict]:
+    """Agrégats (jour, version du modèle) des logs antérieurs à `before`, calculés en SQL."""
+    day = day_expression(conn.dialect.name).label("day")
+    feature_means = [func.avg(getattr(PredictionLog, field)) for field in FEATURE_FIELDS]
+    rows = conn.execute(
+        select(
+            day,
+            PredictionLog.model_version,
+            func.count(),
+            func.coalesce(func.sum(PredictionLog.prediction), 0),
+            func.count(PredictionLog.probability),
+            func.sum(PredictionLog.probability),
+            func.min(PredictionLog.probability),
+            func.max(PredictionLog.probability),
+            *feature_means,
+        )
+        .where(PredictionLog.timestamp < before)
+        .group_by(day, PredictionLog.model_version)
+    ).all()
+
+    aggregates = []
+    for row in rows:
+        row_day = (
+            row[0] if isinstance(row[0], datetime.date) else datetime.date.fromisoformat(row[0])
+        )
+        aggregates.append(
+            {
+                "day": row_day,
+                "model_version": row[1],
+                "n_predictions": row[2],
+                "n_churn": int(row[3]),
+                "n_probability": row[4],
+                "probability_sum": row[5],
+                "probability_min": row[6],
+                "probability_max": row[7],
+                "feature_means": dict(zip(FEATURE_FIELDS, row[8:], strict=True)),
+            }
+        )
+    return aggregates
+
+
+def merge_aggregate(existing: PredictionLogDaily, new: dict) -> dict:
+    """Combine un agrégat déjà compacté (logs arrivés en retard) avec un nouveau."""
+    total = existing.n_predictions + new["n_predictions"]
+    means = {}
+    for field in FEATURE_FIELDS:
+        old_mean, new_mean = (existing.feature_means or {}).get(field), new["feature_means"][field]
+        if old_mean is None or new_mean is None:
+            means[field] = new_mean if old_mean is None else old_mean
+        else:
+            means[field] = (
+                old_mean * existing.n_predictions + new_mean * new["n_predictions"]
+            ) / total
+
+    def combine(a, b, fn):
+        values = [v for v in (a, b) if v is not None]
+        return fn(values) if values else None
+
+    return {
+        "n_predictions": total,
+        "n_churn": existing.n_churn + new["n_churn"],
+        "n_probability": existing.n_probability + new["n_probability"],
+        "probability_sum": combine(existing.probability_sum, new["probability_sum"], sum),
+        "probability_min": combine(existing.probability_min, new["probability_min"], min),
+        "probability_max": combine(existing.probability_max, new["probability_max"], max),
+        "feature_means": means,
+    }
+
+
+def compact_logs(
+    bind,
+    retention_days: int = LOG_RETENTION_DAYS,
+    archive_dir: str | Path | None = LOG_ARCHIVE_DIR,
+    now: datetime.datetime | None = None,
+) -> dict:
+    """Remplace les logs de plus de `retention_days` jours par leurs agrégats journaliers.
+
+    La limite est alignée sur minuit : une journée est toujours compactée en entier.
+    Sous PostgreSQL, les partitions entièrement expirées sont supprimées (DROP, sans
+    parcourir leurs lignes) ; sous SQLite, les lignes peuvent être archivées dans un
+    fichier à part avant leur suppression (`archive_dir`).
+    """
+    today = (now or datetime.datetime.now()).date()
+    before = datetime.datetime.combine(
+        today - datetime.timedelta(days=retention_days), datetime.time()
+    )
+
+    # Archive (idempotente) avant la transaction de compaction : un échec entre les deux
+    # laisse les logs en place, et une nouvelle exécution reprend simplement la copie
+    archived = 0
+    if archive_dir and bind.dialect.name == "sqlite":
+        archived = archive_sqlite_logs(bind, before, Path(archive_dir))
+
+    with bind.begin() as conn:
+        aggregates = daily_aggregates(conn, before)
+        for aggregate in aggregates:
+            existing = conn.execute(
+                select(PredictionLogDaily).where(
+                    PredictionLogDaily.day == aggregate["day"],
+                    (
+                        PredictionLogDaily.model_version.is_(None)
+                        if aggregate["model_version"] is None
+                        else PredictionLogDaily.model_version == aggregate["model_version"]
+                    ),
+                )
+            ).first()
+            if existing is None:
+                conn.execute(PredictionLogDaily.__table__.insert(), aggregate)
+            else:
+                conn.execute(
+                    update(PredictionLogDaily.__table__)
+                    .where(PredictionLogDaily.__table__.c.id == existing.id)
+                    .values(merge_aggregate(existing, aggregate))
+                )
+
+        dropped = drop_expired_partitions(conn, before) if is_partitioned(conn) else []
+        deleted = conn.execute(delete(PredictionLog).where(PredictionLog.timestamp < before))
+
+    return {
+        "before": before.isoformat(),
+        "days": len({aggregate["day"] for aggregate in aggregates}),
+        "compacted": sum(aggregate["n_predictions"] for aggregate in aggregates),
+        "archived": archived,
+        "dropped_partitions": dropped,
+        "deleted": deleted.rowcount,
+    }
+
+
+# ==========================================
+# SQLite : rollover vers des fichiers d'archive
+# ==========================================
+
+
+def archive_sqlite_logs(bind, before: datetime.datetime, archive_dir: Path) -> int:
+    """Copie les logs antérieurs à `before` dans `prediction_logs_<AAAA-MM-JJ>.db`.
+
+    Le fichier est une base SQLite autonome (même table), consultable avec les mêmes
+    requêtes ; la base principale ne garde que les logs récents. Les lignes déjà
+    archivées (même `id`) sont ignorées.
+    """
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    archive_path = archive_dir / f"{TABLE}_{before:%Y-%m-%d}.db"
+
+    with bind.connect() as conn:
+        # Structure de la table recopiée depuis la base principale (sans index)
+        create_sql = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": TABLE},
+        ).scalar_one()
+        with sqlite3.connect(archive_path) as archive:
+            archive.execute(create_sql.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1))
+        archive.close()
+
+        conn.exec_driver_sql("ATTACH DATABASE ? AS archive", (str(archive_path),))
+        try:
+            result = conn.exec_driver_sql(
+                f"INSERT OR IGNORE INTO archive.{TABLE} "
+                f"SELECT * FROM main.{TABLE} WHERE timestamp < ?",
+                (before.isoformat(sep=" "),),
+            )
+            conn.commit()  # DETACH est refusé tant que la transaction est ouverte
+        finally:
+            conn.exec_driver_sql("DETACH DATABASE archive")
+    return result.rowcount
+
+
+# ==========================================
+# PostgreSQL : partitionnement mensuel par `timestamp`
+# ==========================================
+
+
+def month_start(day: datetime.date, offset: int = 0) -> datetime.date:
+    month = day.month - 1 + offset
+    return datetime.date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(start: datetime.date) -> str:
+    return f"{TABLE}_{start:%Y_%m}"
+
+
+def partition_ddl(start: datetime.date) -> str:
+    """DDL de la partition mensuelle qui commence à `start`."""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(start)} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{start}') TO ('{month_start(start, 1)}')"
+    )
+
+
+def is_partitioned(conn) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(
+        conn.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :name"
+            ),
+            {"name": TABLE},
+        ).first()
+    )
+
+
+def ensure_partitions(
+    bind, months_ahead: int = LOG_PARTITION_MONTHS_AHEAD, today=None
+) -> list[str]:
+    """Crée les partitions du mois courant et des `months_ahead` mois suivants."""
+    today = today or datetime.date.today()
+    with bind.begin() as conn:
+        if not is_partitioned(conn):
+            return []
+        starts = [month_start(today, offset) for offset in range(months_ahead + 1)]
+        for start in starts:
+            conn.execute(text(partition_ddl(start)))
+    return [partition_name(start) for start in starts]
+
+
+def drop_expired_partitions(conn, before: datetime.datetime) -> list[str]:
+    """Supprime les partitions mensuelles dont toutes les lignes sont antérieures à `before`."""
+    names = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :name"
+        ),
+        {"name": TABLE},
+    ).scalars()
+
+    dropped = []
+    for name in names:
+        try:
+            start = datetime.datetime.strptime(name.removeprefix(f"{TABLE}_"), "%Y_%m").date()
+        except ValueError:
+            continue  # Partition par défaut
+        if datetime.datetime.combine(month_start(start, 1), datetime.time()) <= before:
+            conn.execute(text(f'DROP TABLE "{name}"'))
+            dropped.append(name)
+    return dropped
+
+
+def partition_table(bind, months_ahead: int = LOG_PARTITION_MONTHS_AHEAD) -> int:
+    """Convertit `prediction_logs` (PostgreSQL) en table partitionnée par mois.
+
+    Migration en une transaction : l'ancienne table est renommée, la nouvelle est créée
+    avec les mêmes colonnes (clé primaire (id, timestamp), exigée par le partitionnement),
+    une partition par mois présent dans les données plus une partition par défaut, puis
+    les lignes sont recopiées. Un index unique doit contenir la clé de partitionnement :
+    l'unicité de `request_id` (UUID généré par l'API) n'est donc plus vérifiée par la base.
+    """
+    if bind.dialect.name != "postgresql":
+        raise ValueError("Le partitionnement n'est disponible que sous PostgreSQL.")
+
+    with bind.begin() as conn:
+        if is_partitioned(conn):
+            return 0
+        legacy = f"{TABLE}_legacy"
+        conn.execute(text(f"ALTER TABLE {TABLE} RENAME TO {legacy}"))
+        for index in inspect(conn).get_indexes(legacy):
+            conn.execute(text(f'ALTER INDEX "{index["name"]}" RENAME TO "{index["name"]}_legacy"'))
+        conn.execute(text(f"UPDATE {legacy} SET timestamp = now() WHERE timestamp IS NULL"))
+
+        conn.execute(
+            text(
+                f"CREATE TABLE {TABLE} (LIKE {legacy} INCLUDING DEFAULTS, "
+                "PRIMARY KEY (id, timestamp)) PARTITION BY RANGE (timestamp)"
+            )
+        )
+        # La séquence de `id` survit à la suppression de l'ancienne table
+        conn.execute(text(f"ALTER SEQUENCE IF EXISTS {TABLE}_id_seq OWNED BY {TABLE}.id"))
+        for column in ("id", "request_id", "timestamp", "model_version"):
+            conn.execute(
+                text(f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_{column} ON {TABLE} ({column})")
+            )
+
+        first, last = conn.execute(
+            text(f"SELECT min(timestamp), max(timestamp) FROM {legacy}")
+        ).one()
+        start = month_start((first or datetime.datetime.now()).date())
+        end = month_start(
+            max(last or datetime.datetime.now(), datetime.datetime.now()).date(), months_ahead
+        )
+        while start <= end:
+            conn.execute(text(partition_ddl(start)))
+            start = month_start(start, 1)
+        conn.execute(
+            text(f"CREATE TABLE IF NOT EXISTS {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+        )
+
+        copied = conn.execute(text(f"INSERT INTO {TABLE} SELECT * FROM {legacy}")).rowcount
+        conn.execute(text(f"DROP TABLE {legacy}"))
+    return copied
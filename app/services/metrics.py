@@ -0,0 +1,204 @@
+import bisect
+import contextlib
+import os
+import threading
+import time
+
+# ==========================================
+# Primitives de mesure (faible surcoût)
+# ==========================================
+
+# Bornes par défaut (secondes) : de 100 µs à 10 s
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    10.0,
+)
+
+# Bornes par défaut pour des tailles (lots, files d'attente)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class Histogram:
+    """Histogramme à bornes fixes (compteurs par intervalle, somme et total)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # Dernier intervalle : +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        """Compteurs cumulés par borne supérieure ("le"), comme Prometheus."""
+        with self._lock:
+            cumulative, total = {}, 0
+            for bound, count in zip((*self.buckets, "+Inf"), self._counts, strict=True):
+                total += count
+                cumulative[str(bound)] = total
+            return {"buckets": cumulative, "sum": self._sum, "count": self._count}
+
+
+# ==========================================
+# Registre de métriques et exposition texte (format Prometheus)
+# ==========================================
+
+# Active la mesure des étapes ; désactivée, chaque mesure se réduit à un contexte vide
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_NAMESPACE = "churn_api"
+
+
+class Counter:
+    """Compteur monotone."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """Valeur instantanée (dernière mesure)."""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Timer:
+    """Contexte qui mesure sa durée et l'ajoute à un histogramme."""
+
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+# Contexte partagé utilisé quand les métriques sont désactivées
+NULL_TIMER = contextlib.nullcontext()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Métriques de l'API, exposées sur /metrics au format texte de Prometheus.
+
+    Chaque série est identifiée par (nom, labels) et créée à sa première utilisation.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, namespace: str = METRICS_NAMESPACE):
+        self.enabled = enabled
+        self.namespace = namespace
+        self._series: dict[tuple[str, tuple], Histogram | Counter | Gauge] = {}
+        self._meta: dict[str, tuple[str, str]] = {}  # nom -> (type, description)
+        self._lock = threading.Lock()
+        self._stages: dict[str, Histogram] = {}  # Raccourci du chemin critique
+
+    def _get(self, kind: str, factory, name: str, description: str, labels: dict | None):
+        key = (f"{self.namespace}_{name}", tuple(sorted((labels or {}).items())))
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    self._meta.setdefault(key[0], (kind, description))
+                    series = self._series[key] = factory()
+        return series
+
+    def histogram(self, name: str, description: str, labels=None, buckets=LATENCY_BUCKETS):
+        return self._get("histogram", lambda: Histogram(buckets), name, description, labels)
+
+    def counter(self, name: str, description: str, labels=None) -> Counter:
+        return self._get("counter", Counter, name, description, labels)
+
+    def gauge(self, name: str, description: str, labels=None) -> Gauge:
+        return self._get("gauge", Gauge, name, description, labels)
+
+    def stage(self, stage: str):
+        """Mesure la durée d'une étape du chemin de prédiction (`with metrics.stage(...)`)."""
+        if not self.enabled:
+            return NULL_TIMER
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            histogram = self._stages[stage] = self.histogram(
+                "stage_duration_seconds",
+                "Durée des étapes du chemin de prédiction.",
+                {"stage": stage},
+            )
+        return Timer(histogram)
+
+    def render(self) -> str:
+        """Exposition texte (version 0.0.4) de toutes les séries."""
+        with self._lock:
+            meta = dict(self._meta)
+            all_series = sorted(self._series.items(), key=lambda item: item[0])
+
+        lines = []
+        for name in sorted(meta):
+            kind, description = meta[name]
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+            for (series_name, labels), series in all_series:
+                if series_name != name:
+                    continue
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(series.value)}")
+                    continue
+                snapshot = series.snapshot()
+                for bound, count in snapshot["buckets"].items():
+                    bucket_labels = _format_labels((*labels, ("le", bound)))
+                    lines.append(f"{name}_bucket{bucket_labels} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+        return "\n".join(lines) + "\n"
+
+
+# Registre global de l'API
+metrics = MetricsRegistry()
@@ -0,0 +1,179 @@
+import datetime
+import os
+import time
+
+import numpy as np
+from sqlalchemy import delete, exists, or_, select
+
+from app.models.registry import ModelVersion
+from database import EmployeeHistory, EmployeeScore
+
+# ==========================================
+# Configuration (variables d'environnement)
+# ==========================================
+
+# Employés lus (curseur côté serveur) et scorés par paquet
+POPULATION_CHUNK_SIZE = int(os.getenv("POPULATION_CHUNK_SIZE", "10000"))
+# Taille maximale d'un classement /population/top
+POPULATION_MAX_TOP_K = int(os.getenv("POPULATION_MAX_TOP_K", "1000"))
+
+SCORES = EmployeeScore.__table__
+
+
+def upsert_statement(dialect_name: str):
+    """INSERT ... ON CONFLICT (id_employee, model_version) DO UPDATE du score."""
+    # Import différé : le dialecte PostgreSQL (~60 ms) n'est pas chargé au démarrage de l'API
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    stmt = dialect_insert(SCORES)
+    return stmt.on_conflict_do_update(
+        index_elements=["id_employee", "model_version"],
+        set_={
+            column: stmt.excluded[column]
+            for column in ("probability", "scored_at", "source_updated_at")
+        },
+    )
+
+
+def rows_to_score(model_version: str, fields: list[str], full: bool):
+    """Employés à (re)scorer : tous, ou seulement ceux sans score à jour pour la version.
+
+    Un score est à jour si `source_updated_at` vaut encore `employees_history.updated_at`
+    (que l'upsert d'init_db.py ne modifie que pour les lignes réellement changées).
+    """
+    history = EmployeeHistory
+    query = (
+        select(
+            history.id_employee,
+            history.updated_at,
+            *(getattr(history, field) for field in fields),
+        )
+        .outerjoin(
+            EmployeeScore,
+            (EmployeeScore.id_employee == history.id_employee)
+            & (EmployeeScore.model_version == model_version),
+        )
+        .where(history.id_employee.is_not(None))
+    )
+    if not full:
+        query = query.where(
+            or_(
+                EmployeeScore.id.is_(None),
+                history.updated_at.is_distinct_from(EmployeeScore.source_updated_at),
+            )
+        )
+    return query.order_by(history.id_employee)
+
+
+def score_population(
+    bind,
+    model: ModelVersion,
+    fields: list[str],
+    full: bool = False,
+    chunk_size: int = POPULATION_CHUNK_SIZE,
+) -> dict:
+    """Score `employees_history` par paquets et enregistre les scores de `model.version`.
+
+    Les employés sont lus via un curseur côté serveur (`yield_per`) et chaque paquet est
+    scoré en un seul appel au modèle. Tout se fait dans une transaction : le classement
+    bascule d'un coup sur les nouveaux scores. Les scores des employés retirés de
+    l'historique sont supprimés.
+    """
+    started = time.perf_counter()
+    stats = {"model_version": model.version, "full": full, "scored": 0, "skipped": 0}
+
+    with bind.begin() as conn:
+        result = conn.execute(
+            rows_to_score(model.version, fields, full).execution_options(yield_per=chunk_size)
+        )
+        if conn.dialect.name == "sqlite":
+            # SQLite : le SELECT lit `employee_scores` (jointure) pendant que la même
+            # connexion y écrit ; la sélection est donc figée avant les écritures
+            selected = result.all()
+            partitions = [selected[i : i + chunk_size] for i in range(0, len(selected), chunk_size)]
+        else:
+            partitions = result.partitions()
+
+        upsert = upsert_statement(conn.dialect.name)
+        for rows in partitions:
+            X = np.array([row[2:] for row in rows], dtype=np.float64)
+            # Employés chargés avant l'ajout des colonnes du modèle : features incomplètes
+            complete = ~np.isnan(X).any(axis=1)
+            stats["skipped"] += int((~complete).sum())
+            if not complete.any():
+                continue
+            probas = np.asarray(model.model.predict_proba(X[complete]), dtype=np.float64)[:, 1]
+            now = datetime.datetime.now()
+            scored_rows = [row for row, keep in zip(rows, complete, strict=True) if keep]
+            conn.execute(
+                upsert,
+                [
+                    {
+                        "id_employee": row.id_employee,
+                        "model_version": model.version,
+                        "probability": float(proba),
+                        "scored_at": now,
+                        "source_updated_at": row.updated_at,
+                    }
+                    for row, proba in zip(scored_rows, probas, strict=True)
+                ],
+            )
+            stats["scored"] += len(scored_rows)
+
+        removed = conn.execute(
+            delete(EmployeeScore).where(
+                EmployeeScore.model_version == model.version,
+                ~exists().where(EmployeeHistory.id_employee == EmployeeScore.id_employee),
+            )
+        )
+        stats["removed"] = removed.rowcount
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+# ==========================================
+# Classement (top-k)
+# ==========================================
+
+
+def top_k_query(model_version: str, k: int, fields: list[str], filters: dict):
+    """Les `k` employés les plus à risque, après filtres sur leurs caractéristiques.
+
+    Le tri suit l'index (model_version, probability) : la base parcourt les scores par
+    probabilité décroissante et s'arrête dès que `k` employés satisfont les filtres.
+    """
+    history = EmployeeHistory
+    query = (
+        select(
+            EmployeeScore.id_employee,
+            EmployeeScore.probability,
+            EmployeeScore.scored_at,
+            *(getattr(history, field) for field in fields),
+        )
+        .join(history, history.id_employee == EmployeeScore.id_employee)
+        .where(EmployeeScore.model_version == model_version)
+    )
+    if filters.get("min_probability") is not None:
+        query = query.where(EmployeeScore.probability >= filters["min_probability"])
+    if filters.get("min_age") is not None:
+        query = query.where(history.age >= filters["min_age"])
+    if filters.get("max_age") is not None:
+        query = query.where(history.age <= filters["max_age"])
+    if filters.get("niveau_education") is not None:
+        query = query.where(history.niveau_education == filters["niveau_education"])
+    for indicator in (
+        "poste_consultant",
+        "poste_representant_commercial",
+        "frequence_deplacement_frequent",
+    ):
+        if filters.get(indicator) is not None:
+            query = query.where(getattr(history, indicator) == float(filters[indicator]))
+    return query.order_by(EmployeeScore.probability.desc(), EmployeeScore.id_employee).limit(k)
+
+
+def has_scores(db, model_version: str) -> bool:
+    query = select(EmployeeScore.id).where(EmployeeScore.model_version == model_version)
+    return db.execute(query.limit(1)).first() is not None
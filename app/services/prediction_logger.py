@@ -0,0 +1,197 @@
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.services.metrics import metrics
+from database import PredictionLog
+
+# ==========================================
+# Configuration (variables d'environnement)
+# ==========================================
+
+# "sync" : écriture dans la requête (défaut) ; "write_behind" : file + écritures groupées
+PREDICTION_LOG_MODE = os.getenv("PREDICTION_LOG_MODE", "sync")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "500"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))
+# Comportement quand la file est pleine : "block", "drop" ou "spill"
+LOG_OVERFLOW_POLICY = os.getenv("LOG_OVERFLOW_POLICY", "drop")
+LOG_BLOCK_TIMEOUT = float(os.getenv("LOG_BLOCK_TIMEOUT", "0.5"))
+LOG_SPILL_PATH = os.getenv("LOG_SPILL_PATH", "prediction_logs_spill.jsonl")
+
+OVERFLOW_POLICIES = ("block", "drop", "spill")
+
+
+class PredictionLogWriter:
+    """Journalisation "write-behind" des prédictions.
+
+    Les requêtes déposent leurs logs dans une file bornée en mémoire ; un thread dédié
+    les insère par paquets (INSERT multi-lignes) dès que `batch_size` logs sont en
+    attente ou que `flush_interval` secondes se sont écoulées.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        queue_size: int = LOG_QUEUE_SIZE,
+        batch_size: int = LOG_BATCH_SIZE,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+        overflow_policy: str = LOG_OVERFLOW_POLICY,
+        spill_path: str | Path = LOG_SPILL_PATH,
+        block_timeout: float = LOG_BLOCK_TIMEOUT,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"LOG_OVERFLOW_POLICY invalide : {overflow_policy!r} (attendu : {OVERFLOW_POLICIES})"
+            )
+
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.spill_path = Path(spill_path)
+        self.block_timeout = block_timeout
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._spill_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self.stats = {"enqueued": 0, "written": 0, "dropped": 0, "spilled": 0, "failed": 0}
+
+    def _count(self, name: str, n: int = 1):
+        """Incrémente un compteur (appelé depuis les requêtes ET le thread d'écriture)."""
+        with self._stats_lock:
+            self.stats[name] += n
+
+    def snapshot(self) -> dict:
+        with self._stats_lock:
+            return {**self.stats, "queue_depth": self._queue.qsize()}
+
+    # ------------------------------------------
+    # Cycle de vie
+    # ------------------------------------------
+
+    def start(self):
+        """Démarre le thread d'écriture (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Arrête le thread après avoir vidé la file (appelé à l'arrêt de l'API)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        # Filet de sécurité : tout ce qui reste est écrit de façon synchrone
+        self._flush(self._drain())
+
+    # ------------------------------------------
+    # Dépôt des logs (chemin critique des requêtes)
+    # ------------------------------------------
+
+    def submit(self, record: dict) -> bool:
+        """Dépose un log dans la file ; renvoie False s'il a été perdu."""
+        return self.submit_many([record]) == 1
+
+    def submit_many(self, records: list[dict]) -> int:
+        """Dépose plusieurs logs ; renvoie le nombre de logs acceptés.
+
+        Politique "block" : une seule échéance (`block_timeout`) pour tout le lot, et non
+        une attente par log. Les logs restants quand la file est pleine sont déversés ou
+        comptés comme perdus en une fois.
+        """
+        deadline = time.monotonic() + self.block_timeout
+        overflow: list[dict] = []
+        for i, record in enumerate(records):
+            try:
+                if self.overflow_policy == "block":
+                    self._queue.put(record, timeout=max(deadline - time.monotonic(), 0.0))
+                else:
+                    self._queue.put_nowait(record)
+            except queue.Full:
+                overflow = records[i:]
+                break
+
+        self._count("enqueued", len(records) - len(overflow))
+        if overflow and self.overflow_policy == "spill":
+            self._spill(overflow)
+            return len(records)
+        if overflow:
+            self._count("dropped", len(overflow))
+        return len(records) - len(overflow)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    # ------------------------------------------
+    # Thread d'écriture
+    # ------------------------------------------
+
+    def _run(self):
+        batch: list[dict] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while not self._stop.is_set():
+            try:
+                batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0.01)))
+            except queue.Empty:
+                pass
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+        self._flush(batch + self._drain())
+
+    def _drain(self) -> list[dict]:
+        records = []
+        while True:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                return records
+
+    def _flush(self, records: list[dict]):
+        """Insère les logs par paquets de `batch_size` (executemany)."""
+        for start in range(0, len(records), self.batch_size):
+            chunk = records[start : start + self.batch_size]
+            session = self.session_factory()
+            started = time.perf_counter()
+            try:
+                session.execute(insert(PredictionLog), chunk)
+                session.commit()
+                self._count("written", len(chunk))
+                if metrics.enabled:
+                    metrics.histogram(
+                        "prediction_log_write_seconds",
+                        "Durée d'écriture d'un paquet de logs (write-behind).",
+                    ).observe(time.perf_counter() - started)
+            except SQLAlchemyError as e:
+                session.rollback()
+                print(f"❌ Erreur d'écriture des logs ({len(chunk)} lignes) : {e}")
+                if self.overflow_policy == "spill":
+                    self._spill(chunk)
+                else:
+                    self._count("failed", len(chunk))
+            finally:
+                session.close()
+
+    def _spill(self, records: list[dict]):
+        """Déverse des logs sur disque (JSON Lines) pour rechargement ultérieur."""
+        with self._spill_lock, self.spill_path.open("a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+        self._count("spilled", len(records))
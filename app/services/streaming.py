@@ -0,0 +1,66 @@
+import os
+from collections.abc import AsyncIterator
+
+# ==========================================
+# Lecture incrémentale de corps NDJSON
+# ==========================================
+
+# Nombre de lignes scorées ensemble (une inférence et un INSERT par paquet)
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "1000"))
+# Taille maximale d'une ligne : au-delà, la ligne est signalée en erreur et ignorée
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "65536"))
+
+
+class LineTooLong:
+    """Marqueur d'une ligne dépassant STREAM_MAX_LINE_BYTES (son contenu est ignoré)."""
+
+
+async def iter_ndjson_lines(
+    byte_stream: AsyncIterator[bytes], max_line_bytes: int = STREAM_MAX_LINE_BYTES
+) -> AsyncIterator[tuple[int, bytes | type[LineTooLong]]]:
+    """Découpe un flux d'octets en lignes non vides, numérotées à partir de 1.
+
+    Seule la ligne en cours est gardée en mémoire : la consommation reste constante
+    quelle que soit la taille du fichier envoyé.
+    """
+    buffer = b""
+    line_no = 0
+    skipping = False  # Ligne trop longue en cours : on ignore jusqu'au prochain "\n"
+
+    async for chunk in byte_stream:
+        buffer += chunk
+        while True:
+            newline = buffer.find(b"\n")
+            if newline == -1:
+                break
+            line, buffer = buffer[:newline], buffer[newline + 1 :]
+            if skipping:  # Fin de la ligne trop longue, déjà signalée
+                skipping = False
+                continue
+            line_no += 1
+            if len(line) > max_line_bytes:
+                yield line_no, LineTooLong
+            elif line.strip():
+                yield line_no, line
+
+        if not skipping and len(buffer) > max_line_bytes:
+            line_no += 1
+            yield line_no, LineTooLong
+            buffer, skipping = b"", True
+        elif skipping:
+            buffer = b""
+
+    if buffer.strip() and not skipping:
+        yield line_no + 1, buffer
+
+
+async def iter_chunks(lines: AsyncIterator, size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[list]:
+    """Regroupe un itérateur asynchrone en listes de `size` éléments au plus."""
+    chunk = []
+    async for item in lines:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
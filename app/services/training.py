@@ -0,0 +1,276 @@
+import datetime
+import hashlib
+import itertools
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sqlalchemy import func, select
+
+from app.models.features import DEFAULT_FEATURES, FeatureBuilder
+from app.models.registry import ModelVersion
+from app.services.calibration import EmptyHistoryError, LabelledScores
+from database import EmployeeHistory
+
+# ==========================================
+# Configuration (variables d'environnement)
+# ==========================================
+
+# Processus de validation croisée (plafonnés au nombre de cœurs disponibles)
+TRAINING_MAX_WORKERS = int(os.getenv("TRAINING_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Lignes lues par paquet dans employees_history
+TRAINING_CHUNK_SIZE = int(os.getenv("TRAINING_CHUNK_SIZE", "10000"))
+TRAINING_CV_FOLDS = int(os.getenv("TRAINING_CV_FOLDS", "5"))
+# Rappel visé par le seuil de décision (priorité métier, cf. MODEL_CARD.md)
+TRAINING_TARGET_RECALL = float(os.getenv("TRAINING_TARGET_RECALL", "0.75"))
+TRAINING_SEED = int(os.getenv("TRAINING_SEED", "42"))
+
+# Hyperparamètres fixes de la forêt (MODEL_CARD.md) et grille explorée par-dessus
+BASE_PARAMS = {"n_estimators": 100, "max_depth": 10, "class_weight": "balanced"}
+PARAM_GRID = {"max_depth": [6, 10, None], "min_samples_leaf": [1, 5]}
+
+# Seuils évalués sur les probabilités hors-échantillon
+THRESHOLDS = np.round(np.arange(0.05, 0.951, 0.005), 3)
+
+
+# ==========================================
+# Lecture de l'historique (par paquets)
+# ==========================================
+
+
+def history_query(fields: list[str]):
+    columns = [getattr(EmployeeHistory, field) for field in fields]
+    return (
+        select(*columns, EmployeeHistory.target_churn)
+        .where(EmployeeHistory.target_churn.is_not(None))
+        .order_by(EmployeeHistory.id)
+    )
+
+
+def stream_history(bind, fields: list[str], chunk_size: int = TRAINING_CHUNK_SIZE):
+    """Paquets (features, cible) des employés étiquetés, via un curseur `yield_per`."""
+    with bind.connect() as conn:
+        result = conn.execution_options(yield_per=chunk_size).execute(history_query(fields))
+        for rows in result.partitions():
+            data = np.array(rows, dtype=np.float64)
+            yield data[:, :-1], data[:, -1]
+
+
+def load_history(
+    bind, fields: list[str], chunk_size: int = TRAINING_CHUNK_SIZE
+) -> tuple[np.ndarray, np.ndarray, int]:
+    """Matrice des features, cible et nombre de lignes écartées (features incomplètes).
+
+    Le nombre de lignes est compté d'abord : les paquets sont recopiés dans une matrice
+    allouée une seule fois, sans liste intermédiaire de lignes ni concaténation finale.
+    """
+    with bind.connect() as conn:
+        n_rows = conn.execute(
+            select(func.count()).select_from(history_query(fields).order_by(None).subquery())
+        ).scalar_one()
+    if not n_rows:
+        raise EmptyHistoryError(
+            "Aucun employé étiqueté dans employees_history (charger l'historique avec init_db.py)."
+        )
+
+    X = np.empty((n_rows, len(fields)), dtype=np.float64)
+    y = np.empty(n_rows, dtype=np.float64)
+    n = 0
+    for X_chunk, y_chunk in stream_history(bind, fields, chunk_size):
+        # Lignes ajoutées entre le comptage et la lecture : ignorées
+        size = min(len(X_chunk), n_rows - n)
+        X[n : n + size], y[n : n + size] = X_chunk[:size], y_chunk[:size]
+        n += size
+    X, y = X[:n], y[:n]
+
+    # Employés chargés avant l'ajout des colonnes du modèle : features incomplètes
+    complete = ~np.isnan(X).any(axis=1)
+    return X[complete], y[complete].astype(np.int64), int((~complete).sum())
+
+
+def data_fingerprint(X: np.ndarray, y: np.ndarray) -> str:
+    digest = hashlib.sha256(np.ascontiguousarray(X).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    return digest.hexdigest()[:12]
+
+
+# ==========================================
+# SMOTE + forêt, validation croisée sur un pool de processus
+# ==========================================
+
+
+def fit_forest(X, y, params: dict, seed: int, n_jobs: int = 1):
+    """SMOTE sur les données d'entraînement, puis forêt (BASE_PARAMS complétés de `params`)."""
+    from imblearn.over_sampling import SMOTE
+    from sklearn.ensemble import RandomForestClassifier
+
+    X_resampled, y_resampled = SMOTE(random_state=seed).fit_resample(X, y)
+    model = RandomForestClassifier(**(BASE_PARAMS | params), random_state=seed, n_jobs=n_jobs)
+    return model.fit(X_resampled, y_resampled)
+
+
+def expand_grid(grid: dict) -> list[dict]:
+    names = sorted(grid)
+    return [
+        dict(zip(names, values, strict=True))
+        for values in itertools.product(*(grid[n] for n in names))
+    ]
+
+
+# Données d'entraînement d'un processus du pool, transmises une fois à son démarrage
+_worker_data: dict[str, np.ndarray] = {}
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray):
+    _worker_data["X"], _worker_data["y"] = X, y
+
+
+def _fit_fold(params: dict, train: np.ndarray, test: np.ndarray, seed: int) -> np.ndarray:
+    """Probabilités hors-échantillon d'un pli (exécuté dans un processus du pool)."""
+    X, y = _worker_data["X"], _worker_data["y"]
+    model = fit_forest(X[train], y[train], params, seed)
+    return model.predict_proba(X[test])[:, 1]
+
+
+def pool_size(max_workers: int, n_tasks: int) -> int:
+    return max(1, min(max_workers, os.cpu_count() or 1, n_tasks))
+
+
+def cross_validate(
+    X: np.ndarray,
+    y: np.ndarray,
+    candidates: list[dict],
+    folds: int = TRAINING_CV_FOLDS,
+    seed: int = TRAINING_SEED,
+    max_workers: int = TRAINING_MAX_WORKERS,
+) -> tuple[np.ndarray, np.ndarray, int]:
+    """Probabilités hors-échantillon (candidats x lignes) et ROC-AUC (candidats x plis).
+
+    Chaque couple (candidat, pli) est une tâche indépendante et déterministe (graine
+    fixe, découpage stratifié fixe) : le résultat ne dépend pas du nombre de processus.
+    Les forêts tournent sur un seul cœur dans les processus (pas de sur-souscription).
+    """
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import StratifiedKFold
+
+    splits = list(StratifiedKFold(folds, shuffle=True, random_state=seed).split(X, y))
+    tasks = [(params, train, test, seed) for params in candidates for train, test in splits]
+    workers = pool_size(max_workers, len(tasks))
+
+    if workers == 1:
+        _init_worker(X, y)
+        results = [_fit_fold(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(X, y)) as pool:
+            results = list(pool.map(_fit_fold, *zip(*tasks, strict=True)))
+
+    oof = np.empty((len(candidates), len(y)), dtype=np.float64)
+    auc = np.empty((len(candidates), folds), dtype=np.float64)
+    for k, ((_, _, test, _), probas) in enumerate(zip(tasks, results, strict=True)):
+        i, j = divmod(k, folds)
+        oof[i, test] = probas
+        auc[i, j] = roc_auc_score(y[test], probas)
+    return oof, auc, workers
+
+
+def choose_threshold(probas: np.ndarray, y: np.ndarray, target_recall: float) -> dict:
+    """Seuil le plus haut atteignant le rappel visé (meilleur F1 si aucun ne l'atteint)."""
+    scores = LabelledScores(ModelVersion(None, 0.5, [], "oof", "training"), probas, y)
+    sweep = scores.sweep(THRESHOLDS)
+    reached = np.flatnonzero(sweep["recall"] >= target_recall)
+    i = int(reached[-1]) if len(reached) else int(np.argmax(sweep["f1"]))
+    return {name: float(values[i]) for name, values in sweep.items()}
+
+
+# ==========================================
+# Entraînement complet
+# ==========================================
+
+
+def peak_rss_mb() -> dict[str, float]:
+    """Pic de mémoire résidente du processus et du plus gros processus du pool (Linux : Ko)."""
+    return {
+        "parent": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "workers": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+def train(
+    bind,
+    features: list[str] = DEFAULT_FEATURES,
+    param_grid: dict = PARAM_GRID,
+    folds: int = TRAINING_CV_FOLDS,
+    target_recall: float = TRAINING_TARGET_RECALL,
+    seed: int = TRAINING_SEED,
+    max_workers: int = TRAINING_MAX_WORKERS,
+    chunk_size: int = TRAINING_CHUNK_SIZE,
+) -> tuple[dict, dict]:
+    """Réentraîne la forêt sur `employees_history` : package `{model, threshold, features}`
+    (format lu par ml_model.py) et rapport (durées, pic mémoire, métriques de validation).
+
+    Les hyperparamètres sont choisis sur la ROC-AUC moyenne des plis, le seuil sur les
+    probabilités hors-échantillon du meilleur candidat ; le modèle final est ensuite
+    entraîné sur tout l'historique.
+    """
+    import imblearn
+    import pandas as pd
+    import sklearn
+
+    started = time.perf_counter()
+    builder = FeatureBuilder(features)
+    X, y, skipped = load_history(bind, builder.fields, chunk_size)
+    loaded = time.perf_counter()
+
+    candidates = expand_grid(param_grid)
+    oof, auc, workers = cross_validate(X, y, candidates, folds, seed, max_workers)
+    best = int(np.argmax(auc.mean(axis=1)))
+    validation = choose_threshold(oof[best], y, target_recall)
+    validated = time.perf_counter()
+
+    # Noms de colonnes du CSV : `feature_names_in_` est vérifié au chargement du package
+    frame = pd.DataFrame(X, columns=builder.features)
+    model = fit_forest(frame, y, candidates[best], seed, n_jobs=workers)
+    finished = time.perf_counter()
+
+    package = {"model": model, "threshold": validation["threshold"], "features": builder.features}
+    report = {
+        "trained_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "rows": len(y),
+        "skipped": skipped,
+        "positives": int(y.sum()),
+        "data_sha256": data_fingerprint(X, y),
+        "features": builder.features,
+        "folds": folds,
+        "seed": seed,
+        "workers": workers,
+        "best_params": BASE_PARAMS | candidates[best],
+        "threshold": validation["threshold"],
+        "target_recall": target_recall,
+        "validation": {
+            "roc_auc": round(float(auc[best].mean()), 4),
+            "roc_auc_std": round(float(auc[best].std()), 4),
+            "recall": round(validation["recall"], 4),
+            "precision": round(validation["precision"], 4),
+            "f1": round(validation["f1"], 4),
+            "alert_rate": round(validation["alert_rate"], 4),
+        },
+        "candidates": [
+            {"params": params, "roc_auc": round(float(scores.mean()), 4)}
+            for params, scores in zip(candidates, auc, strict=True)
+        ],
+        "seconds": {
+            "load": round(loaded - started, 3),
+            "cross_validation": round(validated - loaded, 3),
+            "final_fit": round(finished - validated, 3),
+            "total": round(finished - started, 3),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "versions": {
+            "sklearn": sklearn.__version__,
+            "imblearn": imblearn.__version__,
+            "numpy": np.__version__,
+        },
+    }
+    return package, report
@@ -0,0 +1,110 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.models.features import DEFAULT_FEATURES, FeatureBuilder
+from app.schemas import InputData
+from app.services.columnar import (
+    JSON_CONTENT_TYPE,
+    MATRIX_CONTENT_TYPE,
+    decode_columns,
+    encode_matrix,
+    encode_response,
+    validate_columns,
+)
+
+# ==========================================
+# Décodage + validation et encodage de la réponse, hors inférence et BDD
+# ==========================================
+
+FIELDS = list(InputData.model_fields)
+EXAMPLE = InputData.model_config["json_schema_extra"]["example"]
+
+
+def make_rows(n: int, seed: int = 0) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    ages = rng.integers(18, 61, n).tolist()
+    ratios = rng.random(n).round(4).tolist()
+    return [
+        EXAMPLE | {"age": age, "ratio_surcharge_anciennete": r}
+        for age, r in zip(ages, ratios, strict=True)
+    ]
+
+
+def records_path(body: bytes, builder: FeatureBuilder, probas: np.ndarray) -> bytes:
+    """Chemin de /predict/batch : un InputData par ligne, résultats en liste de dicts."""
+    items = [InputData.model_validate(record) for record in json.loads(body)["records"]]
+    features = builder.build_matrix(items)
+    predictions = (probas >= 0.5).astype(int).tolist()
+    results = [
+        {"index": i, "prediction": pred, "probability": proba}
+        for i, (pred, proba) in enumerate(zip(predictions, probas.tolist(), strict=True))
+    ]
+    assert len(features) == len(results)
+    return json.dumps({"results": results}).encode()
+
+
+def columnar_path(body: bytes, content_type: str, builder: FeatureBuilder, probas: np.ndarray):
+    """Chemin de /predict/columnar : validation vectorisée, réponse colonnaire."""
+    features, valid, errors = validate_columns(decode_columns(body, content_type), builder.fields)
+    predictions = (probas >= 0.5).astype(int)
+    assert valid.all() and len(features) == len(predictions)
+    return encode_response(content_type, {}, predictions, probas, errors)
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coût de décodage/encodage par format de lot.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    builder = FeatureBuilder(DEFAULT_FEATURES)
+    rows = make_rows(args.rows)
+    probas = np.random.default_rng(1).random(args.rows)
+    matrix = np.array([[row[field] for field in FIELDS] for row in rows])
+
+    bodies = {
+        "records (JSON)": json.dumps({"records": rows}).encode(),
+        "colonnes (JSON)": json.dumps(
+            {field: [row[field] for row in rows] for field in FIELDS}
+        ).encode(),
+        "matrice float64": encode_matrix(matrix, FIELDS, "<f8"),
+        "matrice float32": encode_matrix(matrix, FIELDS, "<f4"),
+    }
+    runs = {
+        "records (JSON)": lambda: records_path(bodies["records (JSON)"], builder, probas),
+        "colonnes (JSON)": lambda: columnar_path(
+            bodies["colonnes (JSON)"], JSON_CONTENT_TYPE, builder, probas
+        ),
+        "matrice float64": lambda: columnar_path(
+            bodies["matrice float64"], MATRIX_CONTENT_TYPE, builder, probas
+        ),
+        "matrice float32": lambda: columnar_path(
+            bodies["matrice float32"], MATRIX_CONTENT_TYPE, builder, probas
+        ),
+    }
+
+    print(f"📦 {args.rows} lignes (meilleur de {args.repeat}) :")
+    reference = None
+    for name, run in runs.items():
+        seconds = timed(run, args.repeat)
+        reference = reference or seconds
+        print(
+            f"  {name:<16} {seconds * 1000:8.1f} ms  corps {len(bodies[name]) / 1e6:6.1f} Mo  "
+            f"x{reference / seconds:5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import json
+import pickle
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.models.forest import (
+    EARLY_EXIT_DELTA,
+    CompiledForest,
+    is_compilable,
+    load_parity_dataset,
+)
+from app.models.ml_model import DEFAULT_THRESHOLD, MODEL_PATH
+
+# ==========================================
+# Sortie anticipée vs forêt complète sur final_data_set.csv
+# ==========================================
+
+
+def load_forest(path: Path) -> tuple[CompiledForest, float, list[str]]:
+    with open(path, "rb") as f:
+        package = pickle.load(f)
+    model = package["model"] if isinstance(package, dict) else package
+    threshold = package.get("threshold", DEFAULT_THRESHOLD) if isinstance(package, dict) else 0.5
+    if not is_compilable(model):
+        raise SystemExit(f"❌ Modèle non compilable : {type(model).__name__}")
+    return CompiledForest.from_sklearn(model), threshold, list(model.feature_names_in_)
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def per_call_seconds(fn, batches: list[np.ndarray], repeat: int) -> float:
+    """Durée moyenne d'un appel, meilleure de `repeat` passes sur tous les lots."""
+    return timed(lambda: [fn(batch) for batch in batches], repeat) / len(batches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sortie anticipée de la forêt : gain et accord.")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="Package pickle")
+    parser.add_argument("--delta", type=float, default=EARLY_EXIT_DELTA)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64, 512, 1470])
+    parser.add_argument("--budgets", type=int, nargs="+", default=[0, 50, 30, 20, 10])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="Résultats JSON")
+    args = parser.parse_args()
+
+    forest, threshold, features = load_forest(args.model)
+    X = load_parity_dataset(features)
+    full = forest.predict_proba(X)[:, 1] >= threshold
+    print(f"🌲 {forest.n_trees} arbres, seuil {threshold}, delta {args.delta}, {len(X)} lignes")
+
+    results = {"n_trees": forest.n_trees, "threshold": threshold, "delta": args.delta}
+    results["budgets"] = []
+    print("\n📊 Accord des décisions avec la forêt complète :")
+    for budget in args.budgets:
+        probas, trees = forest.predict_proba_early_exit(X, threshold, args.delta, budget or None)
+        agreement = float(((probas >= threshold) == full).mean())
+        results["budgets"].append(
+            {"max_trees": budget or None, "agreement": agreement, "mean_trees": trees.mean()}
+        )
+        print(
+            f"  budget {budget or forest.n_trees:>4} arbres : accord {agreement:.2%}, "
+            f"{trees.mean():5.1f} arbres évalués en moyenne"
+        )
+
+    results["latency"] = []
+    print("\n⏱️ Durée par appel (forêt complète -> sortie anticipée) :")
+    for size in args.batch_sizes:
+        batches = [X[i : i + size] for i in range(0, len(X) - size + 1, size)][:200]
+        full_s = per_call_seconds(forest.predict_proba, batches, args.repeat)
+        early_s = per_call_seconds(
+            lambda batch: forest.predict_proba_early_exit(batch, threshold, args.delta),
+            batches,
+            args.repeat,
+        )
+        results["latency"].append(
+            {"batch_size": size, "full_ms": full_s * 1000, "early_exit_ms": early_s * 1000}
+        )
+        print(
+            f"  lot de {size:>5} : {full_s * 1000:8.3f} ms -> {early_s * 1000:8.3f} ms "
+            f"(x{full_s / early_s:4.2f})"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2, default=float))
+        print(f"💾 Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.models.features import FIELD_TO_COLUMN
+
+# ==========================================
+# Configuration
+# ==========================================
+BASE_DIR = Path(__file__).resolve().parent.parent
+CSV_PATH = BASE_DIR / "final_data_set.csv"
+
+MODES = ("single", "batch")
+TARGETS = ("inprocess", "uvicorn")
+LOG_MODES = ("sync", "write_behind")
+# Indicateurs comparés à la référence : (clé, sens favorable)
+COMPARED_METRICS = {
+    "p50_ms": "lower",
+    "p95_ms": "lower",
+    "p99_ms": "lower",
+    "throughput_rps": "higher",
+}
+
+
+# ==========================================
+# Charges de test
+# ==========================================
+
+
+def load_payloads(path: Path) -> list[dict]:
+    """Rejoue un fichier JSON Lines de payloads `/predict` (un employé par ligne)."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_payloads(n: int, seed: int = 0, csv_path: Path = CSV_PATH) -> list[dict]:
+    """Tire `n` profils réels de final_data_set.csv (avec remise), au format InputData."""
+    columns = {column: field for field, column in FIELD_TO_COLUMN.items()}
+    df = pd.read_csv(csv_path, sep=";", usecols=list(columns)).rename(columns=columns)
+    sample = df.sample(n=n, replace=True, random_state=seed)
+    return json.loads(sample.to_json(orient="records"))
+
+
+def build_requests(payloads: list[dict], mode: str, n_requests: int, batch_size: int):
+    """Liste des (url, corps, nombre de lignes) à envoyer, en bouclant sur les payloads."""
+    if mode == "single":
+        return [("/predict", payloads[i % len(payloads)], 1) for i in range(n_requests)]
+    requests = []
+    for i in range(n_requests):
+        start = (i * batch_size) % len(payloads)
+        records = [payloads[(start + j) % len(payloads)] for j in range(batch_size)]
+        requests.append(("/predict/batch", {"records": records}, batch_size))
+    return requests
+
+
+# ==========================================
+# Exécution
+# ==========================================
+
+
+async def replay(client, requests: list, concurrency: int) -> dict:
+    """Envoie les requêtes avec `concurrency` clients simultanés et mesure chaque latence."""
+    latencies: list[float] = []
+    errors = 0
+    pending = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        for url, body, _ in pending:
+            started = time.perf_counter()
+            response = await client.post(url, json=body)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed, errors, sum(rows for _, _, rows in requests))
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int, n_rows: int) -> dict:
+    latencies_ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if len(latencies) else (0, 0, 0)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "rows_per_second": n_rows / elapsed if elapsed else 0.0,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(latencies_ms.max(initial=0.0)),
+    }
+
+
+async def run_inprocess(scenarios: list, concurrency: int, warmup: int) -> dict:
+    """Application chargée dans ce processus, appelée via le transport ASGI de httpx."""
+    import httpx
+
+    import main
+
+    if main.current_model() is None:
+        raise SystemExit("❌ Modèle non chargé : le benchmark n'aurait aucun sens.")
+
+    results = {}
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, requests in scenarios:
+                await replay(client, requests[:warmup], concurrency)
+                results[name] = await replay(client, requests, concurrency)
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(scenarios: list, concurrency: int, warmup: int, workers: int) -> dict:
+    """Serveur uvicorn local démarré pour l'occasion (même environnement)."""
+    import httpx
+
+    port = free_port()
+    server = await asyncio.create_subprocess_exec(
+        *[sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+        *["--workers", str(workers), "--log-level", "warning"],
+        cwd=BASE_DIR,
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            deadline = time.monotonic() + 120
+            while True:
+                try:
+                    # Mesure à chaud uniquement : /ready passe à 200 après le lifespan
+                    response = await client.get("/ready")
+                    if response.status_code == 200:
+                        break
+                    if not response.json().get("model_loaded"):
+                        raise SystemExit("❌ Modèle non chargé par uvicorn.")
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline or server.returncode is not None:
+                    raise SystemExit("❌ uvicorn n'a pas démarré.")
+                await asyncio.sleep(0.2)
+
+            results = {}
+            for name, requests in scenarios:
+                await replay(client, requests[:warmup], concurrency)
+                results[name] = await replay(client, requests, concurrency)
+            return results
+    finally:
+        if server.returncode is None:
+            server.terminate()
+        await asyncio.wait_for(server.wait(), 30)
+
+
+# ==========================================
+# Comparaison avec une référence
+# ==========================================
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Renvoie les régressions (écart défavorable > `tolerance`) par scénario et indicateur."""
+    regressions = []
+    for scenario, current in results["results"].items():
+        reference = baseline.get("results", {}).get(scenario)
+        if reference is None:
+            continue
+        for metric, better in COMPARED_METRICS.items():
+            before, after = reference.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if (better == "lower" and change > tolerance) or (
+                better == "higher" and change < -tolerance
+            ):
+                regressions.append(
+                    f"{scenario} {metric} : {before:.2f} -> {after:.2f} ({change:+.1%})"
+                )
+    return regressions
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=False,
+        ).stdout.strip()
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'API par rejeu de requêtes.")
+    parser.add_argument("--payloads", type=Path, help="JSON Lines de payloads à rejouer")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=["inprocess"])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--log-mode", choices=LOG_MODES, default="sync")
+    parser.add_argument("--requests", type=int, default=500, help="Requêtes par scénario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=20, help="Requêtes d'échauffement")
+    parser.add_argument("--workers", type=int, default=1, help="Workers uvicorn")
+    parser.add_argument("-o", "--output", type=Path, default=Path("benchmark_results.json"))
+    parser.add_argument("--compare", type=Path, help="Résultats de référence (JSON)")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Écart toléré (0.10 = 10 %%)")
+    args = parser.parse_args()
+
+    # L'application lit sa configuration à l'import : à fixer avant de charger `main`
+    os.environ["PREDICTION_LOG_MODE"] = args.log_mode
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.mkdtemp()) / 'benchmark.db'}")
+
+    payloads = load_payloads(args.payloads) if args.payloads else synthetic_payloads(1000)
+    scenarios = [
+        (mode, build_requests(payloads, mode, args.requests, args.batch_size))
+        for mode in args.modes
+    ]
+
+    results = {}
+    for target in args.targets:
+        print(f"🚀 Cible {target} : {', '.join(args.modes)} (concurrence {args.concurrency})...")
+        if target == "inprocess":
+            runs = asyncio.run(run_inprocess(scenarios, args.concurrency, args.warmup))
+        else:
+            runs = asyncio.run(run_uvicorn(scenarios, args.concurrency, args.warmup, args.workers))
+        for mode, summary in runs.items():
+            name = f"{target}/{mode}/{args.log_mode}"
+            results[name] = summary
+            print(
+                f"  {name} : {summary['throughput_rps']:.0f} req/s, "
+                f"p50 {summary['p50_ms']:.2f} ms, p95 {summary['p95_ms']:.2f} ms, "
+                f"p99 {summary['p99_ms']:.2f} ms, erreurs {summary['errors']}"
+            )
+
+    report = {
+        "meta": {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "payloads": str(args.payloads) if args.payloads else "synthetic",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "batch_size": args.batch_size,
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"✅ Résultats écrits dans {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} régression(s) (tolérance {args.tolerance:.0%}) :")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"✅ Aucune régression par rapport à {args.compare}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.replay import git_commit
+
+# ==========================================
+# Configuration
+# ==========================================
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Budget de démarrage (import de main + lifespan) au-delà duquel le script échoue
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "2000"))
+# Modules qui ne doivent pas être chargés sur le chemin de service avec l'artefact compilé
+HEAVY_MODULES = ("pandas", "sklearn", "scipy", "sqlalchemy.ext.asyncio", "uvicorn")
+
+# Exécuté dans un interpréteur neuf : import de main, puis lifespan complet (schéma,
+# préchauffage), comme un worker uvicorn avant sa première requête
+PROBE = """
+import asyncio, json, sys, time
+
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+after_import = [m for m in HEAVY_MODULES if m in sys.modules]
+
+async def start():
+    async with main.app.router.lifespan_context(main.app):
+        return json.loads(main.ready().body)
+
+ready = asyncio.run(start())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "lifespan_ms": (time.perf_counter() - imported) * 1000,
+    "ready": ready,
+    "heavy_after_import": after_import,
+    "heavy_after_startup": [m for m in HEAVY_MODULES if m in sys.modules],
+}))
+"""
+
+
+# ==========================================
+# Mesure
+# ==========================================
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Lignes de `python -X importtime` : durée propre et cumulée (µs) de chaque module."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append(
+            {
+                "module": name.strip(),
+                "depth": depth,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        )
+    return modules
+
+
+def run_probe(env: dict) -> tuple[dict, list[dict]]:
+    """Un démarrage à froid dans un sous-processus, avec son profil d'import."""
+    code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\n{PROBE}"
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if process.returncode != 0:
+        raise SystemExit(f"❌ Démarrage en échec :\n{process.stderr[-2000:]}")
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    return result, parse_importtime(process.stderr)
+
+
+def main_import_profile(modules: list[dict], top: int) -> list[dict]:
+    """Imports directs de `main` (et de ses modules `app.*`), du plus coûteux au moins coûteux."""
+    main_depth = next(m["depth"] for m in modules if m["module"] == "main")
+    direct = [m for m in modules if m["depth"] == main_depth + 1]
+    return sorted(direct, key=lambda m: m["cumulative_ms"], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profil de démarrage à froid de l'API.")
+    parser.add_argument("--runs", type=int, default=5, help="Démarrages mesurés (médiane)")
+    parser.add_argument("--top", type=int, default=15, help="Imports affichés")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("-o", "--output", help="Résultats JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Base jetable : le bootstrap du schéma est mesuré sans toucher à demo.db
+        env = os.environ.copy() | {"DATABASE_URL": f"sqlite:///{tmp}/startup.db"}
+        runs = []
+        for i in range(args.runs):
+            result, modules = run_probe(env)
+            # Premier démarrage : tables créées ; les suivants trouvent le schéma existant
+            runs.append(result | {"startup_ms": result["import_ms"] + result["lifespan_ms"]})
+            print(
+                f"  démarrage {i + 1} : import {result['import_ms']:.0f} ms + lifespan "
+                f"{result['lifespan_ms']:.0f} ms ({result['ready']['status']})"
+            )
+
+    profile = main_import_profile(modules, args.top)
+    print("\n📦 Imports de main (cumulé, dernier démarrage) :")
+    for module in profile:
+        print(f"  {module['cumulative_ms']:8.1f} ms  {module['module']}")
+
+    summary = {
+        metric: statistics.median(run[metric] for run in runs)
+        for metric in ("import_ms", "lifespan_ms", "startup_ms")
+    }
+    last = runs[-1]
+    print(
+        f"\n⏱️ Démarrage médian : {summary['startup_ms']:.0f} ms "
+        f"(import {summary['import_ms']:.0f} ms, lifespan {summary['lifespan_ms']:.0f} ms), "
+        f"budget {args.budget_ms:.0f} ms."
+    )
+    print(f"ℹ️ Modules lourds chargés au démarrage : {last['heavy_after_startup'] or 'aucun'}")
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "ready": last["ready"],
+            "budget_ms": args.budget_ms,
+            "summary": summary,
+            "runs": runs,
+            "import_profile": profile,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"💾 Résultats écrits dans {args.output}")
+
+    failures = []
+    if summary["startup_ms"] > args.budget_ms:
+        failures.append(f"démarrage {summary['startup_ms']:.0f} ms > {args.budget_ms:.0f} ms")
+    if last["ready"]["status"] != "warm":
+        failures.append(f"worker toujours froid après le lifespan : {last['ready']}")
+    if failures:
+        raise SystemExit("❌ " + " ; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
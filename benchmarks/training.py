@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+from init_db import CSV_PATH, DATA_COLUMNS, init_database
+
+# ==========================================
+# Configuration
+# ==========================================
+BASE_DIR = Path(__file__).resolve().parent.parent
+# Décalage des identifiants des copies de l'historique
+ID_STRIDE = 1_000_000
+
+
+def grow_history(url: str, copies: int):
+    """Historique multiplié par `copies` : lignes dupliquées, ratio légèrement décalé."""
+    columns = [column for column in DATA_COLUMNS if column != "ratio_surcharge_anciennete"]
+    names = ", ".join(columns)
+    with create_engine(url).begin() as conn:
+        for k in range(1, copies):
+            conn.execute(
+                text(
+                    f"INSERT INTO employees_history (id_employee, ratio_surcharge_anciennete, "
+                    f"{names}, updated_at) SELECT id_employee + :offset, "
+                    f"ratio_surcharge_anciennete * :scale, {names}, updated_at "
+                    f"FROM employees_history WHERE id_employee < :stride"
+                ),
+                {"offset": k * ID_STRIDE, "scale": 1 + 0.01 * k, "stride": ID_STRIDE},
+            )
+
+
+def run_training(url: str, workers: int, grid: str, report: Path) -> dict:
+    """Un entraînement dans un processus neuf (pic mémoire propre à la mesure)."""
+    subprocess.run(
+        [
+            sys.executable,
+            "train_model.py",
+            "-o",
+            str(report.with_suffix(".pkl")),
+            "--report",
+            str(report),
+            "--max-workers",
+            str(workers),
+            "--param-grid",
+            grid,
+        ],
+        cwd=BASE_DIR,
+        env=os.environ.copy() | {"DATABASE_URL": url},
+        capture_output=True,
+        check=True,
+    )
+    return json.loads(report.read_text().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Durée et mémoire du réentraînement.")
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--param-grid", default='{"max_depth": [6, 10]}')
+    parser.add_argument("-o", "--output", help="Résultats JSON")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for copies in args.copies:
+            url = f"sqlite:///{tmp}/history_{copies}.db"
+            init_database(CSV_PATH, mode="replace", bind=create_engine(url))
+            grow_history(url, copies)
+            for workers in sorted(set(args.workers)):
+                report = run_training(url, workers, args.param_grid, Path(tmp) / "runs.jsonl")
+                results.append(
+                    {
+                        "rows": report["rows"],
+                        "requested_workers": workers,
+                        "workers": report["workers"],
+                        "seconds": report["seconds"],
+                        "peak_rss_mb": report["peak_rss_mb"],
+                        "roc_auc": report["validation"]["roc_auc"],
+                    }
+                )
+
+    print("\n📊 Réentraînement :")
+    print(f"  {'lignes':>8} {'proc.':>5} {'total':>8} {'lecture':>8} {'CV':>8} {'final':>8} Mo")
+    for r in results:
+        s, rss = r["seconds"], r["peak_rss_mb"]
+        print(
+            f"  {r['rows']:>8} {r['workers']:>5} {s['total']:>7.1f}s {s['load']:>7.2f}s "
+            f"{s['cross_validation']:>7.1f}s {s['final_fit']:>7.1f}s "
+            f"{rss['parent']:.0f} (+{rss['workers']:.0f}/processus)"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"💾 Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
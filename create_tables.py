@@ -1,5 +1,7 @@
-from database import Base, engine
+from database import init_schema
 
-# Cette commande génère le SQL "CREATE TABLE" pour tous les modèles définis
-Base.metadata.create_all(bind=engine)
+# Étape explicite de déploiement : génère le SQL "CREATE TABLE" pour tous les modèles
+# définis et migre les tables existantes (l'API peut alors démarrer avec
+# DB_SCHEMA_BOOTSTRAP=0, sans DDL au démarrage de chaque worker)
+init_schema()
 print("✅ Tables créées avec succès dans PostgreSQL !")
@@ -1,6 +1,19 @@
 import os
 import datetime
-from sqlalchemy import create_engine, Column, Integer, Float, DateTime, JSON
+from sqlalchemy import (
+    create_engine,
+    Column,
+    Integer,
+    Float,
+    Date,
+    Index,
+    DateTime,
+    JSON,
+    String,
+    UniqueConstraint,
+    inspect,
+    text,
+)
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 
@@ -28,17 +41,56 @@ else:
     print("✅ Connexion BDD détectée.")
     connect_args = {}
 
-# Création du moteur
-if "sqlite" in SQLALCHEMY_DATABASE_URL:
-    # Configuration spécifique SQLite
-    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-else:
+# Pool de connexions (PostgreSQL) : à dimensionner sur la concurrence attendue par worker
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Moteur asynchrone (aiosqlite / asyncpg), utilisé par SERVING_MODE=async
+ASYNC_DB_ENABLED = os.getenv("SERVING_MODE", "sync") == "async"
+
+# Pilotes asynchrones substitués aux pilotes synchrones de DATABASE_URL
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def pool_options(url: str) -> dict:
+    """Options de pool communes aux moteurs synchrone et asynchrone."""
+    if url.startswith("sqlite"):
+        # Configuration spécifique SQLite
+        return {"connect_args": {"check_same_thread": False}}
     # Configuration standard PostgreSQL
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def async_database_url(url: str) -> str:
+    """Convertit DATABASE_URL vers son pilote asynchrone (ex. postgresql+psycopg2 -> asyncpg)."""
+    backend, _, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(backend.split('+')[0], backend)}://{rest}"
+
+
+# Création du moteur
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **pool_options(SQLALCHEMY_DATABASE_URL))
 
 # Création de la session (l'usine à transactions)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Moteur et sessions asynchrones (dépendances optionnelles : `pip install .[async]`)
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DB_ENABLED:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_url = async_database_url(SQLALCHEMY_DATABASE_URL)
+    async_engine = create_async_engine(async_url, **pool_options(async_url))
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
 # La classe de base pour tous nos modèles (tables)
 Base = declarative_base()
 
@@ -55,6 +107,8 @@ class EmployeeHistory(Base):
     __tablename__ = "employees_history"
 
     id = Column(Integer, primary_key=True, index=True)
+    # Identifiant métier (colonne `id_employee` du CSV) : clé des upserts incrémentaux
+    id_employee = Column(Integer, unique=True, index=True)
     ratio_surcharge_anciennete = Column(Float)
     nombre_participation_pee = Column(Integer)
     departement_consulting = Column(Float)
@@ -67,6 +121,16 @@ class EmployeeHistory(Base):
     satisfaction_employee_nature_travail = Column(Integer)
     target_churn = Column(Integer, nullable=True)
 
+    # Features du modèle absentes du schéma initial : permettent de scorer l'historique
+    statut_marital_divorce = Column(Float)
+    frequence_deplacement_frequent = Column(Float)
+    poste_representant_commercial = Column(Float)
+    niveau_education = Column(Integer)
+    domaine_etude_marketing = Column(Float)
+
+    # Date de dernière modification réelle de la ligne (mise à jour par les upserts)
+    updated_at = Column(DateTime, default=datetime.datetime.now, index=True)
+
 
 class PredictionLog(Base):
     """
@@ -74,12 +138,75 @@ class PredictionLog(Base):
     """
 
     __tablename__ = "prediction_logs"
+    # Ordre de pagination de /logs (pagination par clé sur (timestamp, id))
+    __table_args__ = (Index("ix_prediction_logs_timestamp_id", "timestamp", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=datetime.datetime.now)
-    inputs = Column(JSON)
+    # Identifiant généré côté API (UUID) : connu avant l'écriture, sans relecture en BDD
+    request_id = Column(String(36), unique=True, index=True)
+    timestamp = Column(DateTime, default=datetime.datetime.now, index=True)
+
+    # Features d'entrée, une colonne typée par champ de `InputData`
+    ratio_surcharge_anciennete = Column(Float)
+    nombre_participation_pee = Column(Integer)
+    statut_marital_divorce = Column(Float)
+    age = Column(Integer)
+    annees_dans_l_entreprise = Column(Integer)
+    frequence_deplacement_frequent = Column(Float)
+    poste_representant_commercial = Column(Float)
+    niveau_education = Column(Integer)
+    domaine_etude_marketing = Column(Float)
+    poste_consultant = Column(Float)
+
+    # Ancien stockage des features (JSON) : vidé par `manage_logs.py backfill`
+    inputs = Column(JSON(none_as_null=True), nullable=True)
     prediction = Column(Integer)
     probability = Column(Float)
+    # Version du modèle qui a produit la prédiction (voir ModelRegistry)
+    model_version = Column(String(64), index=True)
+
+
+class PredictionLogDaily(Base):
+    """
+    Agrégats journaliers des prédictions compactées (voir `manage_logs.py compact`).
+    """
+
+    __tablename__ = "prediction_logs_daily"
+    __table_args__ = (UniqueConstraint("day", "model_version", name="uq_prediction_logs_daily"),)
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False, index=True)
+    model_version = Column(String(64))
+    n_predictions = Column(Integer, nullable=False)
+    n_churn = Column(Integer, nullable=False)
+    # Probabilités renseignées (les modèles sans predict_proba n'en produisent pas)
+    n_probability = Column(Integer, nullable=False)
+    probability_sum = Column(Float)
+    probability_min = Column(Float)
+    probability_max = Column(Float)
+    # Moyenne de chaque feature sur la journée (champ `InputData` -> moyenne)
+    feature_means = Column(JSON)
+
+
+class EmployeeScore(Base):
+    """
+    Scores précalculés de la population (`employees_history`), par version du modèle.
+    """
+
+    __tablename__ = "employee_scores"
+    __table_args__ = (
+        UniqueConstraint("id_employee", "model_version", name="uq_employee_scores_version"),
+        # Classement top-k : parcours de l'index par probabilité décroissante
+        Index("ix_employee_scores_version_probability", "model_version", "probability"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    id_employee = Column(Integer, nullable=False, index=True)
+    model_version = Column(String(64), nullable=False)
+    probability = Column(Float, nullable=False)
+    scored_at = Column(DateTime, default=datetime.datetime.now)
+    # `employees_history.updated_at` au moment du scoring : détecte les lignes modifiées
+    source_updated_at = Column(DateTime)
 
 
 # ==========================================
@@ -96,6 +223,51 @@ def get_db():
         db.close()
 
 
-# IMPORTANT : Création automatique des tables si elles n'existent pas
-# Cela garantit que la base SQLite locale est prête à l'emploi
-Base.metadata.create_all(bind=engine)
+async def get_async_db():
+    """Recupère une session BDD asynchrone (SERVING_MODE=async)."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def migrate_schema(bind=engine):
+    """Ajoute aux tables existantes les colonnes et index que `create_all` ne crée pas.
+
+    `create_all` ne modifie jamais une table déjà présente : les colonnes déclarées
+    depuis le déploiement initial sont ajoutées ici (nullable, sans valeur par défaut),
+    puis les index manquants sont créés. L'opération est idempotente.
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue  # Table absente : créée entièrement par create_all
+
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(
+                    text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}')
+                )
+                print(f"✅ Migration : colonne {table.name}.{column.name} ajoutée.")
+
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+def schema_ready(bind=engine) -> bool:
+    """Toutes les tables déclarées existent (schéma déployé par `create_tables.py`)."""
+    return set(Base.metadata.tables) <= set(inspect(bind).get_table_names())
+
+
+def init_schema(bind=engine):
+    """Crée les tables manquantes puis migre les tables existantes (idempotent).
+
+    Étape explicite, jamais exécutée à l'import : par `create_tables.py` (déploiement)
+    ou une seule fois au démarrage de l'API (`DB_SCHEMA_BOOTSTRAP=1`, défaut).
+    """
+    Base.metadata.create_all(bind=bind)
+    migrate_schema(bind)
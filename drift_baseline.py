@@ -0,0 +1,44 @@
+import argparse
+from pathlib import Path
+
+from app.models.ml_model import active_version, feature_builder
+from app.services.drift import (
+    DRIFT_BASELINE_PATH,
+    build_baseline,
+    save_baseline,
+    training_matrix_from_csv,
+    training_matrix_from_db,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calcul de la référence du suivi de dérive.")
+    parser.add_argument(
+        "--source",
+        choices=["csv", "db"],
+        default="csv",
+        help="final_data_set.csv ou table employees_history",
+    )
+    parser.add_argument("-o", "--output", type=Path, default=DRIFT_BASELINE_PATH)
+    args = parser.parse_args()
+
+    features = feature_builder.features
+    if args.source == "db":
+        from database import engine
+
+        X = training_matrix_from_db(features, engine)
+    else:
+        X = training_matrix_from_csv(features)
+
+    model = active_version.model if active_version else None
+    if model is None:
+        print("⚠️ Modèle non chargé : référence sans distribution des probabilités.")
+
+    print(f"📊 Calcul de la référence sur {len(X)} employés ({args.source})...")
+    version = active_version.version if active_version else None
+    save_baseline(build_baseline(X, features, model, version), args.output)
+    print(f"✅ Référence écrite dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
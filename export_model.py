@@ -0,0 +1,68 @@
+import argparse
+import pickle
+import time
+import warnings
+from pathlib import Path
+
+from app.models.artifact import export_artifact, load_artifact, sha256_file
+from app.models.forest import CompiledForest, check_parity, is_compilable, load_parity_dataset
+
+# ==========================================
+# Configuration
+# ==========================================
+BASE_DIR = Path(__file__).resolve().parent
+MODEL_PATH = BASE_DIR / "model" / "modele_churn_light.pkl"
+ARTIFACT_DIR = BASE_DIR / "model" / "artifact"
+
+# Le contrôle de parité passe des tableaux NumPy (colonnes déjà dans l'ordre du modèle)
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def export_model(model_path: Path, output: Path, version: str | None = None) -> dict:
+    """Convertit le package pickle (modèle, seuil, features) en artefact mappable."""
+    with open(model_path, "rb") as f:
+        model_package = pickle.load(f)
+
+    if isinstance(model_package, dict) and "model" in model_package:
+        model = model_package["model"]
+        threshold = model_package.get("threshold", 0.235)
+        features = list(model_package.get("features", []))
+    else:
+        model, threshold, features = model_package, 0.235, []
+
+    if not is_compilable(model):
+        raise TypeError(f"Modèle non compilable : {type(model).__name__}")
+    features = list(getattr(model, "feature_names_in_", features))
+
+    forest = CompiledForest.from_sklearn(model)
+    # Version par défaut : empreinte du pickle source (stable d'un export à l'autre)
+    version = version or sha256_file(model_path)[:12]
+    manifest = export_artifact(forest, output, threshold, features, version)
+
+    # Contrôle : l'artefact relu doit reproduire les probabilités de sklearn
+    exported, _ = load_artifact(output)
+    check_parity(exported, model, load_parity_dataset(features))
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export du modèle en artefact mappé en mémoire.")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="Package pickle source")
+    parser.add_argument("-o", "--output", type=Path, default=ARTIFACT_DIR, help="Répertoire cible")
+    parser.add_argument("--version", default=None, help="Version (défaut : empreinte du pickle)")
+    args = parser.parse_args()
+
+    print(f"📦 Export de {args.model} vers {args.output}...")
+    manifest = export_model(args.model, args.output, args.version)
+
+    started = time.perf_counter()
+    load_artifact(args.output)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(
+        f"✅ Artefact {manifest['model_version']} écrit "
+        f"({manifest['arrays']['value']['shape'][0]} nœuds), rechargé en {elapsed_ms:.1f} ms."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,96 +1,188 @@
+import argparse
+import csv
+import datetime
+import io
+import time
+
+import numpy as np
 import pandas as pd
-from database import SessionLocal, engine, Base, EmployeeHistory
+from sqlalchemy import Float, Integer, delete, insert, or_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import EmployeeHistory, engine, init_schema
 
 # ==========================================
 # Configuration
 # ==========================================
 CSV_PATH = "final_data_set.csv"
+CHUNK_SIZE = 50_000
 
+# Colonne du CSV -> colonne de la table employees_history
+CSV_TO_TABLE = {
+    "id_employee": "id_employee",
+    "ratio_surcharge_anciennete": "ratio_surcharge_anciennete",
+    "nombre_participation_pee": "nombre_participation_pee",
+    "departement_Consulting": "departement_consulting",
+    "age": "age",
+    "poste_Consultant": "poste_consultant",
+    "tension_salaire": "tension_salaire",
+    "statut_marital_Marié(e)": "statut_marital_marie",
+    "annees_dans_l_entreprise": "annees_dans_l_entreprise",
+    "satisfaction_globale_moyenne": "satisfaction_globale_moyenne",
+    "satisfaction_employee_nature_travail": "satisfaction_employee_nature_travail",
+    "a_quitte_l_entreprise": "target_churn",
+    "statut_marital_Divorcé(e)": "statut_marital_divorce",
+    "frequence_deplacement_Frequent": "frequence_deplacement_frequent",
+    "poste_Représentant Commercial": "poste_representant_commercial",
+    "niveau_education": "niveau_education",
+    "domaine_etude_Marketing": "domaine_etude_marketing",
+}
 
-def init_database():
-    # 1. Création des tables
-    Base.metadata.create_all(bind=engine)
+TABLE = EmployeeHistory.__table__
+DATA_COLUMNS = [column for column in CSV_TO_TABLE.values() if column != "id_employee"]
 
-    # 2. Chargement du CSV
-    print(f"📂 Lecture du fichier {CSV_PATH}...")
-    try:
-        df = pd.read_csv(CSV_PATH)
-        print(f"✅ Fichier chargé : {len(df)} lignes trouvées.")
-    except FileNotFoundError:
-        print(f"❌ Erreur : Le fichier {CSV_PATH} est introuvable.")
-        return
-
-    # 3. Nettoyage et Mapping des colonnes
-    rename_mapping = {
-        "statut_marital_Marié(e)": "statut_marital_marie",
-        "departement_Consulting": "departement_consulting",
-        "poste_Consultant": "poste_consultant",
-        "a_quitte_l_entreprise_num": "target_churn",
-    }
-    df = df.rename(columns=rename_mapping)
-
-    # 4. Vérification des colonnes manquantes
-    expected_columns = [
-        "ratio_surcharge_anciennete",
-        "nombre_participation_pee",
-        "departement_consulting",
-        "age",
-        "poste_consultant",
-        "tension_salaire",
-        "statut_marital_marie",
-        "annees_dans_l_entreprise",
-        "satisfaction_globale_moyenne",
-        "satisfaction_employee_nature_travail",
-        "target_churn",
-    ]
-
-    for col in expected_columns:
-        if col not in df.columns:
-            print(f"⚠️ Attention : La colonne '{col}' est absente. Remplacement par 0.")
-            df[col] = 0
-
-    # 5. Remplacer les NaN par 0 (pour éviter les erreurs de conversion int)
-    df = df.fillna(0)
-
-    # 6. Insertion en base de données
-    session = SessionLocal()
-    try:
-        # On vide la table avant de remplir (Optionnel)
-        session.query(EmployeeHistory).delete()
-
-        print("💾 Insertion des données en cours...")
-
-        data_to_insert = []
-        for _, row in df.iterrows():
-            # 🚨 C'est ICI que la magie opère :
-            # On utilise float() et int() pour convertir les types numpy en types Python purs
-            employee = EmployeeHistory(
-                ratio_surcharge_anciennete=float(row["ratio_surcharge_anciennete"]),
-                nombre_participation_pee=int(row["nombre_participation_pee"]),
-                departement_consulting=float(row["departement_consulting"]),
-                age=int(row["age"]),
-                poste_consultant=float(row["poste_consultant"]),
-                tension_salaire=float(row["tension_salaire"]),
-                statut_marital_marie=float(row["statut_marital_marie"]),
-                annees_dans_l_entreprise=int(row["annees_dans_l_entreprise"]),
-                satisfaction_globale_moyenne=float(row["satisfaction_globale_moyenne"]),
-                satisfaction_employee_nature_travail=int(
-                    row["satisfaction_employee_nature_travail"]
-                ),
-                target_churn=int(row["target_churn"]),
+
+def convert_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Renomme et convertit un paquet colonne par colonne (types de la table)."""
+    chunk = chunk.rename(columns=CSV_TO_TABLE)
+
+    for column in CSV_TO_TABLE.values():
+        if column not in chunk.columns:
+            print(f"⚠️ Attention : La colonne '{column}' est absente. Remplacement par 0.")
+            chunk[column] = 0
+
+        column_type = TABLE.c[column].type
+        values = pd.to_numeric(chunk[column], errors="coerce").fillna(0)
+        if isinstance(column_type, Integer):
+            chunk[column] = values.astype(np.int64)
+        elif isinstance(column_type, Float):
+            chunk[column] = values.astype(np.float64)
+
+    chunk = chunk[list(CSV_TO_TABLE.values())].copy()
+    chunk["updated_at"] = datetime.datetime.now()
+    return chunk
+
+
+def read_chunks(csv_path: str, chunk_size: int):
+    """Lit le CSV (séparateur ';') par paquets, en ne gardant que les colonnes utiles.
+
+    L'en-tête est lu immédiatement : un fichier absent est signalé avant toute écriture.
+    """
+    header = pd.read_csv(csv_path, sep=";", nrows=0).columns
+    usecols = [column for column in CSV_TO_TABLE if column in header]
+    reader = pd.read_csv(csv_path, sep=";", usecols=usecols, chunksize=chunk_size)
+    return (convert_chunk(chunk) for chunk in reader)
+
+
+# ==========================================
+# Stratégies d'insertion
+# ==========================================
+
+
+def upsert_statement(dialect_insert):
+    """INSERT ... ON CONFLICT (id_employee) DO UPDATE, seulement si la ligne a changé.
+
+    La condition `IS DISTINCT FROM` évite de réécrire (et de marquer `updated_at`) les
+    employés inchangés : seul le delta est rescoré par la suite.
+    """
+    stmt = dialect_insert(TABLE)
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=["id_employee"],
+        set_={column: excluded[column] for column in [*DATA_COLUMNS, "updated_at"]},
+        where=or_(*[TABLE.c[column].is_distinct_from(excluded[column]) for column in DATA_COLUMNS]),
+    )
+
+
+def load_executemany(conn, chunk: pd.DataFrame, upsert: bool):
+    """Insertion Core en executemany (SQLite et repli générique)."""
+    rows = chunk.astype(object).to_dict("records")
+    if not upsert:
+        conn.execute(insert(TABLE), rows)
+    elif conn.dialect.name == "sqlite":
+        conn.execute(upsert_statement(sqlite.insert), rows)
+    else:
+        conn.execute(upsert_statement(postgresql.insert), rows)
+
+
+def load_copy(conn, chunk: pd.DataFrame, upsert: bool):
+    """PostgreSQL : COPY dans une table temporaire, puis INSERT ... SELECT (upsert)."""
+    buffer = io.StringIO()
+    chunk.to_csv(buffer, index=False, header=False, quoting=csv.QUOTE_MINIMAL)
+    buffer.seek(0)
+
+    columns = ", ".join(f'"{column}"' for column in chunk.columns)
+    raw = conn.connection.driver_connection
+    with raw.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS employees_history_stage "
+            "(LIKE employees_history INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        cursor.copy_expert(
+            f"COPY employees_history_stage ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+        conflict = ""
+        if upsert:
+            updates = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in [*DATA_COLUMNS, "updated_at"])
+            changed = " OR ".join(
+                f'employees_history."{c}" IS DISTINCT FROM EXCLUDED."{c}"' for c in DATA_COLUMNS
             )
-            data_to_insert.append(employee)
+            conflict = f"ON CONFLICT (id_employee) DO UPDATE SET {updates} WHERE {changed}"
+        cursor.execute(
+            f"INSERT INTO employees_history ({columns}) "
+            f"SELECT {columns} FROM employees_history_stage {conflict}"
+        )
+
 
-        session.add_all(data_to_insert)
-        session.commit()
-        print(f"✅ Succès ! {len(data_to_insert)} employés ont été insérés dans PostgreSQL.")
+def init_database(
+    csv_path: str = CSV_PATH, mode: str = "upsert", chunk_size: int = CHUNK_SIZE, bind=engine
+) -> int:
+    """Charge le CSV dans employees_history.
+
+    `mode="upsert"` (défaut) met à jour les employés existants par `id_employee` et
+    insère les nouveaux ; `mode="replace"` vide la table avant rechargement. Chaque
+    paquet est converti colonne par colonne puis inséré en une seule opération
+    (COPY sous PostgreSQL, executemany sinon), dans une transaction par paquet.
+    """
+    # 1. Création / mise à niveau des tables
+    init_schema(bind)
+
+    use_copy = bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2"
+    loader = load_copy if use_copy else load_executemany
+    upsert = mode == "upsert"
+
+    print(f"📂 Lecture du fichier {csv_path} (mode {mode}, paquets de {chunk_size})...")
+    started = time.perf_counter()
+    n_rows = 0
+
+    try:
+        chunks = read_chunks(csv_path, chunk_size)
+        if not upsert:
+            with bind.begin() as conn:
+                conn.execute(delete(TABLE))
+
+        for chunk in chunks:
+            with bind.begin() as conn:
+                loader(conn, chunk, upsert)
+            n_rows += len(chunk)
+            print(f"💾 {n_rows} lignes chargées...")
+
+    except FileNotFoundError:
+        print(f"❌ Erreur : Le fichier {csv_path} est introuvable.")
+        return 0
 
-    except Exception as e:
-        session.rollback()
-        print(f"❌ Erreur lors de l'insertion : {e}")
-    finally:
-        session.close()
+    elapsed = time.perf_counter() - started
+    print(
+        f"✅ Succès ! {n_rows} employés chargés en {elapsed:.2f} s "
+        f"({n_rows / max(elapsed, 1e-9):.0f} lignes/s, {'COPY' if use_copy else 'executemany'})."
+    )
+    return n_rows
 
 
 if __name__ == "__main__":
-    init_database()
+    parser = argparse.ArgumentParser(description="Chargement de employees_history.")
+    parser.add_argument("csv_path", nargs="?", default=CSV_PATH)
+    parser.add_argument("--mode", choices=("upsert", "replace"), default="upsert")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    init_database(args.csv_path, args.mode, args.chunk_size)
@@ -1,19 +1,151 @@
-import uvicorn
-import pandas as pd
+import time
+
+# Début de l'import : référence de la durée de démarrage exposée par /ready
+IMPORT_STARTED = time.perf_counter()
+
+import os
+import json
+import uuid
+import hmac
+import anyio
+import numpy as np
 import datetime
-from fastapi import FastAPI, HTTPException, Depends
-from pydantic import BaseModel, Field, ConfigDict
+import functools
+from typing import TYPE_CHECKING, Any
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from contextlib import asynccontextmanager
 
-from database import SessionLocal, PredictionLog, Base, engine
+from database import (
+    ASYNC_DB_ENABLED,
+    PredictionLog,
+    SessionLocal,
+    async_engine,
+    engine,
+    get_async_db,
+    init_schema,
+    schema_ready,
+)
+from app.schemas import BatchInput, InputData, ThresholdUpdate
+from app.models.ml_model import (
+    DEFAULT_THRESHOLD,
+    MODEL_ARTIFACT_DIR,
+    MODEL_PATH,
+    active_version,
+    feature_builder,
+    load_model_version,
+)
+from app.models.forest import CompiledForest, explainable_forest
+from app.models.registry import (
+    InferenceError,
+    ModelLoadError,
+    ModelRegistry,
+    ModelVersion,
+    ReloadInProgress,
+)
+from app.services.admission import (
+    ADMISSION_RETRY_AFTER,
+    AdmissionController,
+    AdmissionMiddleware,
+    DegradedMode,
+)
+from app.services.batcher import MICROBATCH_ENABLED, MicroBatcher
+from app.services.cache import FeatureKeyNormalizer, PredictionCache
+from app.services.columnar import (
+    COLUMNAR_CHUNK_ROWS,
+    COLUMNAR_CONTENT_TYPES,
+    COLUMNAR_MAX_ROWS,
+    ColumnarPayloadError,
+    ColumnarTooLargeError,
+    INTEGER_FIELDS,
+    decode_columns,
+    encode_response,
+    validate_columns,
+)
+from app.services.calibration import EmptyHistoryError, ThresholdCalibrator
+from app.services.drift import create_drift_monitor
+from app.services.executor import InferenceExecutor
+from app.services.log_queries import (
+    EXPORT_FORMATS,
+    LOGS_MAX_PAGE_SIZE,
+    InvalidCursor,
+    fetch_page,
+    iter_export,
+    log_query,
+)
+from app.services.log_storage import ensure_partitions
+from app.services.metrics import metrics
+from app.services.population import (
+    POPULATION_MAX_TOP_K,
+    has_scores,
+    score_population,
+    top_k_query,
+)
+from app.services.prediction_logger import PREDICTION_LOG_MODE, PredictionLogWriter
+from app.services.streaming import LineTooLong, iter_chunks, iter_ndjson_lines
+
+if TYPE_CHECKING:
+    # Import différé : la pile asynchrone de SQLAlchemy n'est chargée qu'avec SERVING_MODE=async
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# Jeton exigé par les routes d'administration (en-tête X-Admin-Token) ; vide : routes fermées
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Création / migration du schéma au démarrage (une fois par worker). À désactiver (0)
+# quand le schéma est déployé par l'étape explicite `create_tables.py`
+DB_SCHEMA_BOOTSTRAP = os.getenv("DB_SCHEMA_BOOTSTRAP", "1") == "1"
+
+# Nombre maximal d'employés acceptés par un appel à /predict/batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "5000"))
+
+# Sortie anticipée de la forêt (`early_exit=true` ou `max_trees`) : risque d'erreur toléré
+# par décision, et budget d'arbres appliqué quand la requête n'en fixe pas (0 : aucun)
+EARLY_EXIT_DELTA = float(os.getenv("EARLY_EXIT_DELTA", "0.05"))
+EARLY_EXIT_MAX_TREES = int(os.getenv("EARLY_EXIT_MAX_TREES", "0"))
+TREE_BUCKETS = (5, 10, 20, 30, 40, 50, 75, 100, 200, 500)
+
+# Taille du threadpool des routes synchrones (0 : valeur par défaut d'AnyIO, 40 threads).
+# À aligner sur DB_POOL_SIZE + DB_MAX_OVERFLOW pour ne pas attendre une connexion libre.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "0"))
+
+# Journalisation "write-behind" (opt-in via PREDICTION_LOG_MODE=write_behind)
+log_writer = PredictionLogWriter(SessionLocal) if PREDICTION_LOG_MODE == "write_behind" else None
+
+# Cache des résultats d'inférence (profils rescorés par plusieurs tableaux de bord)
+prediction_cache = PredictionCache()
+cache_keys = FeatureKeyNormalizer(feature_builder)
+
+# Cache des explications (profils expliqués plusieurs fois par les RH)
+explanation_cache = PredictionCache()
+
+# Pool dédié à l'inférence des routes asynchrones (SERVING_MODE=async)
+inference_executor = InferenceExecutor()
+
+# Registre du modèle servi, rechargeable à chaud (/admin/model/reload ou MODEL_WATCH_INTERVAL)
+model_registry = ModelRegistry(load_model_version, active_version, feature_builder.features)
 
-try:
-    from app.models.ml_model import ml_model, churn_threshold
-except ImportError:
-    from app.models.ml_model import ml_model
+# Suivi incrémental de la dérive des entrées et des scores (/monitoring/drift), dont la
+# référence est construite au démarrage (lifespan) et non à l'import
+drift_monitor = create_drift_monitor(feature_builder.features)
 
-    churn_threshold = 0.5
+# Scores de l'historique étiqueté par version du modèle (/model/threshold/sweep)
+threshold_calibrator = ThresholdCalibrator()
+
+# Contrôle d'admission des routes /predict* et mode dégradé (logs sautés si BDD saturée)
+admission = AdmissionController()
+degraded_mode = DegradedMode()
+
+# Modèle imposé (tests, débogage) : s'il est défini, il remplace celui du registre
+ml_model = None
+
+# État de démarrage du worker, exposé par /ready (froid tant que le lifespan n'a pas fini)
+startup_state = {"schema_ready": False, "warmed_up": False, "startup_seconds": None}
 
 # ==========================================
 # 0. Lifespan Event (Création auto des tables)
@@ -26,15 +158,74 @@ async def lifespan(app: FastAPI):
     print("🚀 Démarrage de l'API...")
 
     try:
-        Base.metadata.create_all(bind=engine)
+        if DB_SCHEMA_BOOTSTRAP:
+            init_schema(engine)
+        # PostgreSQL partitionné : partitions des prochains mois créées à l'avance
+        ensure_partitions(engine)
+        startup_state["schema_ready"] = DB_SCHEMA_BOOTSTRAP or schema_ready(engine)
         print("✅ Tables de la base de données vérifiées/créées avec succès !")
-    except Exception as e:
+    except SQLAlchemyError as e:
         print(f"⚠️ Erreur lors de la création des tables : {e}")
 
+    if THREADPOOL_SIZE:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+    if ASYNC_DB_ENABLED:
+        inference_executor.start()
+        print(
+            f"✅ Service asynchrone activé ({inference_executor.max_workers} threads d'inférence)."
+        )
+
+    if log_writer is not None:
+        log_writer.start()
+        print("✅ Journalisation write-behind des prédictions activée.")
+
+    if micro_batcher is not None:
+        micro_batcher.start()
+        print("✅ Micro-batching des prédictions concurrentes activé.")
+
+    model_registry.watch([MODEL_PATH, MODEL_ARTIFACT_DIR / "manifest.json"])
+
+    if drift_monitor is not None:
+        await run_in_threadpool(drift_monitor.ensure, model_registry.active)
+
+    startup_state["warmed_up"] = warm_up(model_registry.active)
+    startup_state["startup_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 3)
+    metrics.gauge("startup_seconds", "Durée du démarrage (import à fin du lifespan).").set(
+        startup_state["startup_seconds"]
+    )
+    print(f"✅ Worker prêt en {startup_state['startup_seconds']} s.")
+
     yield
 
     print("🛑 Arrêt de l'API...")
 
+    model_registry.stop_watch()
+
+    if micro_batcher is not None:
+        micro_batcher.stop()
+
+    if log_writer is not None:
+        log_writer.stop()
+        print(f"✅ Logs de prédiction vidés : {log_writer.snapshot()}")
+
+    inference_executor.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+def warm_up(version: ModelVersion | None) -> bool:
+    """Premier appel au modèle hors requête : charge les pages de l'artefact mappé et
+    les chemins NumPy, pour que la première prédiction servie ne paie pas ce coût."""
+    if version is None:
+        return False
+    try:
+        version.model.predict_proba(np.zeros((1, feature_builder.n_features)))
+    except (AttributeError, TypeError, ValueError) as e:
+        print(f"⚠️ Préchauffage du modèle impossible : {e}")
+        return False
+    return True
+
 
 # ==========================================
 # 1. Configuration de l'API
@@ -44,12 +235,23 @@ description = """
 API de prédiction de churn (départ) des employés. 🚀
 """
 
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse dont la sérialisation est mesurée (étape "serialization")."""
+
+    def render(self, content) -> bytes:
+        with metrics.stage("serialization"):
+            return super().render(content)
+
+
 app = FastAPI(
     title="Projet 5 : API Churn Prediction",
     description=description,
     version="2.3.0",
     lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
 )
+app.add_middleware(AdmissionMiddleware, controller=admission)
 
 
 def get_db():
@@ -61,62 +263,412 @@ def get_db():
 
 
 # ==========================================
-# 2. Schéma de Données
+# 2. Inférence
 # ==========================================
 
 
-class InputData(BaseModel):
-    """Schéma des 10 caractéristiques correspondant EXACTEMENT au modèle."""
+def current_model() -> ModelVersion | None:
+    """Version du modèle à utiliser, lue UNE fois par requête puis passée aux étapes.
 
-    ratio_surcharge_anciennete: float = Field(..., json_schema_extra={"example": 0.14})
-    nombre_participation_pee: int = Field(..., json_schema_extra={"example": 0})
-    statut_marital_divorce: float = Field(
-        ...,
-        json_schema_extra={"example": 0.0},
-        description="1.0 si divorcé(e), 0.0 sinon",
-    )
-    age: int = Field(..., ge=18, le=100, json_schema_extra={"example": 41})
-    annees_dans_l_entreprise: int = Field(..., ge=0, json_schema_extra={"example": 2})
-    frequence_deplacement_frequent: float = Field(
-        ...,
-        json_schema_extra={"example": 0.0},
-        description="1.0 si déplacements fréquents, 0.0 sinon",
-    )
-    poste_representant_commercial: float = Field(
-        ...,
-        json_schema_extra={"example": 0.0},
-        description="1.0 si Représentant Commercial, 0.0 sinon",
+    Un rechargement pendant la requête n'a donc aucun effet sur elle : elle se termine
+    sur la version lue ici (modèle, seuil et numéro de version cohérents).
+    """
+    if ml_model is not None:
+        active = model_registry.active
+        threshold = active.threshold if active else DEFAULT_THRESHOLD
+        return ModelVersion(ml_model, threshold, feature_builder.features, "override", "override")
+    return model_registry.active
+
+
+def model_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=500, detail="Erreur interne : Le modèle n'a pas pu être chargé."
     )
-    niveau_education: int = Field(
-        ..., ge=1, le=5, json_schema_extra={"example": 3}, description="Niveau 1-5"
+
+
+def prediction_failed(e: InferenceError, route: str = "API") -> HTTPException:
+    print(f"❌ Erreur {route} : {e}")
+    return HTTPException(status_code=500, detail=f"Erreur lors de la prédiction : {e}")
+
+
+def inference_unavailable(e: TimeoutError, route: str = "API") -> HTTPException:
+    """503 + Retry-After : le micro-batcher n'a pas rendu la prédiction dans son délai."""
+    print(f"❌ Inférence saturée ({route}) : {type(e).__name__}")
+    return HTTPException(
+        status_code=503,
+        detail="Service d'inférence saturé, réessayez plus tard.",
+        headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
     )
-    domaine_etude_marketing: float = Field(
-        ...,
-        json_schema_extra={"example": 0.0},
-        description="1.0 si Marketing, 0.0 sinon",
+
+
+def database_unavailable(e: SQLAlchemyError, route: str = "API") -> HTTPException:
+    """503 + Retry-After : la BDD (pool saturé, panne) n'a pas pu enregistrer les logs."""
+    print(f"❌ BDD indisponible ({route}) : {e}")
+    return HTTPException(
+        status_code=503,
+        detail="Base de données indisponible, réessayez plus tard.",
+        headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
     )
-    poste_consultant: float = Field(
-        ...,
-        json_schema_extra={"example": 1.0},
-        description="1.0 si Consultant, 0.0 sinon",
+
+
+def run_model(features: np.ndarray, model: ModelVersion) -> tuple[list[int], list[float | None]]:
+    """Score toutes les lignes en UN SEUL appel au modèle et applique le seuil de churn."""
+    predictions, probas = predict_arrays(features, model)
+    if probas is None:
+        return predictions.tolist(), [None] * len(predictions)
+    return predictions.tolist(), probas.tolist()
+
+
+def predict_arrays(
+    features: np.ndarray, model: ModelVersion
+) -> tuple[np.ndarray, np.ndarray | None]:
+    """Prédictions et probabilités en tableaux NumPy (None : modèle sans predict_proba).
+
+    Toute erreur levée par le modèle (sklearn, forêt compilée, pickle tiers) devient une
+    InferenceError : les routes la distinguent ainsi des erreurs de BDD.
+    """
+    with metrics.stage("predict"):
+        try:
+            if hasattr(model.model, "predict_proba"):
+                probas = np.asarray(model.model.predict_proba(features), dtype=float)[:, 1]
+                return (probas >= model.threshold).astype(int), probas
+
+            return np.asarray(model.model.predict(features)).astype(int), None
+        except Exception as e:
+            raise InferenceError(f"{type(e).__name__}: {e}") from e
+
+
+def score_items(items: list[InputData], model: ModelVersion, early_exit=None):
+    """Score un lot validé : une seule matrice, une seule inférence.
+
+    Renvoie (prédictions, probabilités, arbres évalués ou None), cf. `score_request`.
+    """
+    with metrics.stage("features"):
+        features = feature_builder.build_matrix(items)
+    return score_request(features, model, early_exit)
+
+
+def make_log_records(
+    items: list[InputData], predictions, probas, model_version: str | None = None
+) -> list[dict]:
+    now = datetime.datetime.now()
+    return [
+        make_log_record(item.model_dump(), pred, proba, now, model_version)
+        for item, pred, proba in zip(items, predictions, probas, strict=True)
+    ]
+
+
+def score_and_log(items: list[InputData], db: Session, model: ModelVersion, early_exit=None):
+    """Score un lot validé et le journalise."""
+    predictions, probas, trees = score_items(items, model, early_exit)
+    records = make_log_records(items, predictions, probas, model.version)
+    return predictions, probas, trees, log_predictions(db, records)
+
+
+def score_ndjson_chunk(chunk: list[tuple[int, bytes]], db: Session, model: ModelVersion) -> bytes:
+    """Valide et score un paquet de lignes NDJSON ; renvoie les lignes de résultat.
+
+    Les lignes invalides (JSON malformé, champ hors bornes, ligne trop longue) produisent
+    une ligne d'erreur à leur numéro au lieu d'interrompre le flux.
+    """
+    results: dict[int, dict] = {}
+    valid_lines, valid_items = [], []
+
+    for line_no, line in chunk:
+        if line is LineTooLong:
+            results[line_no] = {"line": line_no, "errors": [{"msg": "Ligne trop longue"}]}
+            continue
+        try:
+            valid_items.append(InputData.model_validate_json(line))
+            valid_lines.append(line_no)
+        except ValidationError as e:
+            errors = e.errors(include_url=False, include_context=False, include_input=False)
+            results[line_no] = {"line": line_no, "errors": errors}
+
+    if valid_items:
+        try:
+            predictions, probas, _, log_ids = score_and_log(valid_items, db, model)
+            for line_no, pred, proba, log_id in zip(
+                valid_lines, predictions, probas, log_ids, strict=True
+            ):
+                results[line_no] = {
+                    "line": line_no,
+                    "prediction": pred,
+                    "probability": proba,
+                    "log_id": log_id,
+                }
+        except (InferenceError, TimeoutError, SQLAlchemyError) as e:
+            db.rollback()
+            print(f"❌ Erreur API (stream) : {e!s}")
+            for line_no in valid_lines:
+                results[line_no] = {"line": line_no, "errors": [{"msg": str(e)}]}
+
+    lines = (json.dumps(results[line_no], default=str) for line_no in sorted(results))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def score_ndjson_chunk_in_session(chunk: list[tuple[int, bytes]], model: ModelVersion) -> bytes:
+    """Score un paquet NDJSON dans sa propre session BDD (ouverte via `get_db`)."""
+    db_dependency = app.dependency_overrides.get(get_db, get_db)()
+    db = next(db_dependency)
+    try:
+        return score_ndjson_chunk(chunk, db, model)
+    finally:
+        db_dependency.close()
+
+
+# Regroupement des prédictions unitaires concurrentes (opt-in via MICROBATCH_ENABLED=1)
+micro_batcher = MicroBatcher(run_model) if MICROBATCH_ENABLED else None
+
+
+def infer(features: np.ndarray, model: ModelVersion) -> tuple[list[int], list[float | None]]:
+    """Inférence, regroupée avec les requêtes concurrentes si le micro-batching est actif."""
+    if micro_batcher is not None and len(features) == 1:
+        return micro_batcher.predict(features, model)
+    return run_model(features, model)
+
+
+def score_features(
+    features: np.ndarray, model: ModelVersion
+) -> tuple[list[int], list[float | None]]:
+    """Score les lignes via le cache : seules les lignes absentes passent par le modèle.
+
+    La génération (modèle servi, seuil) invalide le cache dès que l'un des deux change.
+    """
+    if not prediction_cache.enabled:
+        predictions, probas = infer(features, model)
+        observe_drift(features, probas, model)
+        return predictions, probas
+
+    generation = (model.model, model.threshold)
+    keys = cache_keys.keys(features)
+    results = [prediction_cache.get(key, generation) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+
+    if missing:
+        predictions, probas = infer(features[missing], model)
+        for i, prediction, proba in zip(missing, predictions, probas, strict=True):
+            results[i] = (prediction, proba)
+            prediction_cache.put(keys[i], results[i], generation)
+
+    probas = [result[1] for result in results]
+    observe_drift(features, probas, model)
+    return [result[0] for result in results], probas
+
+
+def early_exit_for(model: ModelVersion, early_exit: bool, max_trees: int | None):
+    """Scoring à sortie anticipée demandé par la requête (`early_exit=true` ou `max_trees`).
+
+    `max_trees` seul est un simple plafond (les N premiers arbres) ; la règle d'arrêt ne
+    s'applique qu'avec `early_exit=true`. Renvoie la fonction de scoring à passer à
+    `score_request`, ou None (forêt complète). Comme pour les explications, le modèle est
+    vérifié avant le scoring.
+    """
+    if not early_exit and max_trees is None:
+        return None
+    forest = explainable_forest(model.model)
+    if forest is None:
+        raise HTTPException(
+            status_code=422,
+            detail="Sortie anticipée disponible uniquement pour un modèle RandomForest.",
+        )
+    budget = max_trees or EARLY_EXIT_MAX_TREES or None
+    return functools.partial(
+        score_early_exit, model=model, forest=forest, max_trees=budget, early_exit=early_exit
     )
 
-    model_config = ConfigDict(
-        json_schema_extra={
-            "example": {
-                "ratio_surcharge_anciennete": 0.14,
-                "nombre_participation_pee": 0,
-                "statut_marital_divorce": 0.0,
-                "age": 41,
-                "annees_dans_l_entreprise": 2,
-                "frequence_deplacement_frequent": 1.0,
-                "poste_representant_commercial": 0.0,
-                "niveau_education": 3,
-                "domaine_etude_marketing": 0.0,
-                "poste_consultant": 1.0,
-            }
-        }
+
+def score_early_exit(
+    features: np.ndarray,
+    model: ModelVersion,
+    forest: CompiledForest,
+    max_trees: int | None,
+    early_exit: bool = True,
+) -> tuple[list[int], list[float], list[int]]:
+    """Arbres évalués jusqu'à ce que la décision au seuil soit acquise (ou le budget épuisé) ;
+    sans `early_exit`, les `max_trees` premiers arbres.
+
+    Ni cache ni micro-batching : la probabilité dépend du budget de la requête.
+    """
+    with metrics.stage("predict"):
+        try:
+            probas, trees = forest.predict_proba_early_exit(
+                features, model.threshold, EARLY_EXIT_DELTA, max_trees, early_exit=early_exit
+            )
+        except ValueError as e:
+            raise InferenceError(f"{type(e).__name__}: {e}") from e
+
+    trees = trees.tolist()
+    histogram = metrics.histogram(
+        "early_exit_trees_evaluated",
+        "Arbres évalués par prédiction (sortie anticipée).",
+        buckets=TREE_BUCKETS,
     )
+    for n in trees:
+        histogram.observe(n)
+    probability_list = probas.tolist()
+    observe_drift(features, probability_list, model)
+    return (probas >= model.threshold).astype(int).tolist(), probability_list, trees
+
+
+def score_request(features: np.ndarray, model: ModelVersion, early_exit=None):
+    """(prédictions, probabilités, arbres évalués) ; arbres None sans sortie anticipée."""
+    if early_exit is None:
+        return (*score_features(features, model), None)
+    return early_exit(features)
+
+
+def observe_drift(features: np.ndarray, probas: list[float | None], model: ModelVersion):
+    """Ajoute les lignes servies (y compris depuis le cache) aux agrégats de dérive."""
+    if drift_monitor is not None:
+        with metrics.stage("drift"):
+            drift_monitor.observe(features, probas, model.version)
+
+
+def explainer_for(model: ModelVersion, explain: bool) -> CompiledForest | None:
+    """Forêt compilée servant aux explications (`explain=true`), vérifiée avant le scoring."""
+    if not explain:
+        return None
+    forest = explainable_forest(model.model)
+    if forest is None:
+        raise HTTPException(
+            status_code=422,
+            detail="Explications disponibles uniquement pour un modèle RandomForest.",
+        )
+    return forest
+
+
+def explain_features(features: np.ndarray, forest: CompiledForest) -> list[dict]:
+    """Contributions de chaque feature à la probabilité, par ligne.
+
+    Les profils déjà expliqués par la même forêt sont servis depuis `explanation_cache`.
+    """
+    with metrics.stage("explain"):
+        keys = cache_keys.keys(features)
+        rows = [explanation_cache.get(key, forest) for key in keys]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            _, contributions = forest.explain(features[missing])
+            for i, row in zip(missing, contributions, strict=True):
+                rows[i] = dict(zip(feature_builder.fields, row.tolist(), strict=True))
+                explanation_cache.put(keys[i], rows[i], forest)
+
+    return [{"base_value": forest.base_value, "contributions": row} for row in rows]
+
+
+def explain_items(items: list[InputData], forest: CompiledForest) -> list[dict]:
+    with metrics.stage("features"):
+        features = feature_builder.build_matrix(items)
+    return explain_features(features, forest)
+
+
+def log_predictions(db: Session, records: list[dict]) -> list[int | str]:
+    """Enregistre les logs de prédiction et renvoie leurs identifiants.
+
+    En mode write-behind, les logs partent dans la file du `log_writer` et l'identifiant
+    renvoyé est le `request_id` (UUID) généré par l'API. Sinon, un seul INSERT groupé
+    est fait et les `id` sont lus au flush, sans SELECT de relecture.
+    """
+    count_predictions(records)
+    if log_writer is not None:
+        with metrics.stage("log_enqueue"):
+            log_writer.submit_many(records)
+        return [record["request_id"] for record in records]
+
+    def write():
+        log_entries = [PredictionLog(**record) for record in records]
+        db.add_all(log_entries)
+        db.flush()
+        log_ids = [entry.id for entry in log_entries]
+        db.commit()
+        return log_ids
+
+    return write_logs(db, records, write)
+
+
+def write_logs(db: Session, records: list[dict], write) -> list:
+    """Exécute `write()` (écriture des logs), sauf en mode dégradé.
+
+    Avec DEGRADED_MODE_ENABLED=1, un pool de connexions saturé ou un échec d'écriture
+    active le mode dégradé : les prédictions sont servies sans être journalisées
+    (identifiants None). Sinon, l'erreur de BDD remonte à la route (503).
+    """
+    if degraded_mode.should_skip(db.get_bind().pool):
+        return skip_logs(records)
+    try:
+        with metrics.stage("db"):
+            return write()
+    except SQLAlchemyError as e:
+        db.rollback()
+        if not degraded_mode.enabled:
+            raise
+        print(f"⚠️ Écriture des logs impossible, mode dégradé : {e}")
+        degraded_mode.trip()
+        return skip_logs(records)
+
+
+def skip_logs(records: list[dict]) -> list[None]:
+    degraded_mode.skip(len(records))
+    return [None] * len(records)
+
+
+def count_predictions(records: list[dict]):
+    if metrics.enabled:
+        metrics.counter("predictions_total", "Prédictions servies (et journalisées).").inc(
+            len(records)
+        )
+
+
+async def log_predictions_async(db: "AsyncSession", records: list[dict]) -> list[int | str]:
+    """Variante asynchrone de `log_predictions` (INSERT ... RETURNING groupé)."""
+    count_predictions(records)
+    if log_writer is not None:
+        if log_writer.overflow_policy == "block":
+            # La politique "block" peut attendre une place dans la file : hors de la boucle
+            await run_in_threadpool(log_writer.submit_many, records)
+        else:
+            log_writer.submit_many(records)
+        return [record["request_id"] for record in records]
+
+    if degraded_mode.should_skip(db.get_bind().pool):
+        return skip_logs(records)
+    try:
+        with metrics.stage("db"):
+            result = await db.execute(
+                insert(PredictionLog).returning(PredictionLog.id, sort_by_parameter_order=True),
+                records,
+            )
+            log_ids = list(result.scalars())
+            await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        if not degraded_mode.enabled:
+            raise
+        print(f"⚠️ Écriture des logs impossible, mode dégradé : {e}")
+        degraded_mode.trip()
+        return skip_logs(records)
+    return log_ids
+
+
+def make_log_record(
+    inputs: dict,
+    prediction: int,
+    probability: float | None,
+    now=None,
+    model_version: str | None = None,
+) -> dict:
+    """Construit un log de prédiction avec son identifiant client (UUID).
+
+    Les features de `inputs` sont enregistrées dans leurs colonnes typées.
+    """
+    return {
+        "request_id": str(uuid.uuid4()),
+        "timestamp": now or datetime.datetime.now(),
+        **inputs,
+        "prediction": prediction,
+        "probability": probability,
+        "model_version": model_version,
+    }
 
 
 # ==========================================
@@ -127,89 +679,793 @@ class InputData(BaseModel):
 @app.get("/")
 def home():
     """Vérification de l'état de l'API."""
+    model = current_model()
     return {
         "status": "online",
-        "model_loaded": ml_model is not None,
-        "threshold_configured": churn_threshold,
+        "model_loaded": model is not None,
+        "threshold_configured": model.threshold if model else DEFAULT_THRESHOLD,
         "message": "API connectée à PostgreSQL !",
-        "model_version": "light (10 features)",
+        "model_version": model.version if model else None,
+        "serving_mode": "async" if ASYNC_DB_ENABLED else "sync",
+        "prediction_log_mode": PREDICTION_LOG_MODE,
+        "prediction_log_stats": log_writer.snapshot() if log_writer is not None else None,
     }
 
 
-@app.post("/predict", tags=["ML Prediction"])
-def predict(input_data: InputData, db: Session = Depends(get_db)):
-    """Effectue une prédiction et l'enregistre en BDD."""
+@app.get("/ready", tags=["Monitoring"])
+def ready():
+    """Disponibilité (readiness) du worker, distincte de `/` (liveness).
 
-    if ml_model is None:
-        raise HTTPException(
-            status_code=500, detail="Erreur interne : Le modèle n'a pas pu être chargé."
-        )
+    "warm" (200) une fois le modèle chargé, le schéma prêt et le modèle préchauffé ;
+    "cold" (503) sinon, pour que l'orchestrateur n'envoie pas encore de trafic.
+    """
+    model = current_model()
+    checks = {
+        "model_loaded": model is not None,
+        "schema_ready": startup_state["schema_ready"],
+        "warmed_up": startup_state["warmed_up"],
+    }
+    warm = all(checks.values())
+    return JSONResponse(
+        {
+            "status": "warm" if warm else "cold",
+            **checks,
+            "startup_seconds": startup_state["startup_seconds"],
+            "model_version": model.version if model else None,
+        },
+        status_code=200 if warm else 503,
+    )
+
+
+def predict(
+    input_data: InputData,
+    explain: bool = False,
+    early_exit: bool = False,
+    max_trees: int | None = Query(None, ge=1),
+    db: Session = Depends(get_db),
+):
+    """Effectue une prédiction et l'enregistre en BDD.
+
+    Avec `explain=true`, la réponse contient la contribution de chaque feature.
+    Avec `early_exit=true` (ou un budget `max_trees`), l'évaluation de la forêt s'arrête
+    dès que la décision est acquise ; la réponse indique `trees_evaluated`.
+    """
+
+    model = current_model()
+    if model is None:
+        raise model_unavailable()
+    forest = explainer_for(model, explain)
+    scorer = early_exit_for(model, early_exit, max_trees)
 
     try:
-        # 1. Préparation des données
+        # 1. Préparation des données (ordre EXACT des colonnes du modèle)
         data_dict = input_data.model_dump()
-        df = pd.DataFrame([data_dict])
-
-        # 2. Mapping vers les noms EXACTS du modèle
-        rename_mapping = {
-            "statut_marital_divorce": "statut_marital_Divorcé(e)",
-            "frequence_deplacement_frequent": "frequence_deplacement_Frequent",
-            "poste_representant_commercial": "poste_Représentant Commercial",
-            "domaine_etude_marketing": "domaine_etude_Marketing",
-            "poste_consultant": "poste_Consultant",
+        with metrics.stage("features"):
+            features = feature_builder.build_row(input_data)
+
+        # 2. Inférence
+        predictions, probas, trees = score_request(features, model, scorer)
+        prediction_val, proba_val = predictions[0], probas[0]
+
+        # 3. Logging en BDD
+        record = make_log_record(data_dict, prediction_val, proba_val, model_version=model.version)
+        (log_id,) = log_predictions(db, [record])
+
+        response = {
+            "prediction": prediction_val,
+            "probability": proba_val,
+            "threshold_used": model.threshold,
+            "model_version": model.version,
+            "log_id": log_id,
+            "request_id": record["request_id"],
         }
-        df = df.rename(columns=rename_mapping)
-
-        # 3. ORDRE EXACT des colonnes
-        expected_columns = [
-            "ratio_surcharge_anciennete",
-            "nombre_participation_pee",
-            "statut_marital_Divorcé(e)",
-            "age",
-            "annees_dans_l_entreprise",
-            "frequence_deplacement_Frequent",
-            "poste_Représentant Commercial",
-            "niveau_education",
-            "domaine_etude_Marketing",
-            "poste_Consultant",
-        ]
-
-        df = df[expected_columns]
-
-        # 4. Inférence
-        proba_val = None
-        prediction_val = 0
-
-        if hasattr(ml_model, "predict_proba"):
-            proba_val = float(ml_model.predict_proba(df)[0][1])
-            prediction_val = 1 if proba_val >= churn_threshold else 0
-        else:
-            prediction_val = int(ml_model.predict(df)[0])
-            proba_val = None
-
-        # 5. Logging en BDD
-        log_entry = PredictionLog(
-            timestamp=datetime.datetime.now(),
-            inputs=data_dict,
-            prediction=prediction_val,
-            probability=proba_val,
+        if trees is not None:
+            response["trees_evaluated"] = trees[0]
+        if forest is not None:
+            response["explanation"] = explain_features(features, forest)[0]
+        return response
+
+    except InferenceError as e:
+        raise prediction_failed(e)
+    except TimeoutError as e:
+        raise inference_unavailable(e)
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise database_unavailable(e)
+
+
+def validate_batch(batch: BatchInput, model: ModelVersion | None):
+    """Contrôles communs aux routes de lot et validation ligne par ligne.
+
+    Renvoie les résultats (les erreurs sont conservées à leur position), les indices
+    des lignes valides et les `InputData` correspondants.
+    """
+    if model is None:
+        raise model_unavailable()
+
+    if len(batch.records) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lot trop volumineux : {len(batch.records)} lignes (maximum {MAX_BATCH_SIZE}).",
         )
-        db.add(log_entry)
-        db.commit()
-        db.refresh(log_entry)
 
-        return {
+    results: list[dict[str, Any]] = [{"index": i} for i in range(len(batch.records))]
+    valid_indices: list[int] = []
+    valid_items: list[InputData] = []
+
+    for i, record in enumerate(batch.records):
+        try:
+            valid_items.append(InputData.model_validate(record))
+            valid_indices.append(i)
+        except ValidationError as e:
+            results[i]["errors"] = e.errors(
+                include_url=False, include_context=False, include_input=False
+            )
+
+    return results, valid_indices, valid_items
+
+
+def predict_batch(
+    batch: BatchInput,
+    explain: bool = False,
+    early_exit: bool = False,
+    max_trees: int | None = Query(None, ge=1),
+    db: Session = Depends(get_db),
+):
+    """Score un lot d'employés (une seule inférence) et l'enregistre en BDD (un seul INSERT)."""
+
+    # 1. Validation ligne par ligne
+    model = current_model()
+    results, valid_indices, valid_items = validate_batch(batch, model)
+    forest = explainer_for(model, explain)
+    scorer = early_exit_for(model, early_exit, max_trees)
+
+    if not valid_items:
+        return batch_response(model, 0, results)
+
+    try:
+        # 2. Une seule inférence, un seul INSERT groupé
+        predictions, probas, trees, log_ids = score_and_log(valid_items, db, model, scorer)
+        explanations = explain_items(valid_items, forest) if forest is not None else None
+
+    except InferenceError as e:
+        raise prediction_failed(e, "batch")
+    except TimeoutError as e:
+        raise inference_unavailable(e, "batch")
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise database_unavailable(e, "batch")
+
+    for i, pred, proba, log_id in zip(valid_indices, predictions, probas, log_ids, strict=True):
+        results[i].update({"prediction": pred, "probability": proba, "log_id": log_id})
+    add_trees_evaluated(results, valid_indices, trees)
+    add_explanations(results, valid_indices, explanations)
+
+    return batch_response(model, len(valid_items), results)
+
+
+def add_trees_evaluated(results: list[dict], valid_indices: list[int], trees):
+    if trees is not None:
+        for i, n in zip(valid_indices, trees, strict=True):
+            results[i]["trees_evaluated"] = n
+
+
+def add_explanations(results: list[dict], valid_indices: list[int], explanations):
+    if explanations is not None:
+        for i, explanation in zip(valid_indices, explanations, strict=True):
+            results[i]["explanation"] = explanation
+
+
+def batch_response(model: ModelVersion, n_valid: int, results: list[dict]) -> dict:
+    return {
+        "threshold_used": model.threshold,
+        "model_version": model.version,
+        "n_valid": n_valid,
+        "results": results,
+    }
+
+
+# ==========================================
+# 3 bis. Routes asynchrones (SERVING_MODE=async)
+# ==========================================
+
+
+async def predict_async(
+    input_data: InputData,
+    explain: bool = False,
+    early_exit: bool = False,
+    max_trees: int | None = Query(None, ge=1),
+    db: "AsyncSession" = Depends(get_async_db),
+):
+    """Variante asynchrone de /predict : session BDD asynchrone, inférence sur le pool dédié.
+
+    Aucun thread n'est bloqué pendant les E/S : un worker peut servir bien plus de
+    requêtes simultanées, dans la limite du pool de connexions.
+    """
+
+    model = current_model()
+    if model is None:
+        raise model_unavailable()
+    forest = explainer_for(model, explain)
+    scorer = early_exit_for(model, early_exit, max_trees)
+
+    try:
+        with metrics.stage("features"):
+            features = feature_builder.build_row(input_data)
+        predictions, probas, trees = await inference_executor.run(
+            score_request, features, model, scorer
+        )
+        prediction_val, proba_val = predictions[0], probas[0]
+
+        record = make_log_record(
+            input_data.model_dump(), prediction_val, proba_val, model_version=model.version
+        )
+        (log_id,) = await log_predictions_async(db, [record])
+
+        response = {
             "prediction": prediction_val,
             "probability": proba_val,
-            "threshold_used": churn_threshold,
-            "log_id": log_entry.id,
+            "threshold_used": model.threshold,
+            "model_version": model.version,
+            "log_id": log_id,
+            "request_id": record["request_id"],
         }
+        if trees is not None:
+            response["trees_evaluated"] = trees[0]
+        if forest is not None:
+            (response["explanation"],) = await inference_executor.run(
+                explain_features, features, forest
+            )
+        return response
 
-    except Exception as e:
-        db.rollback()
-        print(f"❌ Erreur API : {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Erreur lors de la prédiction : {str(e)}")
+    except InferenceError as e:
+        raise prediction_failed(e)
+    except TimeoutError as e:
+        raise inference_unavailable(e)
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise database_unavailable(e)
+
+
+async def predict_batch_async(
+    batch: BatchInput,
+    explain: bool = False,
+    early_exit: bool = False,
+    max_trees: int | None = Query(None, ge=1),
+    db: "AsyncSession" = Depends(get_async_db),
+):
+    """Variante asynchrone de /predict/batch."""
+
+    model = current_model()
+    results, valid_indices, valid_items = validate_batch(batch, model)
+    forest = explainer_for(model, explain)
+    scorer = early_exit_for(model, early_exit, max_trees)
+
+    if not valid_items:
+        return batch_response(model, 0, results)
+
+    try:
+        predictions, probas, trees = await inference_executor.run(
+            score_items, valid_items, model, scorer
+        )
+        records = make_log_records(valid_items, predictions, probas, model.version)
+        log_ids = await log_predictions_async(db, records)
+        explanations = None
+        if forest is not None:
+            explanations = await inference_executor.run(explain_items, valid_items, forest)
+
+    except InferenceError as e:
+        raise prediction_failed(e, "batch")
+    except TimeoutError as e:
+        raise inference_unavailable(e, "batch")
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise database_unavailable(e, "batch")
+
+    for i, pred, proba, log_id in zip(valid_indices, predictions, probas, log_ids, strict=True):
+        results[i].update({"prediction": pred, "probability": proba, "log_id": log_id})
+    add_trees_evaluated(results, valid_indices, trees)
+    add_explanations(results, valid_indices, explanations)
+
+    return batch_response(model, len(valid_items), results)
+
+
+# Routes de prédiction : synchrones (threadpool) par défaut, asynchrones sur demande
+if ASYNC_DB_ENABLED:
+    app.add_api_route("/predict", predict_async, methods=["POST"], tags=["ML Prediction"])
+    app.add_api_route(
+        "/predict/batch", predict_batch_async, methods=["POST"], tags=["ML Prediction"]
+    )
+else:
+    app.add_api_route("/predict", predict, methods=["POST"], tags=["ML Prediction"])
+    app.add_api_route("/predict/batch", predict_batch, methods=["POST"], tags=["ML Prediction"])
+
+
+class NDJSONScoringEndpoint:
+    """Route ASGI brute de `/predict/stream` : scoring d'un fichier JSON Lines en flux.
+
+    Le corps est lu message par message directement sur `receive()`, scoré par paquets de
+    STREAM_CHUNK_SIZE lignes, et chaque paquet de résultats NDJSON est envoyé dès qu'il est
+    prêt. Une route ASGI est utilisée plutôt qu'un `StreamingResponse` : ce dernier écoute
+    la déconnexion du client sur le même `receive()` et se disputerait les messages du corps.
+    """
+
+    async def __call__(self, scope, receive, send):
+        # Tout le flux est scoré par la version active à son ouverture
+        model = current_model()
+        if model is None:
+            response = JSONResponse(
+                status_code=500,
+                content={"detail": "Erreur interne : Le modèle n'a pas pu être chargé."},
+            )
+            await response(scope, receive, send)
+            return
+
+        async def body():
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                yield message.get("body", b"")
+                if not message.get("more_body", False):
+                    return
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/x-ndjson")],
+            }
+        )
+        async for chunk in iter_chunks(iter_ndjson_lines(body())):
+            payload = await run_in_threadpool(score_ndjson_chunk_in_session, chunk, model)
+            await send({"type": "http.response.body", "body": payload, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+# Documentée dans le README (route ASGI, hors schéma OpenAPI)
+app.router.routes.append(
+    Route("/predict/stream", endpoint=NDJSONScoringEndpoint(), methods=["POST"])
+)
+
+
+def log_matrix(
+    db: Session,
+    features: np.ndarray,
+    predictions: np.ndarray,
+    probas: np.ndarray | None,
+    model: ModelVersion,
+):
+    """Journalise un lot colonnaire sans passer par des objets ORM.
+
+    Les valeurs sont converties colonne par colonne (entiers compris), puis insérées en
+    un seul executemany Core (ou déposées dans la file write-behind).
+    """
+    now = datetime.datetime.now()
+    columns = {
+        field: (features[:, j].astype(np.int64) if field in INTEGER_FIELDS else features[:, j])
+        for j, field in enumerate(feature_builder.fields)
+    }
+    columns["prediction"] = predictions
+    columns["probability"] = probas if probas is not None else np.full(len(features), None)
+    keys = list(columns)
+    records = [
+        {
+            "request_id": str(uuid.uuid4()),
+            "timestamp": now,
+            **dict(zip(keys, row, strict=True)),
+            "model_version": model.version,
+        }
+        for row in zip(*(column.tolist() for column in columns.values()), strict=True)
+    ]
+
+    count_predictions(records)
+    if log_writer is not None:
+        with metrics.stage("log_enqueue"):
+            log_writer.submit_many(records)
+        return
+
+    def write():
+        db.execute(insert(PredictionLog), records)
+        db.commit()
+
+    write_logs(db, records, write)
+
+
+def predict_chunked(
+    X: np.ndarray, model: ModelVersion, chunk_rows: int | None = None
+) -> tuple[np.ndarray, np.ndarray | None]:
+    """`predict_arrays` par tranches de `chunk_rows` lignes (COLUMNAR_CHUNK_ROWS) : la
+    mémoire de travail du modèle (lignes x arbres) reste bornée quelle que soit la taille
+    du lot."""
+    chunk_rows = chunk_rows or COLUMNAR_CHUNK_ROWS
+    results = [
+        predict_arrays(X[start : start + chunk_rows], model)
+        for start in range(0, len(X), chunk_rows)
+    ]
+    predictions = np.concatenate([chunk_predictions for chunk_predictions, _ in results])
+    if results[0][1] is None:
+        return predictions, None
+    return predictions, np.concatenate([chunk_probas for _, chunk_probas in results])
+
+
+def score_columnar(body: bytes, content_type: str, db: Session, model: ModelVersion) -> Response:
+    """Décode, valide, score et journalise un lot colonnaire ; réponse dans le même format.
+
+    La taille du lot est vérifiée sur l'en-tête binaire ou la longueur des listes JSON,
+    avant la copie float64 des colonnes.
+    """
+    try:
+        with metrics.stage("validation"):
+            columns = decode_columns(body, content_type, COLUMNAR_MAX_ROWS)
+            features, valid, errors = validate_columns(columns, feature_builder.fields)
+    except ColumnarTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ColumnarPayloadError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    predictions = np.full(len(features), -1)
+    probas = np.full(len(features), np.nan)
+    if valid.any():
+        # Pas de cache : un lot de 100k profils distincts l'évincerait entièrement
+        X = features[valid] if errors else features
+        try:
+            valid_predictions, valid_probas = predict_chunked(X, model)
+            observe_drift(X, valid_probas, model)
+            log_matrix(db, X, valid_predictions, valid_probas, model)
+        except InferenceError as e:
+            raise prediction_failed(e, "columnar")
+        except SQLAlchemyError as e:
+            db.rollback()
+            raise database_unavailable(e, "columnar")
+        predictions[valid] = valid_predictions
+        if valid_probas is not None:
+            probas[valid] = valid_probas
+
+    meta = {
+        "threshold_used": model.threshold,
+        "model_version": model.version,
+        "n_rows": len(features),
+        "n_valid": int(valid.sum()),
+    }
+    with metrics.stage("serialization"):
+        content = encode_response(content_type, meta, predictions, probas, errors)
+    return Response(content, media_type=content_type)
+
+
+@app.post(
+    "/predict/columnar",
+    tags=["ML Prediction"],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "object",
+                        "additionalProperties": {"type": "array", "items": {"type": "number"}},
+                    },
+                    "example": {
+                        field: [value]
+                        for field, value in InputData.model_config["json_schema_extra"][
+                            "example"
+                        ].items()
+                    },
+                },
+                "application/vnd.churn.matrix": {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    },
+)
+async def predict_columnar(request: Request, db: Session = Depends(get_db)):
+    """Scoring en masse d'un lot colonnaire (une liste de valeurs par champ).
+
+    Corps : colonnes JSON (`{"age": [...], ...}`) ou matrice binaire float32/float64
+    (`application/vnd.churn.matrix`, voir README). Les bornes de `InputData` sont vérifiées
+    colonne par colonne ; la réponse utilise le format de la requête.
+    """
+    model = current_model()
+    if model is None:
+        raise model_unavailable()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in COLUMNAR_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Content-Type non supporté : {content_type!r} "
+            f"(attendu : {', '.join(COLUMNAR_CONTENT_TYPES)}).",
+        )
+    body = await request.body()
+    return await run_in_threadpool(score_columnar, body, content_type, db, model)
+
+
+def log_filters(
+    start: datetime.datetime | None = None,
+    end: datetime.datetime | None = None,
+    prediction: int | None = Query(default=None, ge=0, le=1),
+    min_probability: float | None = Query(default=None, ge=0, le=1),
+    max_probability: float | None = Query(default=None, ge=0, le=1),
+    model_version: str | None = None,
+) -> dict:
+    """Filtres communs à /logs et /logs/export (période [start, end[, bande de probabilité)."""
+    if (
+        min_probability is not None
+        and max_probability is not None
+        and min_probability > max_probability
+    ):
+        raise HTTPException(status_code=422, detail="min_probability doit être <= max_probability.")
+    return {
+        "start": start,
+        "end": end,
+        "prediction": prediction,
+        "min_probability": min_probability,
+        "max_probability": max_probability,
+        "model_version": model_version,
+    }
+
+
+@app.get("/logs", tags=["Logs"])
+def read_logs(
+    filters: dict = Depends(log_filters),
+    limit: int = Query(default=100, ge=1, le=LOGS_MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+):
+    """Logs de prédiction, du plus récent au plus ancien, par pages de `limit`.
+
+    Passer `next_cursor` de la réponse en `cursor` pour obtenir la page suivante.
+    """
+    try:
+        query = log_query(**filters, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return fetch_page(db, query, limit)
+
+
+def stream_log_export(query, export_format: str):
+    """Export lu dans sa propre session (ouverte via `get_db`) pendant l'envoi."""
+    db_dependency = app.dependency_overrides.get(get_db, get_db)()
+    db = next(db_dependency)
+    try:
+        yield from iter_export(db, query, export_format)
+    finally:
+        db_dependency.close()
+
+
+@app.get("/logs/export", tags=["Logs"])
+def export_logs(
+    filters: dict = Depends(log_filters),
+    format: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+):
+    """Export CSV ou NDJSON des logs filtrés, envoyé en flux (curseur côté serveur)."""
+    return StreamingResponse(
+        stream_log_export(log_query(**filters), format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="prediction_logs.{format}"'},
+    )
+
+
+@app.get("/cache/stats", tags=["Monitoring"])
+def cache_stats():
+    """Statistiques du cache de prédictions (succès, échecs, évictions, taille)."""
+    return prediction_cache.snapshot()
+
+
+@app.get("/metrics", tags=["Monitoring"], response_class=PlainTextResponse)
+def export_metrics():
+    """Métriques au format texte de Prometheus (durées par étape, chargement du modèle...)."""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Métriques désactivées (METRICS_ENABLED=0).")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/monitoring/drift", tags=["Monitoring"])
+def drift_report(windows: int | None = Query(default=None, ge=1)):
+    """Dérive des entrées et des probabilités par rapport aux données d'entraînement.
+
+    Calculée sur les agrégats tenus à jour à chaque prédiction (PSI et KS par variable,
+    sur les `windows` dernières fenêtres de DRIFT_WINDOW_SECONDS) : la table
+    `prediction_logs` n'est pas relue, le coût ne dépend pas du volume journalisé.
+    """
+    monitor = drift_monitor.ensure(current_model()) if drift_monitor is not None else None
+    if monitor is None:
+        raise HTTPException(
+            status_code=404, detail="Suivi de la dérive désactivé ou référence indisponible."
+        )
+    return monitor.report(windows)
+
+
+@app.get("/model", tags=["Monitoring"])
+def model_info():
+    """Version active du modèle et état du registre (rechargements, surveillance)."""
+    return model_registry.snapshot()
+
+
+def check_admin_token(x_admin_token: str | None):
+    """Refuse (403) sans ADMIN_TOKEN configuré ; comparaison du jeton à temps constant."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=403, detail="Administration désactivée (ADMIN_TOKEN non défini)."
+        )
+    if x_admin_token is None or not hmac.compare_digest(
+        x_admin_token.encode(), ADMIN_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Jeton d'administration invalide.")
+
+
+@app.get("/model/threshold/sweep", tags=["Monitoring"])
+def threshold_sweep(
+    start: float = Query(default=0.05, ge=0, le=1),
+    stop: float = Query(default=0.95, ge=0, le=1),
+    step: float = Query(default=0.01, ge=0.001, le=0.5),
+    refresh: bool = False,
+    db: Session = Depends(get_db),
+):
+    """Précision, rappel, F1 et volume d'alertes sur une grille de seuils.
+
+    L'historique étiqueté (`employees_history.target_churn`) est scoré une fois par
+    version du modèle puis gardé en cache : les balayages suivants ne relancent pas
+    la forêt (`refresh=true` force un nouveau scoring, ex. après un init_db).
+    """
+    model = current_model()
+    if model is None:
+        raise model_unavailable()
+    if start > stop:
+        raise HTTPException(status_code=422, detail="start doit être <= stop.")
+
+    try:
+        scores = threshold_calibrator.scores(model, db, feature_builder.fields, refresh)
+    except EmptyHistoryError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    thresholds = np.round(np.arange(start, stop + step / 2, step), 6)
+    grid = scores.sweep(thresholds)
+    current = scores.sweep(np.array([model.threshold]))
+    best = int(np.argmax(grid["f1"]))
+
+    def row(metrics_by_name: dict, i: int) -> dict:
+        return {name: values[i].item() for name, values in metrics_by_name.items()}
+
+    return {
+        "model_version": model.version,
+        "scored_at": scores.scored_at.isoformat(timespec="seconds"),
+        "n_labelled": scores.n,
+        "positives": scores.positives,
+        "current": row(current, 0),
+        "best_f1": row(grid, best),
+        "grid": [row(grid, i) for i in range(len(thresholds))],
+    }
+
+
+@app.put("/admin/model/threshold", tags=["Administration"])
+def update_threshold(update: ThresholdUpdate, x_admin_token: str | None = Header(default=None)):
+    """Applique un nouveau seuil de décision au modèle actif, sans le recharger."""
+    check_admin_token(x_admin_token)
+
+    previous = model_registry.active
+    try:
+        version = model_registry.set_threshold(update.threshold)
+    except ReloadInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ModelLoadError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return {"previous_threshold": previous.threshold, "active": version.describe()}
+
+
+@app.post("/admin/population/score", tags=["Administration"])
+def score_population_job(
+    full: bool = False,
+    x_admin_token: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    """Score `employees_history` avec le modèle actif et enregistre les scores.
+
+    Par défaut, seuls les employés sans score pour cette version ou modifiés depuis leur
+    dernier scoring sont traités ; `full=true` rescore toute la population.
+    """
+    check_admin_token(x_admin_token)
+    model = current_model()
+    if model is None:
+        raise model_unavailable()
+    return score_population(db.get_bind(), model, feature_builder.fields, full)
+
+
+@app.get("/population/top", tags=["Population"])
+def population_top(
+    k: int = Query(default=50, ge=1, le=POPULATION_MAX_TOP_K),
+    model_version: str | None = None,
+    min_probability: float | None = Query(default=None, ge=0, le=1),
+    min_age: int | None = None,
+    max_age: int | None = None,
+    niveau_education: int | None = Query(default=None, ge=1, le=5),
+    poste_consultant: bool | None = None,
+    poste_representant_commercial: bool | None = None,
+    frequence_deplacement_frequent: bool | None = None,
+    db: Session = Depends(get_db),
+):
+    """Les `k` employés les plus à risque (scores précalculés), avec filtres optionnels.
+
+    Les scores sont ceux de la version active du modèle, sauf `model_version` explicite.
+    """
+    model = current_model()
+    if model is None and model_version is None:
+        raise model_unavailable()
+    version = model_version or model.version
+    threshold = model.threshold if model is not None else DEFAULT_THRESHOLD
+
+    filters = {
+        "min_probability": min_probability,
+        "min_age": min_age,
+        "max_age": max_age,
+        "niveau_education": niveau_education,
+        "poste_consultant": poste_consultant,
+        "poste_representant_commercial": poste_representant_commercial,
+        "frequence_deplacement_frequent": frequence_deplacement_frequent,
+    }
+    rows = db.execute(top_k_query(version, k, feature_builder.fields, filters)).all()
+    if not rows and not has_scores(db, version):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Population non scorée pour la version {version} "
+            "(lancer POST /admin/population/score).",
+        )
+
+    n_fields = len(feature_builder.fields)
+    return {
+        "model_version": version,
+        "threshold_used": threshold,
+        "items": [
+            {
+                "rank": rank,
+                "id_employee": row.id_employee,
+                "probability": row.probability,
+                "prediction": int(row.probability >= threshold),
+                "scored_at": row.scored_at,
+                "employee": dict(zip(feature_builder.fields, row[-n_fields:], strict=True)),
+            }
+            for rank, row in enumerate(rows, start=1)
+        ],
+    }
+
+
+@app.post("/admin/model/reload", tags=["Administration"])
+def reload_model(x_admin_token: str | None = Header(default=None)):
+    """Recharge le modèle (artefact ou pickle) sans interrompre le service.
+
+    La nouvelle version est chargée et échauffée pendant que l'ancienne continue de
+    servir ; les requêtes en cours se terminent sur l'ancienne version.
+    """
+    check_admin_token(x_admin_token)
+
+    previous = model_registry.active
+    try:
+        version = model_registry.reload()
+    except ReloadInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except (ModelLoadError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"Rechargement refusé : {e}")
+
+    return {
+        "previous_version": previous.version if previous else None,
+        "active": version.describe(),
+    }
+
+
+@app.get("/admission/stats", tags=["Monitoring"])
+def admission_stats():
+    """Contrôle d'admission (places occupées, file, refus) et mode dégradé."""
+    return {"admission": admission.snapshot(), "degraded_mode": degraded_mode.snapshot()}
+
+
+@app.get("/batcher/stats", tags=["Monitoring"])
+def batcher_stats():
+    """Histogrammes du micro-batching (taille des lots, attente en file)."""
+    if micro_batcher is None:
+        return {"enabled": False}
+    return micro_batcher.snapshot()
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,66 @@
+import argparse
+import time
+
+from app.services.log_storage import (
+    LOG_ARCHIVE_DIR,
+    LOG_PARTITION_MONTHS_AHEAD,
+    LOG_RETENTION_DAYS,
+    backfill_feature_columns,
+    compact_logs,
+    ensure_partitions,
+    partition_table,
+)
+from database import engine, init_schema
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance de la table prediction_logs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser(
+        "backfill", help="Migre le schéma et recopie `inputs` (JSON) dans les colonnes typées"
+    )
+    backfill.add_argument("--batch-size", type=int, default=5000)
+
+    compact = commands.add_parser(
+        "compact", help="Remplace les logs expirés par des agrégats journaliers"
+    )
+    compact.add_argument("--retention-days", type=int, default=LOG_RETENTION_DAYS)
+    compact.add_argument(
+        "--archive-dir", default=LOG_ARCHIVE_DIR, help="SQLite : archive des logs supprimés"
+    )
+
+    partition = commands.add_parser(
+        "partition", help="PostgreSQL : partitionne la table par mois (et crée les suivantes)"
+    )
+    partition.add_argument("--months-ahead", type=int, default=LOG_PARTITION_MONTHS_AHEAD)
+
+    args = parser.parse_args()
+    started = time.perf_counter()
+
+    if args.command == "backfill":
+        init_schema(engine)
+        migrated = backfill_feature_columns(engine, args.batch_size)
+        print(f"✅ {migrated} logs migrés vers les colonnes typées.")
+
+    elif args.command == "compact":
+        # Les moyennes des features portent sur les colonnes typées : migration d'abord
+        backfill_feature_columns(engine)
+        report = compact_logs(engine, args.retention_days, args.archive_dir)
+        print(
+            f"✅ {report['compacted']} logs antérieurs au {report['before']} compactés "
+            f"en {report['days']} journée(s) ; {report['deleted']} supprimés, "
+            f"{report['archived']} archivés, partitions supprimées : "
+            f"{report['dropped_partitions'] or 'aucune'}."
+        )
+
+    elif args.command == "partition":
+        copied = partition_table(engine, args.months_ahead)
+        partitions = ensure_partitions(engine, args.months_ahead)
+        print(f"✅ Table partitionnée ({copied} logs recopiés) ; partitions : {partitions}")
+
+    print(f"⏱️ Terminé en {time.perf_counter() - started:.1f} s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.models.features import FIELD_TO_COLUMN
+
+# ==========================================
+# Configuration
+# ==========================================
+CSV_PATH = "final_data_set.csv"
+OUTPUT_FORMATS = ("csv", "jsonl")
+
+# Modèle chargé une seule fois par processus worker (voir _init_worker)
+_model = None
+_threshold = None
+_features = None
+
+
+def _init_worker():
+    """Charge le modèle une fois pour toute la durée de vie du worker."""
+    global _model, _threshold, _features
+    from app.models import ml_model as loaded
+
+    _model = loaded.ml_model
+    _threshold = loaded.churn_threshold
+    _features = loaded.feature_builder.features
+
+
+def score_chunk(chunk: pd.DataFrame, id_column: str | None) -> pd.DataFrame:
+    """Score un paquet de lignes (exécuté dans un worker)."""
+    if _model is None:
+        raise RuntimeError("Le modèle n'a pas pu être chargé dans le worker.")
+
+    # Même mapping que /predict : noms InputData -> noms EXACTS du modèle
+    features = chunk.rename(columns=FIELD_TO_COLUMN)
+    missing = [column for column in _features if column not in features.columns]
+    if missing:
+        raise KeyError(f"Colonnes absentes du CSV : {missing}")
+
+    X = features[_features].to_numpy(dtype=np.float64)
+    probas = np.asarray(_model.predict_proba(X), dtype=np.float64)[:, 1]
+
+    result = pd.DataFrame({"prediction": (probas >= _threshold).astype(int), "probability": probas})
+    if id_column:
+        result.insert(0, id_column, chunk[id_column].to_numpy())
+    return result
+
+
+def write_chunk(result: pd.DataFrame, output: str, output_format: str, first: bool):
+    if output_format == "csv":
+        result.to_csv(output, sep=";", index=False, mode="w" if first else "a", header=first)
+    else:
+        with open(output, "w" if first else "a", encoding="utf-8") as f:
+            result.to_json(f, orient="records", lines=True, double_precision=15)
+
+
+def score_csv(
+    input_path: str,
+    output: str,
+    chunk_size: int = 10_000,
+    workers: int = os.cpu_count() or 1,
+    output_format: str = "csv",
+    id_column: str | None = "id_employee",
+) -> dict:
+    """Score un CSV par paquets répartis sur un pool de processus.
+
+    Au plus `2 * workers` paquets sont en vol : la mémoire reste bornée quelle que soit
+    la taille du fichier, et les résultats sont écrits dans l'ordre d'entrée.
+    """
+    header = pd.read_csv(input_path, sep=";", nrows=0).columns
+    if id_column not in header:
+        id_column = None
+
+    started = time.perf_counter()
+    n_rows = 0
+    first = True
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        in_flight = deque()
+        for chunk in pd.read_csv(input_path, sep=";", chunksize=chunk_size):
+            in_flight.append(pool.submit(score_chunk, chunk, id_column))
+            if len(in_flight) >= 2 * workers:
+                result = in_flight.popleft().result()
+                write_chunk(result, output, output_format, first)
+                n_rows, first = n_rows + len(result), False
+
+        while in_flight:
+            result = in_flight.popleft().result()
+            write_chunk(result, output, output_format, first)
+            n_rows, first = n_rows + len(result), False
+
+    elapsed = time.perf_counter() - started
+    return {"rows": n_rows, "seconds": elapsed, "rows_per_second": n_rows / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scoring hors-ligne d'un CSV (séparateur ';').")
+    parser.add_argument("input", nargs="?", default=CSV_PATH, help="CSV à scorer")
+    parser.add_argument("-o", "--output", default="predictions.csv", help="Fichier de sortie")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="Lignes par paquet")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processus")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv", dest="output_format")
+    parser.add_argument("--id-column", default="id_employee", help="Colonne recopiée en sortie")
+    args = parser.parse_args()
+
+    print(f"📂 Scoring de {args.input} ({args.workers} workers, paquets de {args.chunk_size})...")
+    stats = score_csv(
+        args.input, args.output, args.chunk_size, args.workers, args.output_format, args.id_column
+    )
+    print(
+        f"✅ {stats['rows']} lignes scorées en {stats['seconds']:.2f} s "
+        f"({stats['rows_per_second']:.0f} lignes/s) -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import argparse
+
+from app.models.ml_model import active_version, feature_builder
+from app.services.population import POPULATION_CHUNK_SIZE, score_population
+from database import engine, init_schema
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Score la population (employees_history) et enregistre les scores."
+    )
+    parser.add_argument(
+        "--csv", help="Population à charger d'abord dans employees_history (upsert init_db.py)"
+    )
+    parser.add_argument("--full", action="store_true", help="Rescore toute la population")
+    parser.add_argument("--chunk-size", type=int, default=POPULATION_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if active_version is None:
+        raise SystemExit("❌ Modèle non chargé : scoring impossible.")
+
+    init_schema(engine)
+    if args.csv:
+        from init_db import init_database
+
+        # Upsert : seuls les employés nouveaux ou modifiés changent d'`updated_at`
+        init_database(args.csv, mode="upsert", chunk_size=args.chunk_size)
+
+    print(f"📊 Scoring de la population (modèle {active_version.version})...")
+    stats = score_population(
+        engine, active_version, feature_builder.fields, args.full, args.chunk_size
+    )
+    print(
+        f"✅ {stats['scored']} employés scorés, {stats['skipped']} ignorés (features "
+        f"incomplètes), {stats['removed']} scores retirés en {stats['seconds']} s."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import asyncio
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app.services.admission import AdmissionController, DegradedMode, pool_saturated
+
+
+def test_controller_bounds_concurrency_and_queue():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, queue_size=1, queue_timeout=5)
+        assert await controller.acquire()
+
+        waiting = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.queue_depth == 1
+        # File pleine : refus immédiat
+        assert not await controller.acquire()
+
+        controller.release()  # Place transmise à la requête en attente
+        assert await waiting
+        assert controller.in_flight == 1 and controller.queue_depth == 0
+
+        controller.queue_timeout = 0.01
+        assert not await controller.acquire()  # Attente expirée
+        controller.release()
+        assert controller.in_flight == 0
+        return controller.snapshot()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["admitted"] == 2
+    assert stats["rejected_queue_full"] == 1
+    assert stats["rejected_timeout"] == 1
+
+
+def test_degraded_mode_trips_on_saturated_pool(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=1, max_overflow=0
+    )
+    degraded = DegradedMode(enabled=True, hold_seconds=60)
+
+    assert not degraded.should_skip(engine.pool)
+    with engine.connect():
+        assert pool_saturated(engine.pool)
+        assert degraded.should_skip(engine.pool)
+    # Toujours actif après libération : maintenu `hold_seconds`
+    assert degraded.should_skip(engine.pool)
+    assert degraded.snapshot()["activations"] == 1
+    assert not DegradedMode(enabled=False).should_skip(engine.pool)
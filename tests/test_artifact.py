@@ -0,0 +1,99 @@
+import json
+import os
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.models import ml_model
+from app.models.artifact import ArtifactError, export_artifact, load_artifact
+from app.models.features import DEFAULT_FEATURES
+from app.models.forest import CompiledForest, check_parity, load_parity_dataset
+
+
+@pytest.fixture(scope="module")
+def compiled():
+    import pandas as pd
+
+    df = pd.read_csv("final_data_set.csv", sep=";")
+    X, y = df[DEFAULT_FEATURES].to_numpy(dtype=np.float64), df["a_quitte_l_entreprise"]
+    model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0).fit(X, y)
+    return model, CompiledForest.from_sklearn(model)
+
+
+def test_artifact_round_trip_is_memory_mapped(compiled, tmp_path):
+    model, forest = compiled
+    manifest = export_artifact(forest, tmp_path, 0.3, DEFAULT_FEATURES, "v-test")
+
+    loaded, loaded_manifest = load_artifact(tmp_path)
+
+    assert loaded_manifest == manifest
+    assert loaded_manifest["threshold"] == 0.3
+    assert loaded.n_trees == forest.n_trees and loaded.max_depth == forest.max_depth
+    # Les tableaux pointent sur le fichier mappé, en lecture seule (aucune copie)
+    assert not loaded.threshold.flags.writeable
+    assert isinstance(loaded.threshold.base, np.memmap)
+    assert check_parity(loaded, model, load_parity_dataset(DEFAULT_FEATURES), atol=1e-12) <= 1e-12
+
+
+def test_reexport_keeps_mapped_buffer_intact(compiled, tmp_path):
+    """Un nouvel export ne modifie pas le fichier mappé par la version en service."""
+    _, forest = compiled
+    export_artifact(forest, tmp_path, 0.3, DEFAULT_FEATURES, "v1")
+    served, _ = load_artifact(tmp_path)
+    before = served.value.copy()
+
+    # Même forêt, valeurs différentes : le contenu (donc le nom du buffer) change
+    forest.value = forest.value[::-1].copy()
+    try:
+        manifest = export_artifact(forest, tmp_path, 0.4, DEFAULT_FEATURES, "v2")
+    finally:
+        forest.value = forest.value[::-1].copy()
+
+    np.testing.assert_array_equal(served.value, before)
+    assert [p.name for p in tmp_path.glob("forest*.bin")] == [manifest["buffer"]]
+    assert load_artifact(tmp_path)[1]["model_version"] == "v2"
+
+
+def test_corrupted_artifact_is_rejected(compiled, tmp_path):
+    _, forest = compiled
+    manifest = export_artifact(forest, tmp_path, 0.3, DEFAULT_FEATURES, "v-test")
+
+    with open(tmp_path / manifest["buffer"], "r+b") as f:
+        f.seek(100)
+        f.write(b"\xff")
+
+    with pytest.raises(ArtifactError, match="Somme de contrôle"):
+        load_artifact(tmp_path)
+
+
+def test_unsupported_format_is_rejected(compiled, tmp_path):
+    _, forest = compiled
+    export_artifact(forest, tmp_path, 0.3, DEFAULT_FEATURES, "v-test")
+    manifest_path = tmp_path / "manifest.json"
+    manifest = json.loads(manifest_path.read_text())
+    manifest_path.write_text(json.dumps({**manifest, "format_version": 99}))
+
+    with pytest.raises(ArtifactError, match="Format"):
+        load_artifact(tmp_path)
+
+
+def test_newer_pickle_takes_precedence_over_stale_artifact(compiled, tmp_path, monkeypatch):
+    """Un pickle déposé après l'export est servi : l'artefact sert l'ancien modèle."""
+    model, forest = compiled
+    export_artifact(forest, tmp_path / "artifact", 0.3, DEFAULT_FEATURES, "v-artifact")
+    path = tmp_path / "model.pkl"
+    with open(path, "wb") as f:
+        pickle.dump({"model": model, "threshold": 0.4, "features": DEFAULT_FEATURES}, f)
+    monkeypatch.setattr(ml_model, "MODEL_ARTIFACT_DIR", tmp_path / "artifact")
+    monkeypatch.setattr(ml_model, "MODEL_PATH", path)
+    monkeypatch.setattr(ml_model, "SERVING_ENGINE", "compiled")
+    manifest_mtime = (tmp_path / "artifact" / "manifest.json").stat().st_mtime_ns
+
+    os.utime(path, ns=(manifest_mtime - 10**9, manifest_mtime - 10**9))
+    assert ml_model.load_model_version().source == "artifact"
+
+    os.utime(path, ns=(manifest_mtime + 10**9, manifest_mtime + 10**9))
+    version = ml_model.load_model_version()
+    assert (version.source, version.threshold) == ("pickle", 0.4)
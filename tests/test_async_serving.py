@@ -0,0 +1,86 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import main
+from database import Base, PredictionLog, async_database_url, get_async_db
+
+# ==========================================
+# Application de test : routes asynchrones sur une base aiosqlite
+# ==========================================
+
+PAYLOAD = {
+    "ratio_surcharge_anciennete": 0.14,
+    "nombre_participation_pee": 0,
+    "statut_marital_divorce": 1.0,
+    "age": 28,
+    "annees_dans_l_entreprise": 1,
+    "frequence_deplacement_frequent": 1.0,
+    "poste_representant_commercial": 1.0,
+    "niveau_education": 2,
+    "domaine_etude_marketing": 0.0,
+    "poste_consultant": 0.0,
+}
+
+
+@pytest.fixture
+def async_client(tmp_path):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    Base.metadata.create_all(bind=create_engine(url))
+    async_engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+    AsyncTestingSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSession() as db:
+            yield db
+
+    app = FastAPI()
+    app.add_api_route("/predict", main.predict_async, methods=["POST"])
+    app.add_api_route("/predict/batch", main.predict_batch_async, methods=["POST"])
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    mock_model = MagicMock()
+    mock_model.predict_proba.side_effect = lambda X: np.tile([0.2, 0.8], (len(X), 1))
+    with patch("main.ml_model", mock_model), patch.object(main.prediction_cache, "max_size", 0):
+        yield TestClient(app), create_engine(url)
+
+
+def count_logs(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(PredictionLog)).scalar()
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./demo.db") == "sqlite+aiosqlite:///./demo.db"
+    assert async_database_url("postgresql+psycopg2://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+
+
+def test_predict_async_logs_prediction(async_client):
+    client, engine = async_client
+    response = client.post("/predict", json=PAYLOAD)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["prediction"] == 1
+    assert data["probability"] == 0.8
+    assert isinstance(data["log_id"], int)
+    assert count_logs(engine) == 1
+
+
+def test_predict_batch_async_keeps_log_ids_in_order(async_client):
+    client, engine = async_client
+    records = [PAYLOAD, {**PAYLOAD, "age": -1}, PAYLOAD, PAYLOAD]
+    response = client.post("/predict/batch", json={"records": records})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert "errors" in results[1]
+    log_ids = [results[i]["log_id"] for i in (0, 2, 3)]
+    assert log_ids == sorted(log_ids)
+    assert count_logs(engine) == 3
@@ -0,0 +1,119 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.services.batcher import MicroBatcher
+
+
+def fake_model(calls):
+    """Renvoie la première feature comme probabilité, et trace la taille de chaque appel."""
+
+    def predict_fn(features, model=None):
+        calls.append(len(features))
+        probas = features[:, 0].tolist()
+        return [int(p >= 0.5) for p in probas], probas
+
+    return predict_fn
+
+
+def test_concurrent_requests_share_model_calls():
+    """Les requêtes concurrentes sont regroupées et chacune reçoit SA ligne."""
+    calls = []
+    batcher = MicroBatcher(fake_model(calls), window_ms=50, max_batch_size=8)
+    batcher.start()
+    try:
+        values = [i / 20 for i in range(16)]
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda v: batcher.predict(np.array([[v, 0.0]])), values))
+    finally:
+        batcher.stop()
+
+    assert [probas[0] for _, probas in results] == values
+    assert len(calls) < len(values)
+    assert max(calls) <= 8
+    snapshot = batcher.snapshot()
+    assert snapshot["batch_size"]["count"] == len(calls)
+    assert snapshot["queue_wait_seconds"]["count"] == len(values)
+
+
+def test_reload_while_batch_is_pending_keeps_each_request_version():
+    """Un rechargement pendant la fenêtre : chaque demande est scorée par la version
+    qu'elle a lue, en un appel au modèle par version."""
+    calls = []
+
+    def versioned_model(features, model):
+        calls.append((model, len(features)))
+        return [model] * len(features), features[:, 0].tolist()
+
+    batcher = MicroBatcher(versioned_model, window_ms=500, max_batch_size=8)
+    batcher.start()
+    try:
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            before = [pool.submit(batcher.predict, np.array([[v, 0.0]]), "v1") for v in (0.1, 0.2)]
+            time.sleep(0.1)  # Fenêtre ouverte : les 2 demandes attendent le regroupement
+            after = batcher.predict(np.array([[0.3, 0.0]]), "v2")  # Après rechargement
+            results = [future.result() for future in before]
+    finally:
+        batcher.stop()
+
+    assert [predictions for predictions, _ in results] == [["v1"], ["v1"]]
+    assert after == (["v2"], [0.3])
+    assert sorted(calls) == [("v1", 2), ("v2", 1)]
+
+
+def test_model_error_is_propagated_to_callers():
+    def failing(features, model):
+        raise RuntimeError("Boom")
+
+    batcher = MicroBatcher(failing, window_ms=1)
+    batcher.start()
+    try:
+        with pytest.raises(RuntimeError, match="Boom"):
+            batcher.predict(np.zeros((1, 2)))
+    finally:
+        batcher.stop()
+
+    assert not batcher.running
+
+
+def test_stopped_batcher_falls_back_to_direct_call():
+    """Planificateur arrêté : la prédiction est faite directement, sans attente."""
+    calls = []
+    batcher = MicroBatcher(fake_model(calls), timeout=30)
+
+    predictions, _probas = batcher.predict(np.array([[0.9, 0.0]]))
+
+    assert predictions == [1]
+    assert calls == [1]
+
+
+def test_timed_out_request_is_not_scored():
+    """Une demande abandonnée (délai dépassé) est annulée et ignorée par le thread."""
+    import threading
+    from concurrent.futures import TimeoutError as FutureTimeoutError
+
+    calls = []
+    release = threading.Event()
+
+    def slow_model(features, model):
+        release.wait(5)
+        return fake_model(calls)(features, model)
+
+    batcher = MicroBatcher(slow_model, window_ms=1, timeout=0.2)
+    batcher.start()
+    try:
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            first = pool.submit(batcher.predict, np.array([[0.1, 0.0]]))
+            while batcher.snapshot()["queue_depth"] or not batcher.batch_sizes.snapshot()["count"]:
+                pass  # Attend que la 1re demande occupe le thread
+            with pytest.raises(FutureTimeoutError):
+                batcher.predict(np.array([[0.2, 0.0]]))
+            release.set()
+            with pytest.raises(FutureTimeoutError):
+                first.result()  # Déjà en cours de scoring : non annulable
+    finally:
+        batcher.stop()
+
+    assert calls == [1]  # La 2e demande, annulée, n'a jamais été scorée
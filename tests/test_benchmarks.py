@@ -0,0 +1,29 @@
+from app.schemas import InputData
+from benchmarks.replay import build_requests, compare, summarize, synthetic_payloads
+
+
+def test_synthetic_payloads_are_valid_inputs():
+    payloads = synthetic_payloads(20, seed=1)
+
+    assert len(payloads) == 20
+    for payload in payloads:
+        InputData.model_validate(payload)
+
+
+def test_build_batch_requests_cycles_over_payloads():
+    requests = build_requests([{"age": 1}, {"age": 2}, {"age": 3}], "batch", 2, batch_size=2)
+
+    assert [url for url, _, _ in requests] == ["/predict/batch"] * 2
+    assert requests[1][1]["records"] == [{"age": 3}, {"age": 1}]
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {"results": {"inprocess/single/sync": summarize([0.010] * 100, 1.0, 0, 100)}}
+    slower = {"results": {"inprocess/single/sync": summarize([0.013] * 100, 1.3, 0, 100)}}
+    similar = {"results": {"inprocess/single/sync": summarize([0.0105] * 100, 1.05, 0, 100)}}
+
+    regressions = compare(slower, baseline, tolerance=0.10)
+
+    assert any("p95_ms" in line for line in regressions)
+    assert any("throughput_rps" in line for line in regressions)
+    assert compare(similar, baseline, tolerance=0.10) == []
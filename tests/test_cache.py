@@ -0,0 +1,47 @@
+import numpy as np
+
+from app.models.features import DEFAULT_FEATURES, FeatureBuilder
+from app.services.cache import FeatureKeyNormalizer, PredictionCache
+
+
+def test_lru_eviction_and_stats():
+    """Au-delà de max_size, l'entrée la moins récemment utilisée est évincée."""
+    cache = PredictionCache(max_size=2, ttl=60)
+    cache.put(b"a", 1, "v1")
+    cache.put(b"b", 2, "v1")
+    assert cache.get(b"a", "v1") == 1  # "a" devient la plus récente
+
+    cache.put(b"c", 3, "v1")
+
+    assert cache.get(b"b", "v1") is None
+    stats = cache.snapshot()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+
+def test_ttl_expiry():
+    cache = PredictionCache(max_size=10, ttl=-1)
+    cache.put(b"a", 1, "v1")
+    assert cache.get(b"a", "v1") is None
+
+
+def test_generation_change_invalidates():
+    """Un changement de modèle ou de seuil vide le cache."""
+    cache = PredictionCache(max_size=10, ttl=60)
+    cache.put(b"a", 1, ("model", 0.235))
+
+    assert cache.get(b"a", ("model", 0.3)) is None
+    assert cache.snapshot()["invalidations"] == 1
+
+
+def test_key_normalization():
+    """Arrondi des variables continues et zéros signés donnent la même clé."""
+    normalizer = FeatureKeyNormalizer(FeatureBuilder(DEFAULT_FEATURES), decimals=6)
+    row = np.array([[0.14, 0, 0.0, 41, 2, 1.0, 0.0, 3, 0.0, 1.0]])
+    noisy = row.copy()
+    noisy[0, 0] += 1e-12
+    noisy[0, 2] = -0.0
+
+    assert normalizer.keys(row) == normalizer.keys(noisy)
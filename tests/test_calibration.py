@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.features import FIELD_TO_COLUMN
+from app.models.registry import ModelVersion
+from app.services.calibration import (
+    EmptyHistoryError,
+    LabelledScores,
+    ThresholdCalibrator,
+    load_labelled_history,
+)
+from database import Base, EmployeeHistory
+
+FIELDS = list(FIELD_TO_COLUMN)
+
+
+class AgeModel:
+    """Probabilité croissante avec l'âge ; compte ses appels."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict_proba(self, X):
+        self.calls += 1
+        p = X[:, FIELDS.index("age")] / 100
+        return np.column_stack([1 - p, p])
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(EmployeeHistory),
+            [
+                {field: 0 for field in FIELDS} | {"age": age, "target_churn": int(age >= 50)}
+                for age in range(20, 70)
+            ],
+        )
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def brute_force(probas, labels, threshold):
+    alerts = probas >= threshold
+    tp = int((alerts & (labels == 1)).sum())
+    precision = tp / alerts.sum() if alerts.sum() else 0.0
+    recall = tp / labels.sum()
+    return alerts.sum(), precision, recall
+
+
+def test_sweep_matches_brute_force():
+    rng = np.random.default_rng(0)
+    probas, labels = rng.random(500), rng.integers(0, 2, 500)
+    model = ModelVersion(None, 0.5, FIELDS, "v1", "test")
+    thresholds = np.linspace(0, 1, 41)
+
+    grid = LabelledScores(model, probas, labels).sweep(thresholds)
+
+    for i, threshold in enumerate(thresholds):
+        alerts, precision, recall = brute_force(probas, labels, threshold)
+        assert grid["alerts"][i] == alerts
+        assert grid["precision"][i] == pytest.approx(precision)
+        assert grid["recall"][i] == pytest.approx(recall)
+
+
+def test_scores_are_cached_per_model_version(db):
+    calibrator = ThresholdCalibrator()
+    model = AgeModel()
+    version = ModelVersion(model, 0.5, FIELDS, "v1", "test")
+
+    scores = calibrator.scores(version, db, FIELDS)
+    calibrator.scores(version.with_threshold(0.3), db, FIELDS)  # Même version : cache
+    assert model.calls == 1
+
+    calibrator.scores(version, db, FIELDS, refresh=True)
+    calibrator.scores(ModelVersion(model, 0.5, FIELDS, "v2", "test"), db, FIELDS)
+    assert model.calls == 3
+
+    # Modèle parfaitement séparateur au seuil 0.5
+    grid = scores.sweep(np.array([0.5]))
+    assert (grid["precision"][0], grid["recall"][0], grid["alerts"][0]) == (1.0, 1.0, 20)
+
+
+def test_incomplete_features_are_skipped(db):
+    """Un employé aux features NULL est écarté au lieu de faire échouer le scoring."""
+    db.execute(
+        insert(EmployeeHistory),
+        [{field: 0 for field in FIELDS} | {"id_employee": 999, "age": None, "target_churn": 1}],
+    )
+    db.commit()
+
+    X, labels = load_labelled_history(db, FIELDS)
+    scores = ThresholdCalibrator().scores(
+        ModelVersion(AgeModel(), 0.5, FIELDS, "v1", "test"), db, FIELDS
+    )
+
+    assert X.shape == (50, len(FIELDS)) and not np.isnan(X).any()
+    assert labels.sum() == 20
+    assert np.isfinite(scores.probas).all()
+
+
+def test_empty_history_is_reported(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    Base.metadata.create_all(engine)
+    version = ModelVersion(AgeModel(), 0.5, FIELDS, "v1", "test")
+
+    with pytest.raises(EmptyHistoryError):
+        ThresholdCalibrator().scores(version, sessionmaker(bind=engine)(), FIELDS)
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.schemas import InputData
+from app.services.columnar import (
+    MATRIX_CONTENT_TYPE,
+    ColumnarPayloadError,
+    ColumnarTooLargeError,
+    decode_columns,
+    decode_matrix,
+    encode_matrix,
+    encode_response,
+    validate_columns,
+)
+
+FIELDS = list(InputData.model_fields)
+
+
+def random_columns(n: int, seed: int = 0) -> dict[str, np.ndarray]:
+    """Colonnes aléatoires, avec une part de valeurs hors bornes, fractionnaires ou NaN."""
+    rng = np.random.default_rng(seed)
+    columns = {field: rng.integers(-2, 8, n).astype(float) for field in FIELDS}
+    columns["age"] = rng.integers(10, 110, n).astype(float)
+    columns["ratio_surcharge_anciennete"] = rng.normal(0.2, 0.1, n)
+    columns["niveau_education"][::7] += 0.5
+    columns["poste_consultant"][::11] = np.nan
+    return columns
+
+
+def test_validation_matches_input_data():
+    """Même verdict que Pydantic, ligne par ligne, et mêmes champs en erreur."""
+    columns = random_columns(500)
+    matrix, valid, errors = validate_columns(columns, FIELDS)
+
+    assert 0 < valid.sum() < len(valid)
+    for i in range(len(valid)):
+        record = {field: columns[field][i].item() for field in FIELDS}
+        try:
+            InputData.model_validate(record)
+            assert valid[i] and i not in errors
+        except ValidationError as e:
+            assert not valid[i]
+            assert {err["loc"][0] for err in e.errors()} == {err["loc"][0] for err in errors[i]}
+    np.testing.assert_array_equal(matrix[:, FIELDS.index("age")], columns["age"])
+
+
+@pytest.mark.parametrize("dtype", ["<f4", "<f8"])
+def test_matrix_roundtrip_reorders_fields(dtype):
+    columns = random_columns(20)
+    header_fields = FIELDS[::-1]  # Ordre libre : les colonnes sont retrouvées par leur nom
+    body = encode_matrix(np.column_stack([columns[f] for f in header_fields]), header_fields, dtype)
+
+    decoded = decode_columns(body, MATRIX_CONTENT_TYPE)
+
+    for field in FIELDS:
+        np.testing.assert_allclose(decoded[field], columns[field].astype(dtype), equal_nan=True)
+
+
+def test_malformed_payloads_are_rejected():
+    with pytest.raises(ColumnarPayloadError, match="manquantes"):
+        validate_columns({"age": np.array([41.0])}, FIELDS)
+    with pytest.raises(ColumnarPayloadError, match="longueurs"):
+        validate_columns({f: np.zeros(2 if f == "age" else 3) for f in FIELDS}, FIELDS)
+    with pytest.raises(ColumnarPayloadError, match="incohérente"):
+        decode_matrix(encode_matrix(np.zeros((2, 10)), FIELDS)[:-8])
+    with pytest.raises(ColumnarPayloadError, match="JSON"):
+        decode_columns(b"{", "application/json")
+
+
+def test_oversized_payloads_are_rejected_before_conversion():
+    """Taille lue dans l'en-tête binaire (corps absent) ou sur les listes JSON."""
+    header_only = encode_matrix(np.zeros((0, 10)), FIELDS).replace(b'"rows": 0', b'"rows": 9')
+    with pytest.raises(ColumnarTooLargeError, match="9 lignes"):
+        decode_columns(header_only, MATRIX_CONTENT_TYPE, max_rows=5)
+    with pytest.raises(ColumnarTooLargeError):
+        decode_columns(b'{"age": [41, 35, 28]}', "application/json", max_rows=2)
+
+    assert len(decode_columns(b'{"age": [41, 35]}', "application/json", max_rows=2)["age"]) == 2
+
+
+def test_binary_response_flags_invalid_rows():
+    body = encode_response(
+        MATRIX_CONTENT_TYPE,
+        {"model_version": "v1"},
+        np.array([1, -1]),
+        np.array([0.9, np.nan]),
+        {1: [{"type": "finite_number", "loc": ["age"], "msg": "..."}]},
+    )
+
+    header, matrix = decode_matrix(body)
+
+    assert header["fields"] == ["prediction", "probability"]
+    assert header["model_version"] == "v1"
+    assert header["errors"][0]["index"] == 1
+    np.testing.assert_array_equal(matrix[:, 0], [1, -1])
@@ -1,11 +1,16 @@
+import json
+import uuid
+
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from main import app, get_db
+from app.services.batcher import MicroBatcher
 from database import Base, PredictionLog
 
 # ==========================================
@@ -34,6 +39,14 @@ def override_get_db():
 app.dependency_overrides[get_db] = override_get_db
 client = TestClient(app)
 
+ADMIN_HEADERS = {"X-Admin-Token": "test-admin-token"}
+
+
+@pytest.fixture
+def admin_token():
+    with patch("main.ADMIN_TOKEN", ADMIN_HEADERS["X-Admin-Token"]):
+        yield
+
 
 @pytest.fixture(autouse=True)
 def setup_database():
@@ -96,6 +109,34 @@ def test_home():
     assert "model_loaded" in data
 
 
+def test_ready_reports_cold_until_startup_completes():
+    """/ready (readiness) reste à 503 tant que le lifespan n'a pas préparé le worker."""
+    import main
+
+    with patch("main.ml_model") as mock_model:
+        assert client.get("/ready").json()["status"] == "cold"
+        assert client.get("/ready").status_code == 503
+
+        assert main.warm_up(main.current_model())
+        mock_model.predict_proba.assert_called_once()
+        with patch.dict(main.startup_state, {"schema_ready": True, "warmed_up": True}):
+            response = client.get("/ready")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "warm"
+
+
+def test_schema_is_created_by_explicit_step(tmp_path):
+    """Plus de DDL à l'import : `init_schema` crée puis complète le schéma (idempotent)."""
+    from database import init_schema, schema_ready
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    assert not schema_ready(engine)
+    init_schema(engine)
+    init_schema(engine)
+    assert schema_ready(engine)
+
+
 def test_prediction_workflow_churn():
     """Scénario : Un employé à risque (Churn=1)."""
     payload = get_valid_payload_churn()
@@ -183,3 +224,486 @@ def test_predict_method_not_allowed():
     response = client.get("/predict")
     assert response.status_code == 405
     assert "detail" in response.json()
+
+
+def test_prediction_batch_workflow():
+    """Scénario batch : une seule inférence, seuil appliqué ligne par ligne, ordre conservé."""
+    payload = {"records": [get_valid_payload_churn(), get_valid_payload_loyal()]}
+
+    with patch("main.ml_model") as mock_model:
+        mock_model.predict_proba.return_value = [[0.2, 0.8], [0.9, 0.1]]
+
+        response = client.post("/predict/batch", json=payload)
+
+        assert response.status_code == 200
+        assert mock_model.predict_proba.call_count == 1
+
+        data = response.json()
+        assert data["n_valid"] == 2
+        assert [r["index"] for r in data["results"]] == [0, 1]
+        assert [r["prediction"] for r in data["results"]] == [1, 0]
+
+        # Vérification BDD : une ligne de log par employé valide
+        db = TestingSessionLocal()
+        assert db.query(PredictionLog).count() == 2
+        db.close()
+
+
+def test_prediction_batch_invalid_rows():
+    """Une ligne invalide est signalée à sa position sans bloquer les autres."""
+    invalid = get_valid_payload_loyal()
+    invalid["age"] = 12  # Hors bornes (18-100)
+    payload = {"records": [invalid, get_valid_payload_churn(), None]}
+
+    with patch("main.ml_model") as mock_model:
+        mock_model.predict_proba.return_value = [[0.2, 0.8]]
+
+        response = client.post("/predict/batch", json=payload)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["n_valid"] == 1
+        assert "errors" in data["results"][0]
+        assert data["results"][0]["errors"][0]["loc"] == ["age"]
+        assert "input" not in data["results"][0]["errors"][0]
+        assert data["results"][1]["prediction"] == 1
+        assert "errors" in data["results"][2]  # Élément non-objet : erreur à sa position
+
+
+def test_prediction_batch_too_large():
+    """Un lot dépassant MAX_BATCH_SIZE est refusé (413)."""
+    payload = {"records": [get_valid_payload_churn()] * 3}
+
+    with patch("main.MAX_BATCH_SIZE", 2), patch("main.ml_model"):
+        response = client.post("/predict/batch", json=payload)
+
+    assert response.status_code == 413
+
+
+def test_prediction_write_behind_returns_client_log_id():
+    """En mode write-behind, la réponse porte un identifiant UUID généré par l'API."""
+    writer = MagicMock()
+
+    with patch("main.ml_model") as mock_model, patch("main.log_writer", writer):
+        mock_model.predict_proba.return_value = [[0.2, 0.8]]
+
+        response = client.post("/predict", json=get_valid_payload_churn())
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["log_id"] == data["request_id"]
+    assert str(uuid.UUID(data["log_id"])) == data["log_id"]
+    (records,) = writer.submit_many.call_args.args
+    assert records[0]["request_id"] == data["request_id"]
+
+
+def test_prediction_cache_hit_is_still_logged():
+    """Un profil répété est servi par le cache mais reste tracé en BDD."""
+    payload = get_valid_payload_churn()
+
+    with patch("main.ml_model") as mock_model:
+        mock_model.predict_proba.return_value = [[0.2, 0.8]]
+
+        first = client.post("/predict", json=payload).json()
+        second = client.post("/predict", json=payload).json()
+
+        assert mock_model.predict_proba.call_count == 1
+        assert first["probability"] == second["probability"]
+        assert first["log_id"] != second["log_id"]
+
+    db = TestingSessionLocal()
+    assert db.query(PredictionLog).count() == 2
+    db.close()
+
+    stats = client.get("/cache/stats").json()
+    assert stats["hits"] >= 1
+    assert "evictions" in stats
+
+
+def test_prediction_stream_ndjson():
+    """Flux NDJSON : chaque ligne est scorée, les lignes malformées sont signalées en ligne."""
+    lines = [
+        json.dumps(get_valid_payload_churn()),
+        "{ceci n'est pas du JSON",
+        "",
+        json.dumps(get_valid_payload_loyal()),
+    ]
+    body = "\n".join(lines) + "\n"
+
+    with patch("main.ml_model") as mock_model, patch("main.prediction_cache.max_size", 0):
+        mock_model.predict_proba.side_effect = lambda X: [[0.2, 0.8], [0.9, 0.1]][: len(X)]
+
+        response = client.post(
+            "/predict/stream", content=body, headers={"Content-Type": "application/x-ndjson"}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["line"] for r in results] == [1, 2, 4]
+    assert results[0]["prediction"] == 1
+    assert "errors" in results[1]
+    assert results[2]["prediction"] == 0
+
+    db = TestingSessionLocal()
+    assert db.query(PredictionLog).count() == 2
+    db.close()
+
+
+def test_prediction_routed_through_micro_batcher():
+    """Avec le micro-batching actif, /predict passe par le planificateur."""
+    from main import run_model
+
+    batcher = MicroBatcher(run_model, window_ms=1)
+    batcher.start()
+    try:
+        with (
+            patch("main.ml_model") as mock_model,
+            patch("main.micro_batcher", batcher),
+            patch("main.prediction_cache.max_size", 0),
+        ):
+            mock_model.predict_proba.return_value = [[0.2, 0.8]]
+            response = client.post("/predict", json=get_valid_payload_churn())
+    finally:
+        batcher.stop()
+
+    assert response.status_code == 200
+    assert response.json()["prediction"] == 1
+    assert batcher.snapshot()["batch_size"]["count"] == 1
+
+
+def test_micro_batcher_timeout_returns_503():
+    """Résultat du micro-batcher non rendu dans le délai : 503 + Retry-After."""
+    import threading
+
+    release = threading.Event()
+
+    def stuck_model(features, model):
+        release.wait(5)
+        return [0] * len(features), [0.0] * len(features)
+
+    batcher = MicroBatcher(stuck_model, window_ms=1, timeout=0.05)
+    batcher.start()
+    try:
+        with (
+            patch("main.ml_model"),
+            patch("main.micro_batcher", batcher),
+            patch("main.prediction_cache.max_size", 0),
+        ):
+            response = client.post("/predict", json=get_valid_payload_churn())
+    finally:
+        release.set()
+        batcher.stop()
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+
+def test_admin_routes_are_closed_without_configured_token():
+    """Sans ADMIN_TOKEN, les routes d'administration sont refusées (pas ouvertes)."""
+    with patch("main.ADMIN_TOKEN", ""):
+        assert client.post("/admin/model/reload", headers=ADMIN_HEADERS).status_code == 403
+    with patch("main.ADMIN_TOKEN", "secret"):
+        assert client.post("/admin/model/reload", headers=ADMIN_HEADERS).status_code == 403
+        assert client.post("/admin/model/reload").status_code == 403
+
+
+def test_admin_reload_switches_model_version(admin_token):
+    """Le rechargement à chaud active la nouvelle version, tracée dans les logs."""
+    from app.models.registry import ModelRegistry, ModelVersion
+    from main import feature_builder
+
+    new_model = MagicMock()
+    new_model.predict_proba.side_effect = lambda X: [[0.3, 0.7]] * len(X)
+
+    def loader():
+        return ModelVersion(new_model, 0.5, feature_builder.features, "v-reloaded", "test")
+
+    with (
+        patch("main.model_registry", ModelRegistry(loader, None, feature_builder.features)),
+        patch("main.prediction_cache.max_size", 0),
+    ):
+        assert client.get("/").json()["model_version"] is None
+
+        response = client.post("/admin/model/reload", headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        assert response.json()["active"]["version"] == "v-reloaded"
+        assert client.get("/").json()["model_version"] == "v-reloaded"
+
+        data = client.post("/predict", json=get_valid_payload_churn()).json()
+
+    assert data["model_version"] == "v-reloaded"
+    assert data["threshold_used"] == 0.5
+    db = TestingSessionLocal()
+    log_entry = db.query(PredictionLog).filter(PredictionLog.id == data["log_id"]).first()
+    assert log_entry.model_version == "v-reloaded"
+    db.close()
+
+
+def test_admin_reload_failure_keeps_current_model(admin_token):
+    from app.models.registry import ModelLoadError, ModelRegistry
+
+    def loader():
+        raise ModelLoadError("fichier corrompu")
+
+    with patch("main.model_registry", ModelRegistry(loader)):
+        response = client.post("/admin/model/reload", headers=ADMIN_HEADERS)
+
+    assert response.status_code == 422
+    assert "fichier corrompu" in response.json()["detail"]
+
+
+def test_metrics_endpoint_exposes_stage_timings():
+    """Chaque étape de /predict alimente un histogramme exposé sur /metrics."""
+    with patch("main.ml_model") as mock_model, patch("main.prediction_cache.max_size", 0):
+        mock_model.predict_proba.return_value = [[0.2, 0.8]]
+        assert client.post("/predict", json=get_valid_payload_churn()).status_code == 200
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    for stage in ("validation", "features", "predict", "db", "serialization"):
+        assert f'churn_api_stage_duration_seconds_count{{stage="{stage}"}}' in response.text
+    assert "churn_api_predictions_total" in response.text
+
+
+def test_drift_endpoint_tracks_served_predictions():
+    """Chaque prédiction servie alimente /monitoring/drift (une variable par feature)."""
+    before = client.get("/monitoring/drift").json()["count"]
+    with patch("main.ml_model") as mock_model, patch("main.prediction_cache.max_size", 0):
+        mock_model.predict_proba.return_value = [[0.2, 0.8]]
+        assert client.post("/predict", json=get_valid_payload_churn()).status_code == 200
+
+    response = client.get("/monitoring/drift")
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["count"] == before + 1
+    assert "age" in report["features"]
+    assert set(report["features"]["age"]) >= {"mean", "psi", "ks", "drift"}
+
+
+@pytest.fixture(scope="module")
+def small_forest():
+    """Petite forêt entraînée sur les 10 features, dans l'ordre du modèle."""
+    import numpy as np
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+
+    from app.models.features import DEFAULT_FEATURES
+
+    df = pd.read_csv("final_data_set.csv", sep=";")
+    X = df[DEFAULT_FEATURES].to_numpy(dtype=np.float64)
+    return RandomForestClassifier(n_estimators=10, max_depth=5, random_state=0).fit(
+        X, df["a_quitte_l_entreprise"]
+    )
+
+
+def test_predict_explain_returns_additive_contributions(small_forest):
+    """explain=true : contributions par champ, dont la somme redonne la probabilité."""
+    with patch("main.ml_model", small_forest):
+        response = client.post("/predict?explain=true", json=get_valid_payload_churn())
+
+    assert response.status_code == 200
+    data = response.json()
+    explanation = data["explanation"]
+    assert set(explanation["contributions"]) == set(get_valid_payload_churn())
+    total = explanation["base_value"] + sum(explanation["contributions"].values())
+    assert total == pytest.approx(data["probability"])
+
+
+def test_batch_explain_only_for_valid_rows(small_forest):
+    records = [get_valid_payload_churn(), {"age": 12}, get_valid_payload_loyal()]
+    with patch("main.ml_model", small_forest):
+        response = client.post("/predict/batch?explain=true", json={"records": records})
+
+    results = response.json()["results"]
+    assert "explanation" in results[0] and "explanation" in results[2]
+    assert "explanation" not in results[1]
+
+
+def test_explain_requires_a_forest():
+    with patch("main.ml_model") as mock_model:
+        mock_model.predict_proba.return_value = [[0.2, 0.8]]
+        response = client.post("/predict?explain=true", json=get_valid_payload_churn())
+
+    assert response.status_code == 422
+
+
+def test_predict_early_exit_reports_trees_evaluated(small_forest):
+    with patch("main.ml_model", small_forest):
+        full = client.post("/predict", json=get_valid_payload_churn()).json()
+        early = client.post("/predict?early_exit=true", json=get_valid_payload_churn()).json()
+        records = [get_valid_payload_churn(), {"age": 12}, get_valid_payload_loyal()]
+        budget = client.post("/predict/batch?max_trees=3", json={"records": records}).json()
+
+    assert "trees_evaluated" not in full
+    assert 1 <= early["trees_evaluated"] <= small_forest.n_estimators
+    assert early["prediction"] == full["prediction"]
+    results = budget["results"]
+    assert results[0]["trees_evaluated"] == results[2]["trees_evaluated"] == 3
+    assert "trees_evaluated" not in results[1]
+
+
+def test_early_exit_requires_a_forest_and_a_positive_budget(small_forest):
+    with patch("main.ml_model") as mock_model:
+        mock_model.predict_proba.return_value = [[0.2, 0.8]]
+        response = client.post("/predict?early_exit=true", json=get_valid_payload_churn())
+    assert response.status_code == 422
+
+    with patch("main.ml_model", small_forest):
+        response = client.post("/predict?max_trees=0", json=get_valid_payload_churn())
+    assert response.status_code == 422
+
+
+def test_threshold_sweep_uses_labelled_history():
+    from database import EmployeeHistory
+
+    db = TestingSessionLocal()
+    db.add_all(EmployeeHistory(**get_valid_payload_churn(), target_churn=i % 2) for i in range(10))
+    db.commit()
+    db.close()
+
+    # Modèle imposé neuf : ses scores sont calculés, pas repris du cache
+    with patch("main.ml_model") as mock_model:
+        mock_model.predict_proba.side_effect = lambda X: [[0.3, 0.7]] * len(X)
+        response = client.get("/model/threshold/sweep", params={"start": 0.5, "stop": 0.8})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["n_labelled"] == 10 and data["positives"] == 5
+    assert [point["alerts"] for point in data["grid"]][:3] == [10, 10, 10]
+    assert data["grid"][-1]["alerts"] == 0  # Seuil 0.8 > 0.7
+    assert data["current"]["precision"] == pytest.approx(0.5)
+
+
+def test_threshold_sweep_without_history_is_a_conflict():
+    with patch("main.ml_model") as mock_model:
+        mock_model.predict_proba.return_value = [[0.2, 0.8]]
+        response = client.get("/model/threshold/sweep")
+
+    assert response.status_code == 409
+
+
+def test_population_scoring_and_top_k(admin_token):
+    from database import EmployeeHistory
+
+    db = TestingSessionLocal()
+    for i, age in enumerate((25, 55, 40)):
+        db.add(EmployeeHistory(**(get_valid_payload_churn() | {"age": age}), id_employee=i))
+    db.commit()
+    db.close()
+
+    with patch("main.ml_model") as mock_model:
+        mock_model.predict_proba.side_effect = lambda X: [[1 - x[3] / 100, x[3] / 100] for x in X]
+        assert client.get("/population/top").status_code == 409
+
+        stats = client.post("/admin/population/score", headers=ADMIN_HEADERS).json()
+        top = client.get("/population/top", params={"k": 2}).json()
+
+    assert stats["scored"] == 3
+    assert [item["id_employee"] for item in top["items"]] == [1, 2]
+    assert top["items"][0]["employee"]["age"] == 55
+    assert top["items"][0]["prediction"] == 1
+
+
+def test_prediction_columnar_json_and_matrix():
+    """/predict/columnar : colonnes JSON ou matrice binaire, réponse dans le même format."""
+    from app.services.columnar import MATRIX_CONTENT_TYPE, decode_matrix, encode_matrix
+
+    rows = [get_valid_payload_churn(), get_valid_payload_churn() | {"age": 12}]
+    columns = {field: [row[field] for row in rows] for field in rows[0]}
+
+    with patch("main.ml_model") as mock_model:
+        mock_model.predict_proba.side_effect = lambda X: np.tile([0.2, 0.8], (len(X), 1))
+        response = client.post("/predict/columnar", json=columns)
+        fields = list(columns)
+        matrix = np.array([[row[field] for field in fields] for row in rows], dtype="<f4")
+        binary = client.post(
+            "/predict/columnar",
+            content=encode_matrix(matrix, fields, "<f4"),
+            headers={"Content-Type": MATRIX_CONTENT_TYPE},
+        )
+        unsupported = client.post(
+            "/predict/columnar", content=b"x", headers={"Content-Type": "text/csv"}
+        )
+
+    data = response.json()
+    assert data["n_valid"] == 1
+    assert data["prediction"] == [1, None]
+    assert data["errors"][0]["index"] == 1
+    assert data["errors"][0]["errors"][0]["loc"] == ["age"]
+
+    assert binary.headers["content-type"] == MATRIX_CONTENT_TYPE
+    header, results = decode_matrix(binary.content)
+    assert header["n_valid"] == 1
+    np.testing.assert_allclose(results[0], [1, 0.8])
+    assert results[1, 0] == -1
+
+    assert unsupported.status_code == 415
+    db = TestingSessionLocal()
+    assert db.query(PredictionLog).filter(PredictionLog.age == 28).count() == 2
+    db.close()
+
+
+def test_prediction_columnar_is_scored_in_chunks():
+    """Lot découpé en tranches de COLUMNAR_CHUNK_ROWS ; taille maximale vérifiée (413)."""
+    columns = {field: [value] * 5 for field, value in get_valid_payload_churn().items()}
+    calls = []
+
+    def predict_proba(X):
+        calls.append(len(X))
+        return np.tile([0.2, 0.8], (len(X), 1))
+
+    with patch("main.ml_model") as mock_model, patch("main.COLUMNAR_CHUNK_ROWS", 2):
+        mock_model.predict_proba.side_effect = predict_proba
+        response = client.post("/predict/columnar", json=columns)
+        with patch("main.COLUMNAR_MAX_ROWS", 4):
+            too_large = client.post("/predict/columnar", json=columns)
+
+    assert response.status_code == 200
+    assert response.json()["prediction"] == [1] * 5
+    assert calls == [2, 2, 1]
+    assert too_large.status_code == 413
+
+
+def test_admission_rejects_over_capacity_with_retry_after():
+    """Au-delà de la concurrence et de la file : 503 immédiat, hors routes /predict*."""
+    import main
+
+    with (
+        patch.object(main.admission, "max_concurrency", 1),
+        patch.object(main.admission, "queue_size", 0),
+        patch.object(main.admission, "in_flight", 1),
+    ):
+        response = client.post("/predict", json=get_valid_payload_churn())
+        assert client.get("/").status_code == 200
+        stats = client.get("/admission/stats").json()["admission"]
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert stats["rejected_queue_full"] >= 1
+
+
+def test_database_failure_returns_503_or_degraded_prediction():
+    """Échec d'écriture des logs : 503 + Retry-After, ou prédiction sans log en mode dégradé."""
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import Session
+
+    import main
+
+    failure = OperationalError("INSERT", {}, Exception("database is locked"))
+    with patch("main.ml_model") as mock_model, patch.object(Session, "flush", side_effect=failure):
+        mock_model.predict_proba.return_value = [[0.2, 0.8]]
+        unavailable = client.post("/predict", json=get_valid_payload_churn())
+
+        with patch.object(main.degraded_mode, "enabled", True):
+            degraded = client.post("/predict", json=get_valid_payload_churn())
+            assert client.get("/admission/stats").json()["degraded_mode"]["active"]
+
+    assert unavailable.status_code == 503
+    assert "retry-after" in unavailable.headers
+    assert degraded.status_code == 200
+    assert degraded.json()["prediction"] == 1
+    assert degraded.json()["log_id"] is None
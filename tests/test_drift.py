@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+
+from app.models.registry import ModelVersion
+from app.services.drift import (
+    DriftMonitor,
+    LazyDriftMonitor,
+    compute_baseline,
+    ks_binned,
+    load_baseline,
+    psi,
+)
+
+FEATURES = ["age", "ratio", "flag"]
+
+
+def training_set(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack(
+        [
+            rng.integers(18, 60, n),
+            rng.random(n),
+            rng.integers(0, 2, n),
+        ]
+    ).astype(float)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def baseline():
+    return compute_baseline(training_set(), FEATURES, probas=np.linspace(0, 1, 2000))
+
+
+def test_baseline_bins_discrete_and_continuous(baseline):
+    """Variable binaire : une classe par modalité ; continue : déciles."""
+    assert len(baseline["features"]["flag"]["edges"]) == 1
+    assert len(baseline["features"]["ratio"]["edges"]) == 9
+    assert sum(baseline["features"]["ratio"]["proportions"]) == pytest.approx(1.0)
+
+
+def test_psi_and_ks_are_zero_for_identical_distributions():
+    p = np.array([0.2, 0.3, 0.5])
+    assert psi(p, p) == 0.0
+    assert ks_binned(p, p) == 0.0
+    assert psi(p, np.array([0.6, 0.3, 0.1])) > 0.2
+
+
+def test_streaming_aggregates_match_numpy(baseline):
+    """Moyenne et variance cumulées par lots = calcul direct sur toutes les lignes."""
+    monitor = DriftMonitor(baseline, FEATURES, clock=FakeClock())
+    X = training_set(500, seed=1)
+    for batch in np.array_split(X, 7):
+        monitor.observe(batch, [0.5] * len(batch))
+
+    report = monitor.report()
+
+    assert report["count"] == 500
+    for j, feature in enumerate(FEATURES):
+        assert report["features"][feature]["mean"] == pytest.approx(X[:, j].mean())
+        assert report["features"][feature]["std"] == pytest.approx(X[:, j].std())
+    assert report["probability"]["mean"] == pytest.approx(0.5)
+
+
+def test_shifted_inputs_are_flagged(baseline):
+    monitor = DriftMonitor(baseline, FEATURES, clock=FakeClock())
+    monitor.observe(training_set(1000, seed=2))
+    assert monitor.report()["drifting_features"] == []
+
+    shifted = training_set(1000, seed=3)
+    shifted[:, 0] += 20  # Population nettement plus âgée
+    monitor.observe(shifted)
+    assert monitor.report()["drifting_features"] == ["age"]
+
+
+def test_time_windows_are_bounded(baseline):
+    """Seules les `max_windows` dernières fenêtres sont gardées ; `windows` filtre le rapport."""
+    clock = FakeClock()
+    monitor = DriftMonitor(baseline, FEATURES, window_seconds=60, max_windows=3, clock=clock)
+    for minute in range(5):
+        clock.now = minute * 60
+        monitor.observe(training_set(10, seed=minute))
+
+    assert monitor.report()["windows"] == 3
+    assert monitor.report()["count"] == 30
+    assert monitor.report(windows=1)["count"] == 10
+
+
+def test_missing_probabilities_are_ignored(baseline):
+    """Modèle sans predict_proba : seules les features sont suivies."""
+    monitor = DriftMonitor(baseline, FEATURES, clock=FakeClock())
+    monitor.observe(training_set(10), [None] * 10)
+
+    report = monitor.report()
+    assert report["count"] == 10
+    assert report["probability"] is None
+
+
+class ConstantModel:
+    def __init__(self, proba):
+        self.proba = proba
+
+    def predict_proba(self, X):
+        return np.column_stack([np.full(len(X), 1 - self.proba), np.full(len(X), self.proba)])
+
+
+@pytest.fixture
+def lazy_monitor(tmp_path):
+    import pandas as pd
+
+    csv_path = tmp_path / "training.csv"
+    pd.DataFrame(training_set(500), columns=FEATURES).to_csv(csv_path, sep=";", index=False)
+    return LazyDriftMonitor(FEATURES, path=tmp_path / "baseline.json", csv_path=csv_path)
+
+
+def test_lazy_monitor_builds_reference_on_first_use(lazy_monitor):
+    """Rien n'est lu avant `ensure()` ; les prédictions antérieures ne sont pas suivies."""
+    lazy_monitor.observe(training_set(10), [0.5] * 10, "v1")
+    assert lazy_monitor.monitor is None and not lazy_monitor.path.exists()
+
+    monitor = lazy_monitor.ensure()
+
+    assert monitor.report()["count"] == 0
+    assert load_baseline(lazy_monitor.path)["count"] == 500
+
+
+def test_probability_reference_follows_model_version(lazy_monitor):
+    """Rechargement à chaud : nouvelle référence des probabilités, anciens scores écartés."""
+    v1 = ModelVersion(ConstantModel(0.2), 0.5, FEATURES, "v1", "pickle")
+    v2 = ModelVersion(ConstantModel(0.8), 0.5, FEATURES, "v2", "pickle")
+    lazy_monitor.ensure(v1).observe(training_set(50), [0.2] * 50, "v1")
+    assert lazy_monitor.monitor.report()["probability"]["psi"] == pytest.approx(0.0)
+
+    lazy_monitor.observe(training_set(20), [0.8] * 20, "v2")
+    report = lazy_monitor.monitor.report()
+    assert report["count"] == 70
+    assert report["probability"]["count"] == 20
+    assert report["probability"]["psi"] is None  # Référence de v1 : pas de comparaison
+
+    report = lazy_monitor.ensure(v2).report()
+    assert report["probability"]["baseline_mean"] == pytest.approx(0.8)
+    assert report["probability"]["psi"] == pytest.approx(0.0)
+    assert load_baseline(lazy_monitor.path)["probability"]["model_version"] == "v2"
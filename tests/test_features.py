@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from app.models.features import DEFAULT_FEATURES, FeatureBuilder, FeatureSchemaError
+from app.schemas import InputData
+
+EXAMPLE = InputData.model_config["json_schema_extra"]["example"]
+
+
+def test_build_row_follows_model_column_order():
+    """Le vecteur suit l'ordre des colonnes du modèle, pas celui du schéma."""
+    features = list(reversed(DEFAULT_FEATURES))
+    builder = FeatureBuilder(features)
+
+    row = builder.build_row(InputData(**EXAMPLE))
+
+    assert row.shape == (1, len(features))
+    assert row[0, 0] == EXAMPLE["poste_consultant"]
+    assert row[0, -1] == EXAMPLE["ratio_surcharge_anciennete"]
+
+
+def test_build_matrix_matches_dict_variant():
+    """Les variantes objets et dictionnaires produisent la même matrice."""
+    builder = FeatureBuilder(DEFAULT_FEATURES)
+    items = [InputData(**EXAMPLE), InputData(**{**EXAMPLE, "age": 30})]
+
+    matrix = builder.build_matrix(items)
+
+    assert matrix.shape == (2, 10)
+    assert matrix[1, DEFAULT_FEATURES.index("age")] == 30
+    np.testing.assert_array_equal(
+        matrix, builder.build_matrix_from_dicts([item.model_dump() for item in items])
+    )
+
+
+def test_feature_mismatch_fails_at_build_time():
+    """Un pickle dont les features divergent du schéma est rejeté dès la compilation."""
+    with pytest.raises(FeatureSchemaError):
+        FeatureBuilder([*DEFAULT_FEATURES[:-1], "poste_Manager"])
+
+
+def test_non_finite_values_are_rejected_by_schema():
+    """NaN et infinis sont refusés dès la validation (422), avant le modèle."""
+    from pydantic import ValidationError
+
+    with pytest.raises(ValidationError):
+        InputData(**{**EXAMPLE, "ratio_surcharge_anciennete": float("nan")})
+    with pytest.raises(ValidationError):
+        InputData(**{**EXAMPLE, "ratio_surcharge_anciennete": float("inf")})
@@ -0,0 +1,141 @@
+import itertools
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.models.features import DEFAULT_FEATURES
+from app.models.forest import (
+    CompiledForest,
+    ForestParityError,
+    ServingForest,
+    check_parity,
+    load_parity_dataset,
+)
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    """Features du modèle et cible extraites de final_data_set.csv."""
+    import pandas as pd
+
+    df = pd.read_csv("final_data_set.csv", sep=";")
+    return df[DEFAULT_FEATURES].to_numpy(dtype=np.float64), df["a_quitte_l_entreprise"].to_numpy()
+
+
+@pytest.fixture(scope="module")
+def forest(dataset):
+    X, y = dataset
+    return RandomForestClassifier(n_estimators=25, max_depth=8, random_state=42).fit(X, y)
+
+
+def test_compiled_forest_matches_sklearn(forest):
+    """Parité stricte avec sklearn sur tout le dataset d'entraînement."""
+    compiled = CompiledForest.from_sklearn(forest)
+    X = load_parity_dataset(DEFAULT_FEATURES)
+
+    assert compiled.n_trees == 25
+    assert compiled.max_depth == max(tree.tree_.max_depth for tree in forest.estimators_)
+    assert check_parity(compiled, forest, X, atol=1e-12) <= 1e-12
+    np.testing.assert_array_equal(compiled.predict(X), forest.predict(X))
+
+
+def test_parity_error_on_divergence(forest, dataset):
+    """Une forêt altérée est détectée par le mode parité."""
+    compiled = CompiledForest.from_sklearn(forest)
+    compiled.value = 1.0 - compiled.value
+
+    with pytest.raises(ForestParityError):
+        check_parity(compiled, forest, dataset[0][:50])
+
+
+def test_early_exit_agrees_with_full_evaluation(forest, dataset):
+    """Décisions identiques (à delta près) avec moins d'arbres évalués en moyenne."""
+    compiled = CompiledForest.from_sklearn(forest)
+    X, threshold = dataset[0], 0.3
+    full = compiled.predict_proba(X)[:, 1]
+
+    probas, trees = compiled.predict_proba_early_exit(X, threshold, block=5)
+
+    assert ((probas >= threshold) == (full >= threshold)).mean() >= 0.99
+    assert trees.mean() < compiled.n_trees
+    complete = trees == compiled.n_trees
+    np.testing.assert_allclose(probas[complete], full[complete])
+
+
+def test_early_exit_paths_agree(forest, dataset):
+    """Parcours scalaire (ligne par ligne) et par blocs (grand lot) : mêmes arrêts."""
+    compiled = CompiledForest.from_sklearn(forest)
+    X = dataset[0][:300]
+
+    probas, trees = compiled.predict_proba_early_exit(X, 0.3, block=5)
+    rows = [compiled.predict_proba_early_exit(X[i : i + 1], 0.3, block=5) for i in range(300)]
+
+    np.testing.assert_array_equal(trees, np.concatenate([row[1] for row in rows]))
+    np.testing.assert_allclose(probas, np.concatenate([row[0] for row in rows]))
+
+
+@pytest.mark.parametrize("rows", [1, 50, 300])
+def test_early_exit_respects_tree_budget(forest, dataset, rows):
+    compiled = CompiledForest.from_sklearn(forest)
+    X = dataset[0][:rows]
+
+    probas, trees = compiled.predict_proba_early_exit(X, 0.3, max_trees=7, block=5)
+
+    assert trees.max() <= 7
+    first_trees = compiled.value[compiled.apply(X)[:, :7]].mean(axis=1)
+    np.testing.assert_allclose(probas[trees == 7], first_trees[trees == 7])
+
+    # Sans early_exit, max_trees est un simple plafond : pas de règle d'arrêt
+    capped, capped_trees = compiled.predict_proba_early_exit(
+        X, 0.3, max_trees=7, block=5, early_exit=False
+    )
+    assert (capped_trees == 7).all()
+    np.testing.assert_allclose(capped, first_trees)
+
+
+def test_serving_forest_delegates_large_batches(forest, dataset):
+    """Au-delà de max_compiled_rows, le moteur de service délègue à sklearn."""
+    compiled = CompiledForest.from_sklearn(forest)
+    compiled.value = np.zeros_like(compiled.value)  # Rend les deux moteurs distinguables
+    engine = ServingForest(compiled, forest, max_compiled_rows=10)
+
+    X = dataset[0][:20]
+    assert engine.predict_proba(X[:5])[:, 1].max() == 0.0
+    np.testing.assert_allclose(engine.predict_proba(X), forest.predict_proba(X))
+
+
+@pytest.mark.parametrize("value", [np.nan, 1e300])
+def test_non_finite_input_is_rejected(forest, dataset, value):
+    """NaN (routage sklearn non reproduit) et valeurs hors float32 sont refusés."""
+    compiled = CompiledForest.from_sklearn(forest)
+    X = dataset[0][:3].copy()
+    X[1, 0] = value
+
+    with pytest.raises(ValueError):
+        compiled.predict_proba(X)
+
+
+def saabas_reference(forest, x: np.ndarray) -> np.ndarray:
+    """Décomposition de Saabas calculée arbre par arbre via `decision_path` de sklearn."""
+    contributions = np.zeros(len(x))
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        proba = tree.value[:, 0, 1] / tree.value[:, 0, :].sum(axis=1)
+        path = estimator.decision_path(x.reshape(1, -1).astype(np.float32)).indices
+        for parent, child in itertools.pairwise(path):
+            contributions[tree.feature[parent]] += proba[child] - proba[parent]
+    return contributions / len(forest.estimators_)
+
+
+def test_explanations_decompose_probabilities(forest, dataset):
+    """Contributions identiques au calcul arbre par arbre et somme égale à la probabilité."""
+    compiled = CompiledForest.from_sklearn(forest)
+    X = dataset[0][:200]
+
+    probas, contributions = compiled.explain(X)
+
+    np.testing.assert_allclose(probas, forest.predict_proba(X)[:, 1], atol=1e-12)
+    np.testing.assert_allclose(compiled.base_value + contributions.sum(axis=1), probas, atol=1e-12)
+    for i in (0, 17, 199):
+        np.testing.assert_allclose(contributions[i], saabas_reference(forest, X[i]), atol=1e-12)
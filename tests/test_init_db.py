@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.pool import StaticPool
+
+from database import Base, EmployeeHistory
+from init_db import init_database
+
+CSV_SOURCE = "final_data_set.csv"
+
+
+@pytest.fixture
+def engine_test():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+
+
+def load_rows(engine):
+    with engine.connect() as conn:
+        rows = conn.execute(select(EmployeeHistory.__table__)).mappings().all()
+    return {row["id_employee"]: row for row in rows}
+
+
+def test_bulk_load_maps_csv_columns(engine_test):
+    """Le chargement par paquets reprend toutes les lignes et les bons types."""
+    assert init_database(CSV_SOURCE, chunk_size=500, bind=engine_test) == 1470
+
+    source = pd.read_csv(CSV_SOURCE, sep=";").set_index("id_employee")
+    rows = load_rows(engine_test)
+    assert len(rows) == 1470
+
+    employee_id = int(source.index[0])
+    row = rows[employee_id]
+    expected = source.loc[employee_id]
+    assert row["target_churn"] == expected["a_quitte_l_entreprise"]
+    assert row["statut_marital_marie"] == expected["statut_marital_Marié(e)"]
+    assert row["poste_representant_commercial"] == expected["poste_Représentant Commercial"]
+    assert row["ratio_surcharge_anciennete"] == pytest.approx(
+        expected["ratio_surcharge_anciennete"]
+    )
+    assert isinstance(row["niveau_education"], int)
+
+
+def test_upsert_only_touches_changed_rows(engine_test, tmp_path):
+    """Un rechargement met à jour les lignes modifiées sans dupliquer les autres."""
+    source = pd.read_csv(CSV_SOURCE, sep=";").head(50)
+    path = tmp_path / "employees.csv"
+    source.to_csv(path, sep=";", index=False)
+    init_database(str(path), bind=engine_test)
+    before = load_rows(engine_test)
+
+    changed_id = int(source.loc[0, "id_employee"])
+    source.loc[0, "age"] = 99
+    extra = source.tail(1).assign(id_employee=999_999)
+    pd.concat([source, extra]).to_csv(path, sep=";", index=False)
+    init_database(str(path), bind=engine_test)
+    after = load_rows(engine_test)
+
+    assert len(after) == 51
+    assert after[changed_id]["age"] == 99
+    assert after[changed_id]["updated_at"] > before[changed_id]["updated_at"]
+    unchanged_id = int(source.loc[1, "id_employee"])
+    assert after[unchanged_id]["updated_at"] == before[unchanged_id]["updated_at"]
+
+
+def test_replace_mode_reloads_table(engine_test):
+    init_database(CSV_SOURCE, bind=engine_test)
+    init_database(CSV_SOURCE, mode="replace", bind=engine_test)
+    assert len(load_rows(engine_test)) == 1470
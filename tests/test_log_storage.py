@@ -0,0 +1,113 @@
+import datetime
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+
+from app.services.log_storage import (
+    backfill_feature_columns,
+    compact_logs,
+    month_start,
+    partition_ddl,
+)
+from database import Base, PredictionLog, PredictionLogDaily
+
+NOW = datetime.datetime(2026, 6, 15, 12, 0)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def log(days_ago: float, age: int, prediction: int, probability: float, version="v1"):
+    return {
+        "timestamp": NOW - datetime.timedelta(days=days_ago),
+        "age": age,
+        "prediction": prediction,
+        "probability": probability,
+        "model_version": version,
+    }
+
+
+def test_backfill_moves_json_inputs_to_typed_columns(engine):
+    """Les logs historiques (features en JSON) sont recopiés dans les colonnes typées."""
+    with engine.begin() as conn:
+        conn.execute(
+            insert(PredictionLog),
+            [
+                {"inputs": {"age": 30 + i, "poste_consultant": 1.0}, "prediction": 0}
+                for i in range(7)
+            ],
+        )
+
+    assert backfill_feature_columns(engine, batch_size=3) == 7
+    assert backfill_feature_columns(engine) == 0  # Idempotent
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(PredictionLog.age, PredictionLog.poste_consultant, PredictionLog.inputs)
+        ).all()
+    assert [row.age for row in rows] == list(range(30, 37))
+    assert all(row.poste_consultant == 1.0 and row.inputs is None for row in rows)
+
+
+def test_compaction_rolls_expired_logs_into_daily_aggregates(engine):
+    with engine.begin() as conn:
+        conn.execute(
+            insert(PredictionLog),
+            [
+                log(100.5, 30, 1, 0.9),
+                log(100.4, 50, 0, 0.1),
+                log(100.3, 40, 0, 0.2, version="v2"),
+                log(1, 45, 1, 0.7),  # Récent : conservé tel quel
+            ],
+        )
+
+    report = compact_logs(engine, retention_days=90, archive_dir=None, now=NOW)
+
+    assert report["compacted"] == 3
+    assert report["deleted"] == 3
+    with engine.connect() as conn:
+        assert conn.execute(select(PredictionLog.age)).scalars().all() == [45]
+        daily = {row.model_version: row for row in conn.execute(select(PredictionLogDaily)).all()}
+    assert daily["v1"].day == (NOW - datetime.timedelta(days=100.5)).date()
+    assert daily["v1"].n_predictions == 2
+    assert daily["v1"].n_churn == 1
+    assert daily["v1"].probability_sum == pytest.approx(1.0)
+    assert daily["v1"].feature_means["age"] == pytest.approx(40)
+    assert daily["v2"].n_predictions == 1
+
+
+def test_late_logs_are_merged_into_existing_aggregate(engine):
+    for age in (30, 60):
+        with engine.begin() as conn:
+            conn.execute(insert(PredictionLog), [log(100.5, age, 1, 0.5)])
+        compact_logs(engine, retention_days=90, archive_dir=None, now=NOW)
+
+    with engine.connect() as conn:
+        (daily,) = conn.execute(select(PredictionLogDaily)).all()
+    assert daily.n_predictions == 2
+    assert daily.feature_means["age"] == pytest.approx(45)
+
+
+def test_sqlite_rollover_archives_expired_logs(engine, tmp_path):
+    with engine.begin() as conn:
+        conn.execute(insert(PredictionLog), [log(100, 30, 1, 0.9), log(1, 45, 1, 0.7)])
+
+    report = compact_logs(engine, retention_days=90, archive_dir=tmp_path / "archive", now=NOW)
+
+    assert report["archived"] == 1
+    (archive_path,) = (tmp_path / "archive").iterdir()
+    with sqlite3.connect(archive_path) as archive:
+        assert archive.execute("SELECT age FROM prediction_logs").fetchall() == [(30,)]
+
+
+def test_monthly_partition_bounds():
+    assert month_start(datetime.date(2026, 12, 31), 1) == datetime.date(2027, 1, 1)
+    assert partition_ddl(datetime.date(2026, 12, 1)) == (
+        "CREATE TABLE IF NOT EXISTS prediction_logs_2026_12 PARTITION OF prediction_logs "
+        "FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')"
+    )
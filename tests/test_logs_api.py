@@ -0,0 +1,100 @@
+import csv
+import datetime
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import main
+from database import Base, PredictionLog
+
+START = datetime.datetime(2026, 3, 1, 8, 0)
+
+
+@pytest.fixture
+def client(tmp_path):
+    """API branchée sur une base SQLite contenant 25 logs (un par minute)."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(PredictionLog),
+            [
+                {
+                    # Deux logs par horodatage : l'id départage les égalités
+                    "timestamp": START + datetime.timedelta(minutes=i // 2),
+                    "age": 20 + i,
+                    "prediction": i % 2,
+                    "probability": i / 25,
+                    "model_version": "v2" if i >= 20 else "v1",
+                }
+                for i in range(25)
+            ],
+        )
+    Session = sessionmaker(bind=engine)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous = main.app.dependency_overrides.get(main.get_db)
+    main.app.dependency_overrides[main.get_db] = override_get_db
+    yield TestClient(main.app)
+    main.app.dependency_overrides[main.get_db] = previous
+
+
+def test_keyset_pagination_walks_all_logs_once(client):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 7} | ({"cursor": cursor} if cursor else {})
+        page = client.get("/logs", params=params).json()
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert ids == list(range(25, 0, -1))  # Du plus récent au plus ancien, sans doublon
+
+
+def test_filters_combine(client):
+    params = {
+        "prediction": 1,
+        "min_probability": 0.2,
+        "max_probability": 0.6,
+        "model_version": "v1",
+        "start": (START + datetime.timedelta(minutes=3)).isoformat(),
+    }
+    items = client.get("/logs", params=params).json()["items"]
+
+    assert [item["age"] for item in items] == [35, 33, 31, 29, 27]
+    assert all(item["prediction"] == 1 and item["model_version"] == "v1" for item in items)
+
+
+def test_invalid_cursor_and_probability_band_are_rejected(client):
+    assert client.get("/logs", params={"cursor": "pas-un-curseur"}).status_code == 422
+    params = {"min_probability": 0.8, "max_probability": 0.2}
+    assert client.get("/logs", params=params).status_code == 422
+
+
+def test_csv_export_streams_filtered_rows(client):
+    response = client.get("/logs/export", params={"model_version": "v2"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row["age"]) for row in rows] == [44, 43, 42, 41, 40]
+    assert rows[0]["timestamp"] == (START + datetime.timedelta(minutes=12)).isoformat()
+
+
+def test_ndjson_export(client):
+    response = client.get("/logs/export", params={"format": "ndjson"})
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 25
+    assert lines[-1]["id"] == 1
@@ -0,0 +1,36 @@
+from app.services.metrics import NULL_TIMER, Histogram, MetricsRegistry
+
+
+def test_histogram_snapshot_is_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"0.1": 1, "1.0": 3, "+Inf": 4}
+    assert snapshot["count"] == 4
+
+
+def test_render_text_exposition_format():
+    registry = MetricsRegistry(enabled=True, namespace="test")
+    with registry.stage("predict"):
+        pass
+    registry.counter("predictions_total", "Prédictions.").inc(3)
+    registry.gauge("model_load_seconds", "Chargement.", {"source": 'pick"le'}).set(0.5)
+
+    text = registry.render()
+
+    assert "# TYPE test_stage_duration_seconds histogram" in text
+    assert 'test_stage_duration_seconds_bucket{stage="predict",le="+Inf"} 1' in text
+    assert 'test_stage_duration_seconds_count{stage="predict"} 1' in text
+    assert "# TYPE test_predictions_total counter\ntest_predictions_total 3.0" in text
+    assert 'test_model_load_seconds{source="pick\\"le"} 0.5' in text
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+
+    assert registry.stage("predict") is NULL_TIMER
+    with registry.stage("predict"):
+        pass
+    assert registry.render() == "\n"
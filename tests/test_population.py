@@ -0,0 +1,90 @@
+import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, insert, select, update
+
+from app.models.features import FIELD_TO_COLUMN
+from app.models.registry import ModelVersion
+from app.services.population import score_population, top_k_query
+from database import Base, EmployeeHistory, EmployeeScore
+
+FIELDS = list(FIELD_TO_COLUMN)
+
+
+class AgeModel:
+    """Probabilité croissante avec l'âge ; mémorise le nombre de lignes scorées."""
+
+    def __init__(self):
+        self.rows = 0
+
+    def predict_proba(self, X):
+        self.rows += len(X)
+        p = X[:, FIELDS.index("age")] / 100
+        return np.column_stack([1 - p, p])
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'population.db'}")
+    Base.metadata.create_all(engine)
+    now = datetime.datetime(2026, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(EmployeeHistory),
+            [
+                {field: 0 for field in FIELDS}
+                | {
+                    "id_employee": i,
+                    "age": 20 + i,
+                    "poste_consultant": float(i % 2),
+                    "updated_at": now,
+                }
+                for i in range(30)
+            ],
+        )
+    return engine
+
+
+def version(model, name="v1"):
+    return ModelVersion(model, 0.5, FIELDS, name, "test")
+
+
+def top(engine, k, **filters):
+    with engine.connect() as conn:
+        rows = conn.execute(top_k_query("v1", k, FIELDS, filters)).all()
+    return [row.id_employee for row in rows]
+
+
+def test_population_is_scored_in_chunks_and_ranked(engine):
+    stats = score_population(engine, version(AgeModel()), FIELDS, chunk_size=7)
+
+    assert stats["scored"] == 30
+    assert top(engine, 3) == [29, 28, 27]
+    assert top(engine, 3, poste_consultant=False, max_age=40) == [20, 18, 16]
+
+
+def test_only_changed_rows_are_rescored(engine):
+    model = AgeModel()
+    score_population(engine, version(model), FIELDS)
+
+    with engine.begin() as conn:
+        conn.execute(
+            update(EmployeeHistory)
+            .where(EmployeeHistory.id_employee.in_([3, 4]))
+            .values(age=99, updated_at=datetime.datetime(2026, 2, 1))
+        )
+        conn.execute(EmployeeHistory.__table__.delete().where(EmployeeHistory.id_employee == 5))
+
+    model.rows = 0
+    stats = score_population(engine, version(model), FIELDS)
+
+    assert model.rows == 2
+    assert stats["removed"] == 1
+    assert top(engine, 2) == [3, 4]
+
+    # Nouvelle version du modèle : toute la population est scorée pour elle
+    score_population(engine, version(model, "v2"), FIELDS)
+    with engine.connect() as conn:
+        versions = conn.execute(select(EmployeeScore.model_version)).scalars().all()
+    assert versions.count("v2") == 29
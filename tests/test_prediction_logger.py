@@ -0,0 +1,128 @@
+import datetime
+import json
+import time
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.services.prediction_logger import PredictionLogWriter
+from database import Base, PredictionLog
+
+engine_test = create_engine(
+    "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine_test)
+
+
+@pytest.fixture(autouse=True)
+def setup_database():
+    Base.metadata.create_all(bind=engine_test)
+    yield
+    Base.metadata.drop_all(bind=engine_test)
+
+
+def make_record(prediction=1):
+    return {
+        "request_id": str(uuid.uuid4()),
+        "timestamp": datetime.datetime.now(),
+        "inputs": {"age": 41},
+        "prediction": prediction,
+        "probability": 0.8,
+    }
+
+
+def count_logs():
+    db = TestingSessionLocal()
+    try:
+        return db.query(PredictionLog).count()
+    finally:
+        db.close()
+
+
+def test_stop_flushes_pending_logs():
+    """À l'arrêt (lifespan), tous les logs en file sont écrits."""
+    writer = PredictionLogWriter(TestingSessionLocal, batch_size=2, flush_interval=60)
+    writer.start()
+    records = [make_record() for _ in range(5)]
+    assert writer.submit_many(records) == 5
+
+    writer.stop()
+
+    assert count_logs() == 5
+    assert writer.stats["written"] == 5
+    db = TestingSessionLocal()
+    assert db.query(PredictionLog).filter_by(request_id=records[0]["request_id"]).count() == 1
+    db.close()
+
+
+def test_drop_policy_counts_overflow():
+    """Politique "drop" : la file pleine rejette et comptabilise les logs perdus."""
+    writer = PredictionLogWriter(TestingSessionLocal, queue_size=2, overflow_policy="drop")
+
+    accepted = writer.submit_many([make_record() for _ in range(3)])
+
+    assert accepted == 2
+    assert writer.stats["dropped"] == 1
+    writer.stop()
+    assert count_logs() == 2
+
+
+def test_block_policy_waits_once_per_batch():
+    """Politique "block" : un lot face à une file pleine n'attend qu'un seul délai."""
+    writer = PredictionLogWriter(
+        TestingSessionLocal, queue_size=1, overflow_policy="block", block_timeout=0.2
+    )
+
+    started = time.monotonic()
+    accepted = writer.submit_many([make_record() for _ in range(20)])
+
+    assert time.monotonic() - started < 1.0
+    assert accepted == 1
+    assert writer.stats["dropped"] == 19
+    writer.stop()
+
+
+def test_spill_policy_writes_overflow_to_disk(tmp_path):
+    """Politique "spill" : le débordement part en JSON Lines sur disque."""
+    spill_path = tmp_path / "spill.jsonl"
+    writer = PredictionLogWriter(
+        TestingSessionLocal, queue_size=1, overflow_policy="spill", spill_path=spill_path
+    )
+
+    writer.submit_many([make_record(), make_record(prediction=0)])
+
+    assert writer.stats["spilled"] == 1
+    spilled = [json.loads(line) for line in spill_path.read_text().splitlines()]
+    assert spilled[0]["prediction"] == 0
+
+
+def test_invalid_overflow_policy():
+    with pytest.raises(ValueError):
+        PredictionLogWriter(TestingSessionLocal, overflow_policy="ignore")
+
+
+def test_migrate_schema_adds_request_id_to_legacy_table():
+    """Une table prediction_logs déployée avant request_id est migrée (idempotent)."""
+    from sqlalchemy import inspect, text
+
+    from database import migrate_schema
+
+    legacy = create_engine("sqlite:///:memory:", poolclass=StaticPool)
+    with legacy.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE prediction_logs (id INTEGER PRIMARY KEY, timestamp DATETIME, "
+                "inputs JSON, prediction INTEGER, probability FLOAT)"
+            )
+        )
+
+    migrate_schema(legacy)
+    migrate_schema(legacy)
+
+    columns = {column["name"] for column in inspect(legacy).get_columns("prediction_logs")}
+    assert "request_id" in columns
+    indexes = {index["name"]: index for index in inspect(legacy).get_indexes("prediction_logs")}
+    assert indexes["ix_prediction_logs_request_id"]["unique"]
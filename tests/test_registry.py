@@ -0,0 +1,101 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.models.features import DEFAULT_FEATURES
+from app.models.registry import ModelLoadError, ModelRegistry, ModelVersion, ReloadInProgress
+
+
+class ConstantModel:
+    def __init__(self, proba: float):
+        self.proba = proba
+
+    def predict_proba(self, X):
+        return np.tile([1 - self.proba, self.proba], (len(X), 1))
+
+
+def make_version(version: str, proba: float = 0.5, features=DEFAULT_FEATURES) -> ModelVersion:
+    return ModelVersion(ConstantModel(proba), 0.3, features, version, "test")
+
+
+def test_reload_swaps_active_version():
+    registry = ModelRegistry(lambda: make_version("v2"), make_version("v1"))
+    in_flight = registry.active
+
+    registry.reload()
+
+    assert registry.active.version == "v2"
+    # Une requête qui a lu la version avant le rechargement la conserve
+    assert in_flight.version == "v1"
+    assert registry.snapshot()["reloads"] == 1
+
+
+@pytest.mark.parametrize(
+    "candidate",
+    [
+        make_version("bad-features", features=list(reversed(DEFAULT_FEATURES))),
+        make_version("bad-output", proba=float("nan")),
+    ],
+)
+def test_invalid_candidate_keeps_serving_version(candidate):
+    registry = ModelRegistry(lambda: candidate, make_version("v1"))
+
+    with pytest.raises(ModelLoadError):
+        registry.reload()
+
+    assert registry.active.version == "v1"
+    assert registry.snapshot()["failures"] == 1
+
+
+def test_concurrent_reload_is_rejected():
+    started, release = threading.Event(), threading.Event()
+
+    def slow_loader():
+        started.set()
+        release.wait(5)
+        return make_version("v2")
+
+    registry = ModelRegistry(slow_loader, make_version("v1"))
+    thread = threading.Thread(target=registry.reload)
+    thread.start()
+    started.wait(5)
+    try:
+        with pytest.raises(ReloadInProgress):
+            registry.reload()
+    finally:
+        release.set()
+        thread.join(5)
+
+    assert registry.active.version == "v2"
+
+
+def test_file_watch_triggers_reload(tmp_path):
+    watched = tmp_path / "manifest.json"
+    watched.write_text("v1")
+    registry = ModelRegistry(lambda: make_version(watched.read_text()), make_version("v1"))
+
+    registry.watch([watched], interval=0.01)
+    try:
+        watched.write_text("v2-changed")
+        deadline = time.monotonic() + 5
+        while registry.active.version != "v2-changed" and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        registry.stop_watch()
+
+    assert registry.active.version == "v2-changed"
+
+
+def test_set_threshold_keeps_model_and_version():
+    initial = make_version("v1")
+    registry = ModelRegistry(lambda: None, initial)
+
+    updated = registry.set_threshold(0.4)
+
+    assert registry.active is updated
+    assert updated.threshold == 0.4
+    assert updated.model is initial.model and updated.version == "v1"
+    with pytest.raises(ValueError):
+        registry.set_threshold(1.5)
@@ -0,0 +1,33 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+import score_csv
+from app.models.features import DEFAULT_FEATURES
+
+
+def test_score_chunk_maps_columns_and_applies_threshold(tmp_path):
+    """Les colonnes sont ramenées aux noms du modèle et le seuil est appliqué."""
+    chunk = pd.read_csv("final_data_set.csv", sep=";", nrows=4)
+    model = MagicMock()
+    model.predict_proba.side_effect = lambda X: np.column_stack(
+        [np.zeros(len(X)), np.linspace(0, 1, len(X))]
+    )
+
+    with (
+        patch.object(score_csv, "_model", model),
+        patch.object(score_csv, "_threshold", 0.5),
+        patch.object(score_csv, "_features", DEFAULT_FEATURES),
+    ):
+        result = score_csv.score_chunk(chunk, "id_employee")
+
+    (X,) = model.predict_proba.call_args.args
+    assert X.shape == (4, len(DEFAULT_FEATURES))
+    assert list(result.columns) == ["id_employee", "prediction", "probability"]
+    assert result["prediction"].tolist() == [0, 0, 1, 1]
+
+    output = tmp_path / "out.csv"
+    score_csv.write_chunk(result, output, "csv", first=True)
+    score_csv.write_chunk(result, output, "csv", first=False)
+    assert len(pd.read_csv(output, sep=";")) == 8
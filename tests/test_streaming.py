@@ -0,0 +1,36 @@
+import asyncio
+
+from app.services.streaming import LineTooLong, iter_chunks, iter_ndjson_lines
+
+
+async def byte_stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def collect(async_iterable):
+    async def run():
+        return [item async for item in async_iterable]
+
+    return asyncio.run(run())
+
+
+def test_lines_split_across_network_chunks():
+    """Les lignes coupées entre deux paquets réseau sont recollées ; les vides ignorées."""
+    lines = collect(iter_ndjson_lines(byte_stream(b'{"a": 1}\n{"a"', b": 2}\n\n", b'{"a": 3}')))
+
+    assert lines == [(1, b'{"a": 1}'), (2, b'{"a": 2}'), (4, b'{"a": 3}')]
+
+
+def test_overlong_line_is_reported_and_skipped():
+    """Une ligne trop longue est signalée sans bufferiser son contenu."""
+    stream = byte_stream(b"x" * 30, b"x" * 30, b"\n", b"ok\n")
+
+    lines = collect(iter_ndjson_lines(stream, max_line_bytes=40))
+
+    assert lines == [(1, LineTooLong), (2, b"ok")]
+
+
+def test_iter_chunks():
+    chunks = collect(iter_chunks(byte_stream(*range(5)), size=2))
+    assert chunks == [[0, 1], [2, 3], [4]]
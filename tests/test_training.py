@@ -0,0 +1,114 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, insert
+
+from app.models.features import DEFAULT_FEATURES, FIELD_TO_COLUMN
+from app.models.ml_model import load_pickle_version
+from app.services import training
+from app.services.calibration import EmptyHistoryError
+from database import Base, EmployeeHistory
+from train_model import append_report, save_package
+
+FIELDS = list(FIELD_TO_COLUMN)
+GRID = {"n_estimators": [10], "max_depth": [3, None]}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """120 employés étiquetés (départ plus probable avant 30 ans), 5 non étiquetés et 1
+    employé aux features incomplètes."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    Base.metadata.create_all(engine)
+    rng = np.random.default_rng(0)
+    rows = [
+        {field: 0 for field in FIELDS}
+        | {
+            "id_employee": i,
+            "age": int(age),
+            "ratio_surcharge_anciennete": float(rng.random()),
+            "target_churn": int(age < 30 or rng.random() < 0.1),
+        }
+        for i, age in enumerate(rng.integers(18, 60, 120))
+    ]
+    rows += [
+        {field: 0 for field in FIELDS} | {"id_employee": 200 + i, "target_churn": None}
+        for i in range(5)
+    ]
+    rows.append(
+        {field: 0 for field in FIELDS} | {"id_employee": 300, "age": None, "target_churn": 1}
+    )
+    with engine.begin() as conn:
+        conn.execute(insert(EmployeeHistory), rows)
+    return engine
+
+
+def test_load_history_is_independent_of_chunk_size(engine):
+    X, y, skipped = training.load_history(engine, FIELDS, chunk_size=1000)
+    X_small, y_small, _ = training.load_history(engine, FIELDS, chunk_size=7)
+
+    assert X.shape == (120, len(FIELDS)) and skipped == 1
+    np.testing.assert_array_equal(X, X_small)
+    np.testing.assert_array_equal(y, y_small)
+
+
+def test_load_history_requires_labels(tmp_path):
+    empty = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    Base.metadata.create_all(empty)
+    with pytest.raises(EmptyHistoryError):
+        training.load_history(empty, FIELDS)
+
+
+def test_cross_validation_does_not_depend_on_pool_size(engine, monkeypatch):
+    X, y, _ = training.load_history(engine, FIELDS)
+    candidates = training.expand_grid(GRID)
+    oof, auc, workers = training.cross_validate(X, y, candidates, folds=3, max_workers=1)
+
+    monkeypatch.setattr(training.os, "cpu_count", lambda: 2)
+    oof_pool, auc_pool, pool_workers = training.cross_validate(
+        X, y, candidates, folds=3, max_workers=8
+    )
+
+    assert (workers, pool_workers) == (1, 2)
+    np.testing.assert_array_equal(oof, oof_pool)
+    np.testing.assert_array_equal(auc, auc_pool)
+
+
+def test_choose_threshold_targets_recall():
+    probas = np.array([0.1, 0.2, 0.3, 0.6, 0.7, 0.9])
+    labels = np.array([0, 1, 0, 0, 1, 1])
+
+    # Seuil le plus haut gardant 2 départs sur 3
+    assert training.choose_threshold(probas, labels, 0.6)["threshold"] == 0.7
+    assert training.choose_threshold(probas, labels, 1.0)["threshold"] == 0.2
+
+
+def test_train_writes_a_loadable_package(engine, tmp_path):
+    package, report = training.train(engine, param_grid=GRID, folds=3, max_workers=1)
+    again, _ = training.train(engine, param_grid=GRID, folds=3, max_workers=1)
+
+    assert set(package) == {"model", "threshold", "features"}
+    assert package["features"] == DEFAULT_FEATURES
+    assert report["rows"] == 120 and report["skipped"] == 1
+    assert len(report["candidates"]) == 2
+    assert set(report["seconds"]) == {"load", "cross_validation", "final_fit", "total"}
+    assert report["peak_rss_mb"]["parent"] > 0
+    assert report["validation"]["recall"] >= training.TRAINING_TARGET_RECALL
+
+    # Entraînement reproductible (même graine, mêmes données)
+    X = pd.DataFrame(np.zeros((3, len(DEFAULT_FEATURES))), columns=DEFAULT_FEATURES)
+    X["age"] = [20, 40, 55]
+    assert again["threshold"] == package["threshold"]
+    np.testing.assert_array_equal(
+        again["model"].predict_proba(X), package["model"].predict_proba(X)
+    )
+
+    path = tmp_path / "trained.pkl"
+    save_package(package, path)
+    append_report(report, tmp_path / "runs.jsonl")
+    version = load_pickle_version(path)
+    assert version.threshold == package["threshold"]
+    assert version.features == DEFAULT_FEATURES
+    assert json.loads((tmp_path / "runs.jsonl").read_text())["rows"] == 120
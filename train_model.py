@@ -0,0 +1,97 @@
+import argparse
+import json
+import pickle
+from pathlib import Path
+
+from app.services.training import (
+    PARAM_GRID,
+    TRAINING_CHUNK_SIZE,
+    TRAINING_CV_FOLDS,
+    TRAINING_MAX_WORKERS,
+    TRAINING_SEED,
+    TRAINING_TARGET_RECALL,
+    train,
+)
+from database import engine, init_schema
+
+# ==========================================
+# Configuration
+# ==========================================
+BASE_DIR = Path(__file__).resolve().parent
+# Le modèle en service (modele_churn_light.pkl) n'est remplacé que sur demande (--output)
+OUTPUT_PATH = BASE_DIR / "model" / "modele_churn_trained.pkl"
+# Historique des entraînements (une ligne JSON par exécution)
+REPORT_PATH = BASE_DIR / "model" / "training_runs.jsonl"
+
+
+def save_package(package: dict, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        pickle.dump(package, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def append_report(report: dict, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(report) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Réentraîne le modèle (SMOTE + RandomForest) sur employees_history."
+    )
+    parser.add_argument("--csv", help="Historique à charger d'abord (upsert init_db.py)")
+    parser.add_argument("-o", "--output", type=Path, default=OUTPUT_PATH, help="Package pickle")
+    parser.add_argument("--report", type=Path, default=REPORT_PATH, help="Historique JSONL")
+    parser.add_argument("--max-workers", type=int, default=TRAINING_MAX_WORKERS)
+    parser.add_argument("--folds", type=int, default=TRAINING_CV_FOLDS)
+    parser.add_argument("--target-recall", type=float, default=TRAINING_TARGET_RECALL)
+    parser.add_argument("--seed", type=int, default=TRAINING_SEED)
+    parser.add_argument("--chunk-size", type=int, default=TRAINING_CHUNK_SIZE)
+    parser.add_argument(
+        "--param-grid", type=json.loads, default=PARAM_GRID, help="Grille JSON (nom -> valeurs)"
+    )
+    args = parser.parse_args()
+
+    init_schema(engine)
+    if args.csv:
+        from init_db import init_database
+
+        init_database(args.csv, mode="upsert", chunk_size=args.chunk_size)
+
+    print(f"🏋️ Entraînement sur employees_history ({args.folds} plis)...")
+    package, report = train(
+        engine,
+        param_grid=args.param_grid,
+        folds=args.folds,
+        target_recall=args.target_recall,
+        seed=args.seed,
+        max_workers=args.max_workers,
+        chunk_size=args.chunk_size,
+    )
+    save_package(package, args.output)
+    append_report(report | {"output": str(args.output)}, args.report)
+
+    validation, seconds = report["validation"], report["seconds"]
+    print(
+        f"✅ {report['rows']} employés ({report['positives']} départs, {report['skipped']} "
+        f"ignorés), {len(report['candidates'])} candidats sur {report['workers']} processus."
+    )
+    print(f"🏆 Hyperparamètres : {report['best_params']}")
+    print(
+        f"📈 Validation : ROC-AUC {validation['roc_auc']:.3f} ± {validation['roc_auc_std']:.3f}, "
+        f"rappel {validation['recall']:.1%}, précision {validation['precision']:.1%} "
+        f"au seuil {report['threshold']}"
+    )
+    print(
+        f"⏱️ {seconds['total']:.1f} s (lecture {seconds['load']:.1f} s, validation croisée "
+        f"{seconds['cross_validation']:.1f} s, modèle final {seconds['final_fit']:.1f} s), "
+        f"pic mémoire {report['peak_rss_mb']['parent']:.0f} Mo "
+        f"(processus du pool : {report['peak_rss_mb']['workers']:.0f} Mo)"
+    )
+    print(f"💾 Package écrit dans {args.output}, rapport ajouté à {args.report}")
+    print(f"ℹ️ Artefact de service : python export_model.py --model {args.output}")
+
+
+if __name__ == "__main__":
+    main()